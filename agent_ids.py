@@ -0,0 +1,57 @@
+import heapq
+
+
+class AgentIdPool:
+    """
+    密集整數 ID 配發器 (Dense Agent IDs)
+
+    取代每個個體一個 uuid4 字串：
+    - ID 是 0, 1, 2... 的小整數，策略可以用它直接索引
+      "預先配置的陣列 / bitset" (見 BaseStrategy.opponent_flags)。
+    - 被淘汰個體的 ID 會被 "回收"，新複製的個體優先拿到最小的空閒 ID，
+      所以 ID 永遠落在 0..群體大小 之間，每個個體的記憶體是可預期的。
+
+    【注意】回收的 ID 只會在 "世代之間" 被重新配發；
+    engine 每個世代開始時都會 reset() 所有個體，舊對手的狀態不會殘留。
+    """
+
+    __slots__ = ("_next", "_free")
+
+    def __init__(self):
+        self._next = 0
+        self._free: list[int] = []  # 最小堆積 (min-heap)
+
+    def acquire(self) -> int:
+        """取得一個 ID (優先重用最小的空閒 ID)"""
+        if self._free:
+            return heapq.heappop(self._free)
+        agent_id = self._next
+        self._next += 1
+        return agent_id
+
+    def release(self, agent_id: int):
+        """歸還一個不再使用的 ID"""
+        heapq.heappush(self._free, agent_id)
+
+    def get_state(self) -> dict:
+        """可序列化為 JSON 的狀態 (checkpoint 用)"""
+        return {"next": self._next, "free": list(self._free)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "AgentIdPool":
+        pool = cls()
+        pool._next = state["next"]
+        pool._free = list(state["free"])
+        return pool
+
+    @property
+    def capacity(self) -> int:
+        """曾經配發過的最大 ID + 1 (陣列需要的長度)"""
+        return self._next
+
+    def __repr__(self) -> str:
+        return f"AgentIdPool(capacity={self._next}, free={len(self._free)})"
+
+
+# 沒有指定 ID 時 (例如單獨建立策略) 使用的共用配發器
+DEFAULT_AGENT_IDS = AgentIdPool()
@@ -1,95 +1,279 @@
-import importlib
-import inspect
-from pathlib import Path
 import os
+import sys
 import json
 import time
+import random
+import collections
+import contextlib
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 # 1. 匯入 simulation 引擎
 import simulation
-# 2. 需要 BaseStrategy 來做類型檢查
-from strategies.base_strategy import BaseStrategy
+from profiling import StrategyProfiler
+from checkpoint import Checkpointer, run_fingerprint
+from telemetry import TelemetryWriter
+from interaction_trace import TraceWriter, parse_generations
+from results_db import ResultsStore
+from rank_stats import record_rankings
+from history import configure_spill
+from reporting import QUIET, Reporter
+# 2. 策略熱重載 (只重新載入有變更的檔案)
+from strategy_loader import get_loader
+
+# 此路徑對應 docker-compose.yml 中的掛載點 (可用環境變數覆寫)
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "/app/output")
+
+# 策略耗時統計: 每世代印出最耗時的前 N 個策略類別 (0 = 關閉)
+PROFILE_STRATEGIES = int(os.getenv("PROFILE_STRATEGIES", 0))
+
+# Checkpoint: 每 N 世代 "或" 每 N 秒存檔一次 (兩者皆 0 = 關閉，預設)，重啟後自動接續
+CHECKPOINT_GENERATIONS = int(os.getenv("CHECKPOINT_GENERATIONS", 0))
+CHECKPOINT_SECONDS = float(os.getenv("CHECKPOINT_SECONDS", 0))
+CHECKPOINT_DIR = os.path.join(OUTPUT_DIR, "checkpoints")
+
+# 每世代遙測: "jsonl" 或 "bin"，寫入 telemetry_<時間>.<格式>；"db" 寫入結果資料庫 (空字串 = 關閉)
+TELEMETRY = os.getenv("TELEMETRY", "")
+
+# 逐次互動追蹤: "all" 或世代列表 (例如 "1,5-8")，寫入 trace_<時間>.bin (空字串 = 關閉)
+TRACE_GENERATIONS = os.getenv("TRACE_GENERATIONS", "")
+
+# 結果資料庫 (SQLite) 的路徑: 每次模擬的參數與排名 (空字串 = 關閉，只輸出 JSON；預設關閉)
+RESULTS_DB = os.getenv("RESULTS_DB", "")
+
+# 名次統計的串流彙整目錄 (每組參數與策略版本一個狀態檔；空字串 = 關閉，預設關閉)
+RANK_STATS_DIR = os.getenv("RANK_STATS_DIR", "")
+
+# 歷史紀錄的記憶體目標 (MB，軟性): 超過時，沒有回溯上限的歷史把較舊的回合寫出到暫存檔 (0 = 不限制)。
+# 每個歷史至少保留 256 回合 (1.25 KB) 才會寫出，歷史很多時實際用量可能高於目標 (見 history.SpillStore)
+HISTORY_MEMORY_TARGET_MB = float(os.getenv("HISTORY_MEMORY_TARGET_MB", 0))
+HISTORY_SPILL_DIR = os.getenv("HISTORY_SPILL_DIR", "")
+# (模組層級設定: ProcessPoolExecutor 的 worker 匯入 / fork 時一併生效)
+configure_spill(int(HISTORY_MEMORY_TARGET_MB * 2**20), HISTORY_SPILL_DIR or None)
+
+# 日誌: 詳細程度 (2 = 完整 + 進度條, 1 = 每世代一行摘要, 0 = 安靜)、
+# 兩次世代輸出之間的最短秒數 (0 = 每世代都印)、進度條的最短重繪秒數
+VERBOSITY = int(os.getenv("VERBOSITY", 2))
+LOG_INTERVAL = float(os.getenv("LOG_INTERVAL", 0))
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", 0.1))
 
 
 def load_strategy_types(directory: str) -> list[type]:
     """
     動態載入指定目錄下的所有策略 "類別 (Types)"。
+
+    每一輪只重新載入 "有變更" 的檔案，刪除的檔案會被移除 (見 strategy_loader.py)。
     """
-    strategy_types = []
-    strategy_path = Path(directory)
-    module_prefix = strategy_path.name
+    return get_loader(directory).load()
 
-    for py_file in strategy_path.glob("*.py"):
-        if py_file.name in ["__init__.py", "base_strategy.py"]:
-            continue
 
-        module_name = f"{module_prefix}.{py_file.stem}"
+def strategy_versions(directory: str = "strategies") -> dict[str, str]:
+    """本輪使用的策略版本 ({類別名稱: 檔案內容雜湊})，寫入結果檔"""
+    return get_loader(directory).versions()
 
-        try:
-            module = importlib.import_module(module_name)
 
-            for name, cls in inspect.getmembers(module, inspect.isclass):
-                if issubclass(cls, BaseStrategy) and \
-                   cls is not BaseStrategy and \
-                   cls.__module__ == module_name:
+def read_parameters(env: Mapping[str, str] = os.environ) -> dict:
+    """
+    從環境變數讀取演化參數 (提供預設值)。
+
+    Args:
+        env: 參數來源 (預設為 os.environ；參數掃描會傳入每一格的設定)。
+    """
+    return {
+        "initial_copies": int(env.get("INITIAL_COPIES_PER_TYPE", 6)),
+        "kill_count": int(env.get("KILL_AND_REPRODUCE_COUNT", 5)),
+        "rounds_per_game": int(env.get("ROUNDS_PER_GAME", 200)),
+        "avg_matches_per_strategy": int(env.get("AVG_MATCHES_PER_STRATEGY", 100)),
+        "stability_threshold": int(env.get("STABILITY_THRESHOLD", 100)),
+        "noise": float(env.get("NOISE", 0.05)),  # 預設 5% 雜訊
+        # 選擇運算子: truncation / tournament[:大小] / proportional / moran (見 selection.py)
+        "selection": env.get("SELECTION", "truncation"),
+        # 互動結構: 空字串 = 充分混合，或 ring / lattice / small_world / scale_free / file:<路徑> (見 topology.py)
+        "topology": env.get("TOPOLOGY", ""),
+        # "python" (逐次互動)、"vectorized" (NumPy 批次查表引擎)，
+        # 或快速模式 "replicator" / "moran" (期望分數矩陣 + 頻率演化，見 replicator.py)
+        "engine_mode": env.get("ENGINE", "python"),
+        # 淘汰 / 複製名單在此信心水準下確定後，提前結束該世代的循環賽 (0 = 關閉)
+        "early_stop_confidence": float(env.get("EARLY_STOP_CONFIDENCE", 0)),
+    }
 
-                    # 傳回 "類別 (cls)" 本身, 而不是 "實體 (cls())"
-                    strategy_types.append(cls)
-                    print(f"[Loader] 找到策略類別: {cls.__name__}")
 
-        except ImportError as e:
-            print(f"[Loader] 錯誤：無法匯入 {module_name}: {e}")
-        except Exception as e:
-            print(f"[Loader] 載入 {module_name} 時發生未知錯誤: {e}")
+# 參數名稱 (read_parameters 的 key) -> 環境變數名稱
+PARAMETER_ENV = {
+    "initial_copies": "INITIAL_COPIES_PER_TYPE",
+    "kill_count": "KILL_AND_REPRODUCE_COUNT",
+    "rounds_per_game": "ROUNDS_PER_GAME",
+    "avg_matches_per_strategy": "AVG_MATCHES_PER_STRATEGY",
+    "stability_threshold": "STABILITY_THRESHOLD",
+    "noise": "NOISE",
+    "selection": "SELECTION",
+    "topology": "TOPOLOGY",
+    "engine_mode": "ENGINE",
+    "early_stop_confidence": "EARLY_STOP_CONFIDENCE",
+}
+
+
+def print_parameters(params: dict):
+    print("--- 模擬參數 ---")
+    print(f"  NOISE: {params['noise']*100:.1f}%")
+    print(f"  INITIAL_COPIES_PER_TYPE: {params['initial_copies']}")
+    print(f"  KILL_AND_REPRODUCE_COUNT: {params['kill_count']}")
+    print(f"  ROUNDS_PER_GAME: {params['rounds_per_game']}")
+    print(f"  AVG_MATCHES_PER_STRATEGY: {params['avg_matches_per_strategy']}")
+    print(f"  STABILITY_THRESHOLD: {params['stability_threshold']}")
+    print(f"  SELECTION: {params['selection']}")
+    print(f"  TOPOLOGY: {params['topology'] or 'well_mixed'}")
+    print(f"  ENGINE: {params['engine_mode']}")
+    print(f"  EARLY_STOP_CONFIDENCE: {params['early_stop_confidence']}")
+    print("------------------")
 
-    return strategy_types
 
+def open_results_store() -> ResultsStore | None:
+    """開啟結果資料庫 (RESULTS_DB 為空或無法開啟時為 None，只輸出 JSON)"""
+    if not RESULTS_DB:
+        return None
+    try:
+        return ResultsStore(RESULTS_DB)
+    except Exception as e:
+        print(f"[錯誤] 無法開啟結果資料庫 {RESULTS_DB}: {e}")
+        return None
 
-def run_main_simulation():
+
+def save_result(result_data: dict, output_filename: str):
     """
-    【新增】將主邏輯封裝成一個函數，以便在迴圈中呼叫。
+    將結果匯出到 OUTPUT_DIR (預設 /app/output)。
     """
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_path = os.path.join(OUTPUT_DIR, output_filename)
 
-    # --- 1. 載入 "策略類別" ---
-    print("\n" + "="*50)
-    print(f"--- 執行新一輪模擬 (時間: {datetime.now()}) ---")
+    try:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(result_data, f, indent=4, ensure_ascii=False)
+        print(f"\n[結果] 模擬結果已儲存至: {output_path} (本地 ./output/ 目錄)")
+    except Exception as e:
+        print(f"\n[錯誤] 儲存結果失敗: {e}")
+
+
+def load_strategies_or_none() -> list[type] | None:
     print("--- 正在從 'strategies/' 目錄載入策略 ---")
     strategy_types_list = load_strategy_types("strategies")
 
     if not strategy_types_list:
         print("[錯誤] 'strategies' 目錄中未找到任何策略。請檢查掛載。")
-        return  # 提前退出此輪
+        return None
 
     print(f"--- 成功找到 {len(strategy_types_list)} 種策略 ---\n")
+    return strategy_types_list
+
+
+def new_seed() -> int:
+    """產生一個隨機 seed (未指定 SEED 時使用)"""
+    return random.SystemRandom().randrange(2**31)
+
+
+def run_main_simulation(seed: int | None = None):
+    """
+    【新增】將主邏輯封裝成一個函數，以便在迴圈中呼叫。
+
+    Args:
+        seed (int | None): 模擬 RNG 的 seed (None 則隨機，並記錄在結果中)。
+    """
+
+    # --- 1. 載入 "策略類別" ---
+    print("\n" + "="*50)
+    print(f"--- 執行新一輪模擬 (時間: {datetime.now()}) ---")
+    strategy_types_list = load_strategies_or_none()
+
+    if not strategy_types_list:
+        return  # 提前退出此輪
+    # 本輪的策略版本 (checkpoint 指紋、結果檔、名次統計與結果資料庫使用同一份)
+    versions = strategy_versions()
 
     # --- 2. 【修改】從環境變數讀取演化參數 (提供預設值) ---
-    INITIAL_COPIES_PER_TYPE = int(os.getenv("INITIAL_COPIES_PER_TYPE", 6))
-    KILL_AND_REPRODUCE_COUNT = int(os.getenv("KILL_AND_REPRODUCE_COUNT", 5))
-    ROUNDS_PER_GAME = int(os.getenv("ROUNDS_PER_GAME", 200))
-    AVG_MATCHES_PER_STRATEGY = int(os.getenv("AVG_MATCHES_PER_STRATEGY", 100))
-    STABILITY_THRESHOLD = int(os.getenv("STABILITY_THRESHOLD", 100))
-    NOISE = float(os.getenv("NOISE", 0.05))  # 預設 5% 雜訊
+    params = read_parameters()
+    print_parameters(params)
+    NOISE = params["noise"]
 
-    print("--- 模擬參數 ---")
-    print(f"  NOISE: {NOISE*100:.1f}%")
-    print(f"  INITIAL_COPIES_PER_TYPE: {INITIAL_COPIES_PER_TYPE}")
-    print(f"  KILL_AND_REPRODUCE_COUNT: {KILL_AND_REPRODUCE_COUNT}")
-    print(f"  ROUNDS_PER_GAME: {ROUNDS_PER_GAME}")
-    print(f"  AVG_MATCHES_PER_STRATEGY: {AVG_MATCHES_PER_STRATEGY}")
-    print(f"  STABILITY_THRESHOLD: {STABILITY_THRESHOLD}")
-    print("------------------")
+    # (可選) 定期存檔，並從最新的相容 checkpoint 接續 (沿用它的 seed)
+    checkpointer = None
+    if CHECKPOINT_GENERATIONS > 0 or CHECKPOINT_SECONDS > 0:
+        checkpointer = Checkpointer(
+            CHECKPOINT_DIR,
+            run_fingerprint(strategy_types_list, params, versions),
+            every_generations=CHECKPOINT_GENERATIONS,
+            every_seconds=CHECKPOINT_SECONDS)
+        resume_state = checkpointer.load()
+        if resume_state is not None:
+            seed = resume_state["rng"]["seed"]
+            print(f"[Checkpoint] 從世代 {resume_state['generation']} 接續 ({checkpointer.path})")
+
+    if seed is None:
+        seed = new_seed()
+
+    # (可選) 每世代的策略耗時統計，寫入 profile_<時間>.jsonl
+    profiler = None
+    if PROFILE_STRATEGIES > 0:
+        profile_filename = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        profiler = StrategyProfiler(
+            top_n=PROFILE_STRATEGIES,
+            output_path=os.path.join(OUTPUT_DIR, profile_filename))
+
+    # 結果資料庫: 先建立 "執行中" 的紀錄 (每世代紀錄需要 run_id)，結束後寫入排名
+    store = open_results_store()
+    run_id = store.begin_run("single", params, seed, len(strategy_types_list)) if store else None
+
+    # (可選) 每世代的遙測紀錄，寫入 telemetry_<時間>.<jsonl|bin> 或結果資料庫
+    telemetry = None
+    if TELEMETRY == "db":
+        if store is not None:
+            telemetry = store.generation_writer(run_id)
+        else:
+            print("[Telemetry] TELEMETRY=db 需要結果資料庫 (RESULTS_DB)，本次不記錄。")
+    elif TELEMETRY:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        telemetry_filename = f"telemetry_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{TELEMETRY}"
+        telemetry = TelemetryWriter(
+            os.path.join(OUTPUT_DIR, telemetry_filename),
+            [s.__name__ for s in strategy_types_list],
+            fmt=TELEMETRY,
+            metadata={**params, "seed": seed})
+
+    # (可選) 逐次互動追蹤，寫入 trace_<時間>.bin (+ .agents 名冊)
+    trace = None
+    if TRACE_GENERATIONS:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        trace_filename = f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.bin"
+        trace = TraceWriter(
+            os.path.join(OUTPUT_DIR, trace_filename),
+            [s.__name__ for s in strategy_types_list],
+            generations=parse_generations(TRACE_GENERATIONS),
+            metadata={**params, "seed": seed})
 
     # --- 3. 執行 "單次" 演化模擬 ---
-    final_ranking = simulation.run_evolution_simulation(
-        strategy_types=strategy_types_list,
-        initial_copies=INITIAL_COPIES_PER_TYPE,
-        kill_count=KILL_AND_REPRODUCE_COUNT,
-        rounds_per_game=ROUNDS_PER_GAME,
-        avg_matches_per_strategy=AVG_MATCHES_PER_STRATEGY,
-        noise=NOISE,
-        stability_threshold=STABILITY_THRESHOLD
-    )
+    try:
+        final_ranking = simulation.run_evolution_simulation(
+            strategy_types=strategy_types_list,
+            seed=seed,
+            profiler=profiler,
+            checkpointer=checkpointer,
+            telemetry=telemetry,
+            trace=trace,
+            reporter=Reporter(VERBOSITY, LOG_INTERVAL, PROGRESS_INTERVAL),
+            **params
+        )
+    except BaseException:
+        if store is not None:
+            store.close()  # 紀錄維持 "running" (checkpoint 接續時會建立新的紀錄)
+        raise
+    finally:
+        if checkpointer is not None:
+            checkpointer.release()
+        if telemetry is not None:
+            telemetry.close()
+        if trace is not None:
+            trace.close()
+            print(f"[Trace] 已記錄 {trace.records} 次互動: {trace.path}")
 
     # --- 4. 印出最終排名 ---
     print("\n\n" + "🏆"*20)
@@ -100,44 +284,208 @@ def run_main_simulation():
     print("🏆"*20)
 
     # --- 5. 【新增】將結果匯出到 /app/output ---
-    output_dir = "/app/output"  # 此路徑對應 docker-compose.yml 中的掛載點
-    os.makedirs(output_dir, exist_ok=True)
-
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     # 檔名包含雜訊率，方便辨識
     output_filename = f"ranking_{timestamp}_noise_{NOISE*100:.0f}pct.json"
-    output_path = os.path.join(output_dir, output_filename)
 
     result_data = {
         "timestamp_iso": datetime.now().isoformat(),
         "parameters": {
-            "noise": NOISE,
-            "initial_copies": INITIAL_COPIES_PER_TYPE,
-            "kill_count": KILL_AND_REPRODUCE_COUNT,
-            "rounds_per_game": ROUNDS_PER_GAME,
-            "avg_matches_per_strategy": AVG_MATCHES_PER_STRATEGY,
-            "stability_threshold": STABILITY_THRESHOLD,
+            **params,
+            "seed": seed,
             "strategy_count": len(strategy_types_list),
-            "strategies_loaded": [s.__name__ for s in strategy_types_list]
+            "strategies_loaded": [s.__name__ for s in strategy_types_list],
+            "strategy_versions": versions,
         },
         "ranking": final_ranking
     }
+    save_result(result_data, output_filename)
 
-    try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result_data, f, indent=4, ensure_ascii=False)
-        print(f"\n[結果] 模擬結果已儲存至: {output_path} (本地 ./output/ 目錄)")
-    except Exception as e:
-        print(f"\n[錯誤] 儲存結果失敗: {e}")
+    record_rankings(params, versions, [final_ranking], RANK_STATS_DIR)
+    if store is not None:
+        store.finish_run(run_id, final_ranking, versions, source=output_filename)
+        store.close()
+        print(f"[結果] 已寫入結果資料庫: {RESULTS_DB} (run {run_id})")
+
+
+def _run_replicate(strategy_types: list[type], params: dict, seed: int) -> list[str]:
+    """
+    (在 worker 子行程中執行) 以獨立的 seed 執行一次完整演化模擬。
+
+    子行程的輸出會被丟棄，避免多個模擬的日誌互相交錯
+    (並以安靜模式執行，不建立進度條)。
+    """
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull), \
+            contextlib.redirect_stderr(devnull):
+        return simulation.run_evolution_simulation(
+            strategy_types=strategy_types,
+            seed=seed,
+            reporter=Reporter(QUIET),
+            **params
+        )
+
+
+def aggregate_rankings(rankings: list[list[str]], strategy_names: list[str]) -> list[dict]:
+    """
+    彙整多次模擬的排名，產生每個策略的 "名次分佈"。
+
+    Returns:
+        依 "平均名次" 排序的列表，每個元素包含:
+        name, mean_rank, best_rank, worst_rank, rank_distribution ({名次: 次數})
+    """
+    rank_counts = {name: collections.Counter() for name in strategy_names}
+    for ranking in rankings:
+        for position, name in enumerate(ranking, start=1):
+            rank_counts.setdefault(name, collections.Counter())[position] += 1
+
+    report = []
+    for name, counts in rank_counts.items():
+        total = sum(counts.values())
+        if total == 0:
+            continue
+        report.append({
+            "name": name,
+            "mean_rank": sum(rank * n for rank, n in counts.items()) / total,
+            "best_rank": min(counts),
+            "worst_rank": max(counts),
+            "rank_distribution": {str(rank): counts[rank] for rank in sorted(counts)},
+        })
+
+    report.sort(key=lambda item: item["mean_rank"])
+    return report
+
+
+def run_replicates(replicates: int, workers: int | None = None, base_seed: int | None = None):
+    """
+    【副本模式】以 process pool 平行執行多次 "獨立" 的演化模擬，
+    並輸出一份彙整後的排名報告 (含每個策略的名次分佈)。
+
+    Args:
+        replicates (int): 模擬次數 (例如 32)。
+        workers (int | None): 平行行程數 (預設為 CPU 核心數)。
+        base_seed (int | None): 第 i 次模擬使用 seed = base_seed + i。
+    """
+    print("\n" + "="*50)
+    print(f"--- 執行副本模式 (時間: {datetime.now()}) ---")
+    strategy_types_list = load_strategies_or_none()
+
+    if not strategy_types_list:
+        return
+    versions = strategy_versions()
+
+    params = read_parameters()
+    print_parameters(params)
+    NOISE = params["noise"]
+
+    workers = workers or os.cpu_count() or 1
+    if base_seed is None:
+        base_seed = new_seed()
+    seeds = [base_seed + i for i in range(replicates)]
+
+    print(f"--- {replicates} 次模擬, {workers} 個行程, base seed = {base_seed} ---")
+
+    start_time = time.perf_counter()
+    rankings_by_seed: dict[int, list[str]] = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_run_replicate, strategy_types_list, params, seed): seed
+            for seed in seeds
+        }
+        for future in as_completed(futures):
+            seed = futures[future]
+            try:
+                rankings_by_seed[seed] = future.result()
+            except Exception as e:
+                print(f"[錯誤] 副本模擬失敗 (seed={seed}): {e}")
+                continue
+            print(f"[副本] {len(rankings_by_seed)}/{replicates} 完成 (seed={seed})")
+
+    elapsed = time.perf_counter() - start_time
+    rankings = [rankings_by_seed[seed] for seed in sorted(rankings_by_seed)]
+    report = aggregate_rankings(
+        rankings, [s.__name__ for s in strategy_types_list])
+
+    # --- 印出彙整排名 ---
+    print("\n\n" + "🏆"*20)
+    print(f"=== 彙整演化排名 ({len(rankings)} 次模擬, {NOISE*100:.0f}% 雜訊, {elapsed:.1f} 秒) ===")
+    print("="*40)
+    for i, item in enumerate(report):
+        print(f"#{i+1:<3} {item['name']:<20} 平均名次 {item['mean_rank']:>5.2f} "
+              f"(最佳 {item['best_rank']}, 最差 {item['worst_rank']})")
+    print("🏆"*20)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_filename = f"replicates_{timestamp}_noise_{NOISE*100:.0f}pct.json"
+
+    result_data = {
+        "timestamp_iso": datetime.now().isoformat(),
+        "parameters": {
+            **params,
+            "replicates": replicates,
+            "completed": len(rankings),
+            "workers": workers,
+            "base_seed": base_seed,
+            "strategy_count": len(strategy_types_list),
+            "strategies_loaded": [s.__name__ for s in strategy_types_list],
+            "strategy_versions": versions,
+        },
+        "elapsed_seconds": elapsed,
+        "aggregated_ranking": report,
+        "rankings": [{"seed": seed, "ranking": rankings_by_seed[seed]}
+                     for seed in sorted(rankings_by_seed)],
+    }
+    save_result(result_data, output_filename)
+
+    record_rankings(params, versions, [rankings_by_seed[seed] for seed in sorted(rankings_by_seed)], RANK_STATS_DIR)
+
+    # 所有副本在同一個交易中寫入結果資料庫
+    store = open_results_store()
+    if store is not None:
+        store.record_runs("replicate", params, {seed: rankings_by_seed[seed] for seed in sorted(rankings_by_seed)},
+                          len(strategy_types_list), versions, source=output_filename)
+        store.close()
+        print(f"[結果] 已寫入結果資料庫: {RESULTS_DB} ({len(rankings_by_seed)} 次模擬)")
 
 
 if __name__ == "__main__":
 
+    # --- 副本模式 (REPLICATES > 1 時啟用, WORKERS 預設為 CPU 核心數) ---
+    # SEED: 模擬 RNG 的 seed (留空則每輪隨機)
+    REPLICATES = int(os.getenv("REPLICATES", 1))
+    WORKERS = int(os.getenv("WORKERS", 0)) or None
+    SEED = os.getenv("SEED")
+
+    # --- 服務模式 (MODE=service): 以 HTTP 接收模擬工作，取代下面的固定參數迴圈 ---
+    MODE = os.getenv("MODE", "loop")
+    if MODE == "service":
+        import service
+        service.serve(workers=WORKERS)
+        sys.exit(0)
+    # --- worker 模式 (MODE=worker): 從共用 volume 上的佇列領取任務 (多個容器可同時執行) ---
+    if MODE == "worker":
+        import job_queue
+        job_queue.run_worker()
+        sys.exit(0)
+    if MODE != "loop":
+        sys.exit(f"[錯誤] 未知的 MODE: {MODE} (可用: loop, service, worker)")
+
     # --- 【新增】持續執行的迴圈 ---
     # 讓程式可以 7x24 執行，自動進行一輪又一輪的模擬
+    loop_index = 0
     while True:
         try:
-            run_main_simulation()
+            if REPLICATES > 1:
+                # 指定 SEED 時，每一輪使用不重疊的 seed 區段
+                base_seed = None if SEED is None else int(SEED) + loop_index * REPLICATES
+                loop_index += 1
+                run_replicates(REPLICATES, WORKERS, base_seed)
+            else:
+                # 指定 SEED 時，第 k 輪使用 SEED + k (可重現，但每輪不同)
+                seed = None if SEED is None else int(SEED) + loop_index
+                loop_index += 1
+                run_main_simulation(seed)
             # 休息 10 秒，準備下一輪
             print("\n--- 模擬完成。將在 10 秒後執行下一輪... (Ctrl+C 停止) ---")
             time.sleep(10)
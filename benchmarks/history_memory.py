@@ -0,0 +1,118 @@
+"""
+歷史紀錄的 記憶體 / 吞吐量 比較
+
+比較 "舊版 dict 紀錄" (每回合一個 5-key dict) 與 "欄位式 HistoryLog"：
+- 寫入吞吐量 (append / 秒)
+- 讀取吞吐量 (history[-1]["opponent_actual_move"] / 秒)
+- tracemalloc 量測的記憶體用量
+- 有限回溯 (maxlen) 的環形緩衝區：記憶體不隨回合數成長
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.history_memory [回合數]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from definitions import MOVES, MATCH_RESULTS
+from history import HistoryLog
+
+# 有限回溯的保留深度 (例如 Statistical 的 LOOKBACK_WINDOW)
+RING_DEPTH = 10
+
+
+def _random_rounds(count: int) -> list[tuple[int, int, int, int, int]]:
+    rng = random.Random(42)
+    rounds = []
+    for _ in range(count):
+        mi, ma, oi, oa = (rng.randrange(2) for _ in range(4))
+        rounds.append((mi, ma, oi, oa, 2 * ma + oa))
+    return rounds
+
+
+def _fill_dicts(rounds) -> tuple[list[dict], list[dict]]:
+    """舊版作法：一個 dict 同時放進 my_history 與 opponent_history"""
+    my_history: list[dict] = []
+    private_history: list[dict] = []
+    for mi, ma, oi, oa, r in rounds:
+        round_record = {
+            "my_intended_move": MOVES[mi],
+            "my_actual_move": MOVES[ma],
+            "opponent_intended_move": MOVES[oi],
+            "opponent_actual_move": MOVES[oa],
+            "match_result": MATCH_RESULTS[r],
+        }
+        my_history.append(round_record)
+        private_history.append(round_record)
+    return my_history, private_history
+
+
+def _fill_logs(rounds) -> tuple[HistoryLog, HistoryLog]:
+    """新版作法：兩個欄位式 HistoryLog"""
+    my_history = HistoryLog()
+    private_history = HistoryLog()
+    for codes in rounds:
+        my_history.append_codes(*codes)
+        private_history.append_codes(*codes)
+    return my_history, private_history
+
+
+def _fill_rings(rounds) -> tuple[HistoryLog, HistoryLog]:
+    """有限回溯：只保留最近 RING_DEPTH 回合的環形緩衝區"""
+    my_history = HistoryLog(maxlen=RING_DEPTH)
+    private_history = HistoryLog(maxlen=RING_DEPTH)
+    for codes in rounds:
+        my_history.append_codes(*codes)
+        private_history.append_codes(*codes)
+    return my_history, private_history
+
+
+def _measure(fill, rounds) -> dict:
+    # 1. 記憶體 (tracemalloc)
+    tracemalloc.start()
+    histories = fill(rounds)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # 2. 寫入吞吐量
+    start = time.perf_counter()
+    fill(rounds)
+    write_seconds = time.perf_counter() - start
+
+    # 3. 讀取吞吐量 (模擬 TFT 類策略讀取上一回合)
+    my_history = histories[0]
+    reads = len(rounds)
+    start = time.perf_counter()
+    for _ in range(reads):
+        my_history[-1]["opponent_actual_move"]
+    read_seconds = time.perf_counter() - start
+
+    return {
+        "bytes": current,
+        "peak_bytes": peak,
+        "appends_per_sec": len(rounds) / write_seconds,
+        "reads_per_sec": reads / read_seconds,
+    }
+
+
+def main(round_count: int = 200_000):
+    rounds = _random_rounds(round_count)
+    results = {
+        "dict records": _measure(_fill_dicts, rounds),
+        "HistoryLog": _measure(_fill_logs, rounds),
+        f"ring maxlen={RING_DEPTH}": _measure(_fill_rings, rounds),
+    }
+
+    print(f"--- 歷史紀錄比較 ({round_count} 回合, my_history + opponent_history) ---")
+    print(f"{'實作':<18}{'記憶體 (MB)':>14}{'bytes/回合':>12}{'append/s':>14}{'read/s':>14}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['bytes'] / 1e6:>14.2f}{r['bytes'] / round_count:>12.1f}"
+              f"{r['appends_per_sec']:>14,.0f}{r['reads_per_sec']:>14,.0f}")
+
+    ratio = results["dict records"]["bytes"] / results["HistoryLog"]["bytes"]
+    print(f"記憶體節省: {ratio:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
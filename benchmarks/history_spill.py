@@ -0,0 +1,99 @@
+"""
+歷史紀錄寫出到磁碟 (記憶體目標) 的效果
+
+1. 內建策略 (歷史深度皆為 0，只維護統計)：設定目標前後的 "互動 / 秒" 應相同，且不會寫出任何回合
+2. 把同樣的策略改成 "沒有回溯上限" (深度 None，例如自行撰寫、未宣告深度的策略)：
+   - 不限制 vs 限制記憶體的 "互動 / 秒"、my_history 常駐的欄位記憶體、tracemalloc 峰值、寫出到磁碟的量
+   - 兩者每個個體的總分與完整歷史 (迭代 / 切片 / codes) 必須完全相同
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.history_spill [每場回合數] [目標 MB]
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+import app
+import engine
+import history
+from reporting import QUIET, Reporter
+from rng import SimulationRNG
+
+SEED = 12345
+NOISE = 0.05
+COPIES = 4
+AVG_MATCHES = 20
+
+
+def _unbounded(strategy_types: list[type]) -> list[type]:
+    """同名子類別，三種歷史深度皆為 None (保留每一回合)"""
+    return [type(t.__name__, (t,), {"PRIVATE_HISTORY_DEPTH": None, "GLOBAL_HISTORY_DEPTH": None,
+                                     "PUBLIC_HISTORY_DEPTH": None})
+            for t in strategy_types]
+
+
+def _run(strategy_types, rounds: int, target_bytes: int) -> dict:
+    history.configure_spill(target_bytes)
+    before = history.spill_stats()
+    population = [t(i) for i, t in enumerate(strategy_types * COPIES)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine.run_tournament(population, rounds, AVG_MATCHES, NOISE, SimulationRNG(SEED),
+                          sort=False, reporter=Reporter(QUIET))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = history.spill_stats()
+    interactions = (len(population) * AVG_MATCHES // 2) * rounds
+    return {
+        "population": population,
+        "per_sec": interactions / elapsed,
+        "peak_bytes": peak,
+        "history_bytes": sum(s.my_history.nbytes() for s in population),
+        "spilled_rounds": after["spilled_rounds"] - before["spilled_rounds"],
+        "spilled_bytes": after["spilled_bytes"] - before["spilled_bytes"],
+    }
+
+
+def _same_results(a: list, b: list) -> bool:
+    """總分與每個個體的 my_history 完全相同"""
+    for s1, s2 in zip(a, b):
+        if s1.total_score != s2.total_score:
+            return False
+        h1, h2 = s1.my_history, s2.my_history
+        if list(h1) != list(h2) or h1[len(h1) // 3:len(h1) // 2] != h2[len(h2) // 3:len(h2) // 2]:
+            return False
+        if any(h1.codes(field) != h2.codes(field) for field in history.FIELDS):
+            return False
+    return True
+
+
+def main(rounds: int = 200, target_mb: float = 0.25):
+    with contextlib.redirect_stdout(io.StringIO()):
+        strategy_types = app.load_strategy_types("strategies")
+    target = int(target_mb * 2**20)
+
+    print(f"--- 內建策略 ({len(strategy_types) * COPIES} 個體, {rounds} 回合/場) ---")
+    plain = _run(strategy_types, rounds, 0)
+    limited = _run(strategy_types, rounds, target)
+    print(f"不限制:       {plain['per_sec']:>12,.0f} 互動/秒")
+    print(f"目標 {target_mb} MB: {limited['per_sec']:>12,.0f} 互動/秒 "
+          f"({limited['per_sec'] / plain['per_sec'] - 1:+.1%})，寫出 {limited['spilled_rounds']} 回合")
+
+    unbounded_types = _unbounded(strategy_types)
+    print(f"\n--- 沒有回溯上限的歷史 (同樣的策略，深度 None) ---")
+    plain = _run(unbounded_types, rounds, 0)
+    limited = _run(unbounded_types, rounds, target)
+    print(f"{'':<14}{'互動/秒':>14}{'歷史 (MB)':>12}{'峰值 (MB)':>12}{'寫出回合':>12}{'寫出 (MB)':>12}")
+    for name, r in (("不限制", plain), (f"目標 {target_mb} MB", limited)):
+        print(f"{name:<14}{r['per_sec']:>14,.0f}{r['history_bytes'] / 2**20:>12.2f}{r['peak_bytes'] / 2**20:>12.2f}"
+              f"{r['spilled_rounds']:>12,}{r['spilled_bytes'] / 2**20:>12.2f}")
+    print(f"結果一致 (總分 + 完整歷史): {_same_results(plain['population'], limited['population'])}")
+    history.configure_spill(0)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 0.25)
@@ -0,0 +1,80 @@
+"""
+每次互動的 "非策略" 開銷：Enum 路徑 vs 整數編碼路徑
+
+兩個 AlwaysCooperate 個體反覆互動 (play() 開銷固定且極小)，比較：
+- enum:    apply_internal_noise (Enum) -> apply_noise (Enum)
+           -> RESULT_MATRIX[(m1, m2)] -> update(Enum...) (含 Enum -> 整數轉換)
+- codes:   slip_code (0/1) -> XOR 翻轉 -> 2 * m1 + m2 -> record(整數...)
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.int_codes [互動次數]
+"""
+import sys
+import time
+
+from definitions import Move, RESULT_MATRIX
+from engine import apply_noise
+from rng import SimulationRNG
+from strategies.always_cooperate import AlwaysCooperate
+from strategies.base_strategy import configure_population
+
+NOISE = 0.05
+
+
+def _new_pair(seed: int):
+    rng = SimulationRNG(seed)
+    strategy1, strategy2 = AlwaysCooperate(), AlwaysCooperate()
+    configure_population([strategy1, strategy2])
+    for strategy in (strategy1, strategy2):
+        strategy.rng = rng
+        strategy.reset()
+    return rng, strategy1, strategy2
+
+
+def _enum_path(interactions: int) -> float:
+    rng, strategy1, strategy2 = _new_pair(0)
+    start = time.perf_counter()
+    for _ in range(interactions):
+        intent1 = strategy1.play(strategy2.unique_id, strategy2.my_history, strategy2.total_score)
+        intent2 = strategy2.play(strategy1.unique_id, strategy1.my_history, strategy1.total_score)
+        slipped1 = strategy1.apply_internal_noise(intent1)
+        slipped2 = strategy2.apply_internal_noise(intent2)
+        actual1 = apply_noise(slipped1, NOISE, rng)
+        actual2 = apply_noise(slipped2, NOISE, rng)
+        result1, result2 = RESULT_MATRIX[(actual1, actual2)]
+        strategy1.update(strategy2.unique_id, slipped1, actual1, slipped2, actual2, result1)
+        strategy2.update(strategy1.unique_id, slipped2, actual2, slipped1, actual1, result2)
+    return time.perf_counter() - start
+
+
+def _code_path(interactions: int) -> float:
+    rng, strategy1, strategy2 = _new_pair(0)
+    slip1, slip2 = strategy1.code_slipper(), strategy2.code_slipper()
+    record1, record2 = strategy1.code_recorder(), strategy2.code_recorder()
+    chance = rng.chance
+    cheat = Move.CHEAT
+    start = time.perf_counter()
+    for _ in range(interactions):
+        intent1 = strategy1.play(strategy2.unique_id, strategy2.my_history, strategy2.total_score)
+        intent2 = strategy2.play(strategy1.unique_id, strategy1.my_history, strategy1.total_score)
+        slipped1 = slip1(1 if intent1 is cheat else 0)
+        slipped2 = slip2(1 if intent2 is cheat else 0)
+        actual1 = slipped1 ^ chance(NOISE)
+        actual2 = slipped2 ^ chance(NOISE)
+        record1(strategy2.unique_id, slipped1, actual1, slipped2, actual2, 2 * actual1 + actual2)
+        record2(strategy1.unique_id, slipped2, actual2, slipped1, actual1, 2 * actual2 + actual1)
+    return time.perf_counter() - start
+
+
+def main(interactions: int = 200_000):
+    enum_seconds = _enum_path(interactions)
+    code_seconds = _code_path(interactions)
+    print(f"--- 每次互動開銷 ({interactions} 次互動, 不含配對) ---")
+    print(f"Enum 路徑:   {enum_seconds / interactions * 1e9:>8.0f} ns/互動")
+    print(f"整數編碼:    {code_seconds / interactions * 1e9:>8.0f} ns/互動")
+    print(f"每次互動節省 {(enum_seconds - code_seconds) / interactions * 1e9:.0f} ns "
+          f"({enum_seconds / code_seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,114 @@
+"""
+日誌 / 進度回報的開銷
+
+1. 逐次互動的 tqdm (原本的做法) vs 每 PROGRESS_BATCH 次互動更新一次：每次互動多花的 ns
+2. engine.run_tournament 在 VERBOSITY=2 (進度條 + 日誌) 與 VERBOSITY=0 (安靜) 下的 "互動 / 秒"
+3. 一次完整演化模擬在各詳細程度 / LOG_INTERVAL 下輸出的日誌大小
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.reporting [互動次數]
+"""
+import contextlib
+import io
+import sys
+import time
+
+from tqdm import tqdm
+
+import app
+import engine
+import simulation
+from reporting import DETAIL, PROGRESS_BATCH, QUIET, SUMMARY, Reporter
+from rng import SimulationRNG
+
+SEED = 12345
+NOISE = 0.05
+REPEATS = 3
+
+
+def _per_interaction_tqdm(interactions: int) -> float:
+    sink = io.StringIO()
+    start = time.perf_counter()
+    for _ in tqdm(range(interactions), file=sink, leave=False):
+        pass
+    return time.perf_counter() - start
+
+
+def _batched_progress(interactions: int) -> float:
+    sink = io.StringIO()
+    start = time.perf_counter()
+    progress_bar = tqdm(total=interactions, file=sink, leave=False)
+    done = 0
+    while done < interactions:
+        batch = min(PROGRESS_BATCH, interactions - done)
+        for _ in range(batch):
+            pass
+        progress_bar.update(batch)
+        done += batch
+    progress_bar.close()
+    return time.perf_counter() - start
+
+
+def _plain_loop(interactions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(interactions):
+        pass
+    return time.perf_counter() - start
+
+
+def _tournament(strategy_types, reporter: Reporter, rounds: int, avg_matches: int) -> float:
+    population = [t() for t in strategy_types for _ in range(6)]
+    interactions = (len(population) * avg_matches // 2) * rounds
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        engine.run_tournament(population, rounds, avg_matches, NOISE, SimulationRNG(SEED),
+                              reporter=reporter)
+        elapsed = time.perf_counter() - start
+    return interactions / elapsed
+
+
+def _log_bytes(strategy_types, reporter: Reporter) -> tuple[int, float]:
+    out, err = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        start = time.perf_counter()
+        simulation.run_evolution_simulation(
+            strategy_types, initial_copies=2, kill_count=2, rounds_per_game=20,
+            avg_matches_per_strategy=5, noise=NOISE, stability_threshold=20,
+            seed=SEED, reporter=reporter)
+        elapsed = time.perf_counter() - start
+    return len(out.getvalue().encode()) + len(err.getvalue().encode()), elapsed
+
+
+def main(interactions: int = 2_000_000):
+    plain = _plain_loop(interactions)
+    legacy = _per_interaction_tqdm(interactions)
+    batched = _batched_progress(interactions)
+    print(f"--- 進度條開銷 ({interactions} 次互動，扣除空迴圈) ---")
+    print(f"逐次互動 tqdm:  {(legacy - plain) / interactions * 1e9:>8.1f} ns/互動")
+    print(f"批次更新:       {(batched - plain) / interactions * 1e9:>8.1f} ns/互動")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        strategy_types = app.load_strategy_types("strategies")
+
+    # 交替量測並取最佳值 (排除暖機與雜訊)
+    detail = quiet = 0.0
+    for _ in range(REPEATS):
+        detail = max(detail, _tournament(strategy_types, Reporter(DETAIL, progress_interval=0), 100, 20))
+        quiet = max(quiet, _tournament(strategy_types, Reporter(QUIET), 100, 20))
+    print(f"\n--- engine.run_tournament 吞吐量 (最佳 {REPEATS} 次) ---")
+    print(f"VERBOSITY=2 (進度條): {detail:>12,.0f} 互動/秒")
+    print(f"VERBOSITY=0 (安靜):   {quiet:>12,.0f} 互動/秒 ({quiet / detail - 1:+.1%})")
+
+    print("\n--- 完整演化模擬的日誌大小 ---")
+    for label, reporter in [
+        ("VERBOSITY=2", Reporter(DETAIL)),
+        ("VERBOSITY=2, LOG_INTERVAL=0.05", Reporter(DETAIL, log_interval=0.05)),
+        ("VERBOSITY=1", Reporter(SUMMARY)),
+        ("VERBOSITY=0", Reporter(QUIET)),
+    ]:
+        size, elapsed = _log_bytes(strategy_types, reporter)
+        print(f"{label:<32} {size:>10,} bytes  {elapsed:>6.2f} 秒")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,55 @@
+"""
+RNG 開銷比較：全域 random 模組 vs 預抽區塊的 SimulationRNG
+
+模擬 engine 每次互動的亂數用量：
+- 1 次配對 (random.sample(strategies, 2)  vs  rng.pair(n))
+- 2 次內部雜訊 + 2 次外部雜訊 (random.random() < p  vs  rng.chance(p))
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.rng [互動次數]
+"""
+import random
+import sys
+import time
+
+from rng import SimulationRNG
+
+POPULATION = list(range(138))
+INTERNAL_NOISE = 0.02
+NOISE = 0.05
+
+
+def _global_random(interactions: int) -> float:
+    start = time.perf_counter()
+    for _ in range(interactions):
+        random.sample(POPULATION, 2)
+        random.random() < INTERNAL_NOISE
+        random.random() < INTERNAL_NOISE
+        random.random() < NOISE
+        random.random() < NOISE
+    return time.perf_counter() - start
+
+
+def _simulation_rng(interactions: int) -> float:
+    rng = SimulationRNG(0)
+    n = len(POPULATION)
+    start = time.perf_counter()
+    for _ in range(interactions):
+        rng.pair(n)
+        rng.chance(INTERNAL_NOISE)
+        rng.chance(INTERNAL_NOISE)
+        rng.chance(NOISE)
+        rng.chance(NOISE)
+    return time.perf_counter() - start
+
+
+def main(interactions: int = 500_000):
+    baseline = _global_random(interactions)
+    buffered = _simulation_rng(interactions)
+    print(f"--- 每次互動的 RNG 開銷 ({interactions} 次互動) ---")
+    print(f"全域 random:    {baseline / interactions * 1e9:>8.0f} ns/互動")
+    print(f"SimulationRNG:  {buffered / interactions * 1e9:>8.0f} ns/互動 ({baseline / buffered:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
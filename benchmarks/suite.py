@@ -0,0 +1,246 @@
+"""
+效能基準測試套件 (Benchmark Suite)
+
+量測四個部分，結果寫成 JSON，並可與先前儲存的 "基準 (baseline)" 比較：
+1. tournament:  engine.run_tournament 在不同群體大小 / 回合數下的 "互動 / 秒"
+2. strategy:    每個策略類別 play() 與 update() 的 "每次呼叫耗時"
+3. generation:  simulation.run_evolution_simulation (固定 seed) 的 "每世代耗時"
+4. memory:      一次循環賽的 tracemalloc 峰值，與整個行程的最大 RSS
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.suite                           # 完整量測，寫入 benchmark_results.json
+    python -m benchmarks.suite --quick                   # 縮小規模 (快速檢查)
+    python -m benchmarks.suite --baseline base.json      # 與基準比較，退步超過門檻則 exit 1
+    python -m benchmarks.suite --save-baseline base.json # 另存為新的基準
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import app
+import engine
+import simulation
+from rng import SimulationRNG
+
+SEED = 12345
+NOISE = 0.05
+
+# 每個量測項目的 "方向"：True = 越大越好 (吞吐量)，False = 越小越好 (耗時 / 記憶體)
+HIGHER_IS_BETTER_SUFFIXES = ("_per_sec",)
+
+
+@contextlib.contextmanager
+def _quiet():
+    """丟棄 engine / simulation 的日誌與進度條"""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def _load_types() -> list[type]:
+    with _quiet():
+        return app.load_strategy_types("strategies")
+
+
+def _population(strategy_types: list[type], size: int) -> list:
+    """依序輪流建立個體，直到群體大小為 size"""
+    return [strategy_types[i % len(strategy_types)]() for i in range(size)]
+
+
+# --- 1. 循環賽吞吐量 ---
+
+def bench_tournament(strategy_types, population_sizes, rounds_list, avg_matches) -> dict:
+    results = {}
+    for size in population_sizes:
+        for rounds in rounds_list:
+            population = _population(strategy_types, size)
+            interactions = (size * avg_matches // 2) * rounds
+            with _quiet():
+                start = time.perf_counter()
+                engine.run_tournament(population, rounds, avg_matches, NOISE, SimulationRNG(SEED))
+                elapsed = time.perf_counter() - start
+            results[f"tournament.n{size}.r{rounds}.interactions_per_sec"] = interactions / elapsed
+    return results
+
+
+# --- 2. 每個策略的 play() / update() 耗時 ---
+
+def bench_strategies(strategy_types, warmup_interactions, calls) -> dict:
+    """
+    先以混合群體熱身 (讓歷史與內部狀態接近真實)，
+    再對每個類別的一個個體反覆呼叫 play() 與 engine 使用的記錄函數。
+    """
+    population = _population(strategy_types, 2 * len(strategy_types))
+    rng = SimulationRNG(SEED)
+    with _quiet():
+        engine.run_tournament(population, warmup_interactions, 2, NOISE, rng)
+    # (run_tournament 開始時會 reset，所以熱身後的狀態保留在 population 上)
+
+    results = {}
+    opponents = population[len(strategy_types):]
+    for strategy in population[:len(strategy_types)]:
+        name = type(strategy).__name__
+        opponent_args = [(o.unique_id, o.my_history, o.total_score) for o in opponents]
+
+        start = time.perf_counter()
+        for i in range(calls):
+            strategy.play(*opponent_args[i % len(opponent_args)])
+        play_seconds = time.perf_counter() - start
+
+        recorder = strategy.code_recorder()
+        start = time.perf_counter()
+        for i in range(calls):
+            recorder(opponent_args[i % len(opponent_args)][0], 0, 0, i & 1, i & 1, i & 1)
+        update_seconds = time.perf_counter() - start
+
+        results[f"strategy.{name}.play_ns"] = play_seconds / calls * 1e9
+        results[f"strategy.{name}.update_ns"] = update_seconds / calls * 1e9
+    return results
+
+
+# --- 3. 每世代耗時 (端到端) ---
+
+def bench_generation(strategy_types, params: dict) -> dict:
+    generations = 0
+    original = engine.run_tournament
+
+    def counting_run_tournament(*args, **kwargs):
+        nonlocal generations
+        generations += 1
+        return original(*args, **kwargs)
+
+    engine.run_tournament = counting_run_tournament
+    try:
+        with _quiet():
+            start = time.perf_counter()
+            simulation.run_evolution_simulation(strategy_types=strategy_types, seed=SEED, **params)
+            elapsed = time.perf_counter() - start
+    finally:
+        engine.run_tournament = original
+
+    return {
+        "generation.count": generations,
+        "generation.seconds_per_generation": elapsed / max(generations, 1),
+    }
+
+
+# --- 4. 記憶體峰值 ---
+
+def bench_memory(strategy_types, size, rounds, avg_matches) -> dict:
+    population = _population(strategy_types, size)
+    tracemalloc.start()
+    with _quiet():
+        engine.run_tournament(population, rounds, avg_matches, NOISE, SimulationRNG(SEED))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Linux 的 ru_maxrss 單位是 KB
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {
+        "memory.tournament_peak_bytes": peak,
+        "memory.process_max_rss_bytes": max_rss,
+    }
+
+
+# --- 比較 ---
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    回傳所有 "退步超過 threshold" 的項目描述 (空列表 = 沒有退步)。
+    """
+    regressions = []
+    for key, base_value in baseline.items():
+        value = results.get(key)
+        if value is None or not base_value or key.endswith(".count"):
+            continue
+        higher_is_better = key.endswith(HIGHER_IS_BETTER_SUFFIXES)
+        change = (value - base_value) / base_value
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            regressions.append(f"{key}: {base_value:,.1f} -> {value:,.1f} ({change:+.1%})")
+    return regressions
+
+
+def run_suite(quick: bool = False) -> dict:
+    strategy_types = _load_types()
+    if quick:
+        sizes, rounds_list, matches = [46], [20], 10
+        warmup, calls = 20, 2_000
+        params = dict(initial_copies=2, kill_count=2, rounds_per_game=10,
+                      avg_matches_per_strategy=5, noise=NOISE, stability_threshold=3)
+        memory_args = (46, 20, 10)
+    else:
+        sizes, rounds_list, matches = [46, 138, 276], [20, 200], 20
+        warmup, calls = 200, 20_000
+        params = dict(initial_copies=6, kill_count=5, rounds_per_game=50,
+                      avg_matches_per_strategy=20, noise=NOISE, stability_threshold=5)
+        memory_args = (138, 200, 20)
+
+    results = {}
+    print("[Benchmark] 1/4 循環賽吞吐量...")
+    results.update(bench_tournament(strategy_types, sizes, rounds_list, matches))
+    print("[Benchmark] 2/4 策略 play()/update() 耗時...")
+    results.update(bench_strategies(strategy_types, warmup, calls))
+    print("[Benchmark] 3/4 每世代耗時...")
+    results.update(bench_generation(strategy_types, params))
+    print("[Benchmark] 4/4 記憶體峰值...")
+    results.update(bench_memory(strategy_types, *memory_args))
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="演化模擬器效能基準測試")
+    parser.add_argument("--quick", action="store_true", help="縮小規模，快速檢查")
+    parser.add_argument("--output", default="benchmark_results.json", help="結果 JSON 路徑")
+    parser.add_argument("--baseline", help="要比較的基準 JSON")
+    parser.add_argument("--save-baseline", help="把這次結果另存為基準 JSON")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="允許的退步比例 (預設 0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(quick=args.quick)
+    report = {
+        "timestamp_iso": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "quick": args.quick,
+        "seed": SEED,
+        "results": results,
+    }
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"[Benchmark] 結果已儲存至: {path}")
+
+    print("\n--- 結果 ---")
+    for key, value in results.items():
+        print(f"  {key:<55} {value:>18,.3f}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("quick") != args.quick:
+        print("[Benchmark] 警告：基準與本次的規模 (--quick) 不同，比較結果僅供參考。")
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"\n!!! 效能退步 (超過 {args.threshold:.0%}) !!!")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+
+    print(f"\n[Benchmark] 與基準相比沒有超過 {args.threshold:.0%} 的退步。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+逐次互動追蹤的開銷
+
+1. engine.run_tournament 在 "不追蹤" 與 "追蹤每次互動" 下的 "互動 / 秒"
+   (先各預熱一次，之後每次重複交換兩者的先後順序，取最佳值)
+2. 每筆紀錄的磁碟大小，以及換算成 10^8 次互動的檔案大小
+3. TraceReader 以 memmap 篩選一個世代 / 某些個體的耗時
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.trace [每場回合數]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import app
+import engine
+from interaction_trace import TRACE_DTYPE, TraceReader, TraceWriter
+from reporting import QUIET, Reporter
+from rng import SimulationRNG
+
+SEED = 12345
+NOISE = 0.05
+REPEATS = 4
+COPIES = 6
+AVG_MATCHES = 20
+
+
+def _tournament(strategy_types, rounds: int, trace: TraceWriter | None) -> tuple[int, float]:
+    population = [t(i) for i, t in enumerate(strategy_types * COPIES)]
+    start = time.perf_counter()
+    engine.run_tournament(population, rounds, AVG_MATCHES, NOISE, SimulationRNG(SEED),
+                          sort=False, reporter=Reporter(QUIET), trace=trace)
+    elapsed = time.perf_counter() - start
+    return (len(population) * AVG_MATCHES // 2) * rounds, elapsed
+
+
+def main(rounds: int = 100):
+    with contextlib.redirect_stdout(io.StringIO()):
+        strategy_types = app.load_strategy_types("strategies")
+    names = [t.__name__ for t in strategy_types]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.bin")
+        def measure(traced: bool) -> tuple[int, float]:
+            trace = None
+            if traced:
+                trace = TraceWriter(path, names)
+                trace.generation = 1
+            interactions, elapsed = _tournament(strategy_types, rounds, trace)
+            if trace is not None:
+                trace.close()
+            return interactions, interactions / elapsed
+
+        # 預熱 (不計入)，之後交替先後順序，避免快取 / 預熱效果只落在其中一方
+        measure(False)
+        measure(True)
+        best = {False: 0.0, True: 0.0}
+        for repeat in range(REPEATS):
+            for traced in ((False, True) if repeat % 2 == 0 else (True, False)):
+                interactions, per_sec = measure(traced)
+                best[traced] = max(best[traced], per_sec)
+        plain, traced = best[False], best[True]
+
+        print(f"--- engine.run_tournament 吞吐量 ({interactions} 次互動，最佳 {REPEATS} 次) ---")
+        print(f"不追蹤: {plain:>12,.0f} 互動/秒")
+        print(f"追蹤:   {traced:>12,.0f} 互動/秒 ({traced / plain - 1:+.1%})")
+
+        size = os.path.getsize(path)
+        print("\n--- 檔案大小 ---")
+        print(f"{size:,} bytes ({TRACE_DTYPE.itemsize} bytes/互動)；10^8 次互動約 "
+              f"{TRACE_DTYPE.itemsize * 10**8 / 1e9:.1f} GB")
+
+        reader = TraceReader(path)
+        start = time.perf_counter()
+        records = reader.generation(1)
+        agents = reader.agents(1, names[0])
+        selected = reader.involving(records, agents)
+        elapsed = time.perf_counter() - start
+        print("\n--- memmap 篩選 ---")
+        print(f"{names[0]} 的 {len(agents)} 個個體參與 {len(selected)}/{len(records)} 次互動，"
+              f"篩選耗時 {elapsed * 1000:.1f} ms")
+        del reader, records, selected
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,71 @@
+"""
+向量化引擎 vs 原引擎 的吞吐量比較 (互動 / 秒)
+
+比較兩種群體:
+- table:   只包含 "查表式" 策略 (全部由 NumPy 執行)
+- default: strategies/ 目錄下的所有策略 (非查表式策略退回 Python 路徑)
+
+同時列出每種策略 "每回合平均得分"，確認兩個引擎的結果在統計上一致。
+
+執行方式 (於專案根目錄):
+    python -m benchmarks.vector_engine [回合/場] [場均/人]
+"""
+import collections
+import contextlib
+import io
+import random
+import sys
+import time
+
+import app
+import engine
+import vector_engine
+
+COPIES_PER_TYPE = 6
+NOISE = 0.05
+
+
+def _measure(run_tournament, strategy_types, rounds_per_game, avg_matches) -> tuple[float, dict]:
+    population = [t() for t in strategy_types for _ in range(COPIES_PER_TYPE)]
+    total_interactions = (len(population) * avg_matches // 2) * rounds_per_game
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        start = time.perf_counter()
+        run_tournament(population, rounds_per_game, avg_matches, NOISE)
+        elapsed = time.perf_counter() - start
+
+    scores = collections.defaultdict(list)
+    for strategy in population:
+        scores[type(strategy).__name__].append(strategy.total_score)
+    per_round = {name: sum(v) / len(v) / (rounds_per_game * avg_matches)
+                 for name, v in scores.items()}
+    return total_interactions / elapsed, per_round
+
+
+def main(rounds_per_game: int = 200, avg_matches: int = 20):
+    random.seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_types = app.load_strategy_types("strategies")
+    populations = {
+        "table": [t for t in all_types if vector_engine.table_rule_of(t)],
+        "default": all_types,
+    }
+
+    for name, strategy_types in populations.items():
+        python_rate, python_scores = _measure(
+            engine.run_tournament, strategy_types, rounds_per_game, avg_matches)
+        vector_rate, vector_scores = _measure(
+            vector_engine.run_tournament, strategy_types, rounds_per_game, avg_matches)
+
+        print(f"\n--- 群體: {name} ({len(strategy_types)} 種 x {COPIES_PER_TYPE}) ---")
+        print(f"{'策略':<20}{'python 分/回合':>16}{'vectorized 分/回合':>20}")
+        for strategy_name in sorted(python_scores):
+            print(f"{strategy_name:<20}{python_scores[strategy_name]:>16.3f}"
+                  f"{vector_scores[strategy_name]:>20.3f}")
+        print(f"python:     {python_rate:>12,.0f} 互動/秒")
+        print(f"vectorized: {vector_rate:>12,.0f} 互動/秒 ({vector_rate / python_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,174 @@
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import socket
+import time
+
+
+def run_fingerprint(strategy_types: list[type], params: dict, strategy_versions: dict[str, str]) -> str:
+    """
+    "相容性" 指紋：策略種類 (依序) + 策略版本 (檔案內容雜湊) + 演化參數 (不含 seed)。
+    指紋相同的 checkpoint 才能被接續執行 (策略檔案在崩潰後被修改時不會以新程式碼接續舊狀態)。
+    """
+    payload = {
+        "strategies": [t.__name__ for t in strategy_types],
+        "versions": strategy_versions,
+        "parameters": {k: v for k, v in sorted(params.items()) if k != "seed"},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class Checkpointer:
+    """
+    長時間演化模擬的 Checkpoint / Resume
+
+    每個世代結束時由 simulation 呼叫 maybe_save()，
+    距離上次存檔已滿 every_generations 世代 "或" every_seconds 秒 (0 = 不依此條件) 就存檔：
+    - 內容: 群體 (種類名稱 + 個體 ID)、ID 配發器、世代數、穩定度、滅絕順序、RNG 狀態。
+      個體每世代開始都會 reset，所以不需要保存歷史；RNG 只存 "區塊產生前的狀態"，
+      整個檔案只有數 KB。
+    - 原子寫入: 先寫暫存檔再 os.replace()，程序在任何時刻崩潰都不會留下半個檔案。
+
+    啟動時由 app 呼叫 load()，找到的狀態放在 resume_state，simulation 會從該世代接續。
+    模擬正常結束後由 simulation 呼叫 clear() 刪除 checkpoint，
+    下一次啟動時 load() 只會找到 "未完成" 的模擬。
+
+    所有權: 執行中的模擬對 "<checkpoint>.lock" 持有排他的 fcntl.flock (第一次存檔或接續時取得，
+    內容為持有者的主機 / pid)。多個容器共用 ./output 時，load() 略過仍被鎖住的 checkpoint
+    (另一個行程正在寫入)，不會接續同一條軌跡；持有者崩潰時鎖由核心釋放，checkpoint 即可被接續。
+    結束時 (含例外) 由 app 呼叫 release()。
+    第一次存檔時若同一路徑 (相同參數與 seed) 已被其他行程持有，本次模擬不存檔 (不寫入不屬於自己的檔案)。
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: str, fingerprint: str,
+                 every_generations: int = 10, every_seconds: float = 0.0):
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.every_generations = every_generations
+        self.every_seconds = every_seconds
+        self.path: str | None = None
+        # load() 找到的狀態 (simulation 會從這裡接續)
+        self.resume_state: dict | None = None
+        self._last_generation = 0
+        self._last_time = time.monotonic()
+        self._lock = None  # 持有中的 "<checkpoint>.lock" (已 flock)
+        self._disabled = False  # checkpoint 由其他行程持有: 本次不存檔
+
+    # --- 所有權 ---
+
+    def _claim(self, path: str) -> bool:
+        """取得 checkpoint 的排他鎖 (已被其他行程持有時回傳 False)"""
+        os.makedirs(self.directory, exist_ok=True)
+        lock = open(f"{path}.lock", "a+", encoding="utf-8")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        lock.truncate(0)
+        lock.write(json.dumps({"host": socket.gethostname(), "pid": os.getpid(), "claimed_at": time.time()}))
+        lock.flush()
+        self._lock = lock
+        return True
+
+    def release(self):
+        """釋放 checkpoint 的鎖 (模擬結束或中斷時)"""
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    # --- 讀取 ---
+
+    def load(self) -> dict | None:
+        """最新 (mtime)、指紋相同且沒有被其他行程持有的 checkpoint (沒有則為 None)"""
+        pattern = os.path.join(self.directory, f"checkpoint_{self.fingerprint}_*.json")
+        for path in sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True):
+            if not self._claim(path):
+                print(f"[Checkpoint] 略過仍由其他行程執行中的 {path}")
+                continue
+            # (取得鎖之後才讀取: 持有者可能剛好完成並刪除了檔案)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    state = json.load(f)
+            except FileNotFoundError:
+                self._discard_lock(path)
+                continue
+            except (OSError, ValueError) as e:
+                print(f"[Checkpoint] 略過無法讀取的檔案 {path}: {e}")
+                self.release()
+                continue
+            if state.get("version") != self.FORMAT_VERSION or state.get("fingerprint") != self.fingerprint:
+                self.release()
+                continue
+            self.path = path
+            self.resume_state = state
+            self._last_generation = state["generation"]
+            return state
+        return None
+
+    # --- 寫入 ---
+
+    def maybe_save(self, generation: int, make_state) -> bool:
+        """
+        達到存檔間隔時呼叫 make_state() 取得狀態並寫入。
+
+        Args:
+            make_state: 回傳可序列化為 JSON 的 dict (只在真的存檔時呼叫)。
+        """
+        if self._disabled:
+            return False
+        due_generations = (self.every_generations > 0
+                           and generation - self._last_generation >= self.every_generations)
+        due_seconds = (self.every_seconds > 0
+                       and time.monotonic() - self._last_time >= self.every_seconds)
+        if not (due_generations or due_seconds):
+            return False
+
+        self.save(generation, make_state())
+        return True
+
+    def save(self, generation: int, state: dict):
+        state = {"version": self.FORMAT_VERSION, "fingerprint": self.fingerprint,
+                 "generation": generation, **state}
+        if self._disabled:
+            return
+        if self.path is None:
+            path = os.path.join(
+                self.directory, f"checkpoint_{self.fingerprint}_{state['rng']['seed']}.json")
+            if not self._claim(path):
+                print(f"[Checkpoint] 警告: {path} 由其他行程持有 (相同參數與 seed 的模擬)，本次不存檔")
+                self._disabled = True
+                return
+            self.path = path
+
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        self._last_generation = generation
+        self._last_time = time.monotonic()
+
+    def clear(self):
+        """模擬正常結束: 刪除 checkpoint"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        if self.path and self._lock is not None:
+            self._discard_lock(self.path)
+        self.path = None
+        self.resume_state = None
+
+    def _discard_lock(self, path: str):
+        """checkpoint 已不存在: 刪除鎖檔並釋放"""
+        try:
+            os.remove(f"{path}.lock")
+        except FileNotFoundError:
+            pass
+        self.release()
@@ -38,3 +38,21 @@ RESULT_MATRIX = {
     (Move.CHEAT, Move.COOPERATE): (MatchResult.TEMPTATION, MatchResult.SUCKER),
     (Move.CHEAT, Move.CHEAT): (MatchResult.PUNISHMENT, MatchResult.PUNISHMENT),
 }
+
+# --- 內部整數編碼 (Integer Codes) ---
+# 歷史紀錄以 "小整數" 緊湊儲存，只有在策略讀取時才轉回 Enum。
+# 編碼規則: COOPERATE = 0, CHEAT = 1
+#           result_code = 2 * my_move_code + opponent_move_code
+MOVES = (Move.COOPERATE, Move.CHEAT)
+MOVE_CODE = {move: code for code, move in enumerate(MOVES)}
+
+MATCH_RESULTS = (
+    MatchResult.REWARD,      # 0: (C, C)
+    MatchResult.SUCKER,      # 1: (C, D)
+    MatchResult.TEMPTATION,  # 2: (D, C)
+    MatchResult.PUNISHMENT,  # 3: (D, D)
+)
+RESULT_CODE = {result: code for code, result in enumerate(MATCH_RESULTS)}
+
+# 扁平的 2x2 分數表: PAYOFF_BY_CODE[2 * my_move_code + opponent_move_code]
+PAYOFF_BY_CODE = tuple(PAYOFF[result] for result in MATCH_RESULTS)
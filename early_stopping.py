@@ -0,0 +1,124 @@
+import math
+from bisect import bisect_left, bisect_right
+from statistics import NormalDist
+from definitions import MATCH_RESULTS, PAYOFF
+
+
+class EarlyStopping:
+    """
+    循環賽的 "序貫式提前停止" (Sequential Early Stopping)
+
+    演化只需要知道誰落在 "最後 kill_count 名" (淘汰) 與 "前 kill_count 名" (複製)。
+    啟用時 (EARLY_STOP_CONFIDENCE > 0)，engine 每完成 1/checks 的互動就呼叫 should_stop()：
+    - 以每個個體 my_history 的結果統計 (count_of，O(1)) 估計
+      "每次互動的平均分數" 與其標準誤。
+    - 若淘汰線與複製線附近的信賴區間 (單側信心水準 confidence) 都已分開
+      (名次未定的個體只剩 "同一種類")，剩下的互動不會改變
+      淘汰 / 複製的種類組成 (在該信心水準下)，循環賽提前結束。
+    - 上限仍是原本的 N * M * R/2 次互動。
+
+    提前結束時應改以 "每次互動的平均分數" 比較個體 (各個體的互動次數不同)：
+    engine 排序時如此，simulation 的選擇運算子則依 stopped_early 決定適應度。
+
+    每個世代結束時由 simulation 呼叫 end_generation()，印出本世代節省的互動次數。
+    """
+
+    def __init__(self, kill_count: int, confidence: float = 0.95, checks: int = 20,
+                 min_interactions: int = 10):
+        if not 0 < confidence < 1:
+            raise ValueError(f"confidence 必須介於 0 與 1 之間: {confidence}")
+        self.kill_count = kill_count
+        self.confidence = confidence
+        self.checks = checks
+        # 每個個體至少要有幾次互動，才採信它的估計值
+        self.min_interactions = min_interactions
+        self._z = NormalDist().inv_cdf(confidence)
+
+        # 本世代 / 累計的 (實際執行, 原本上限) 互動次數
+        self.interactions_run = 0
+        self.interactions_total = 0
+        self.saved_total = 0
+        self.budget_total = 0
+
+    # --- 由 engine 呼叫 ---
+
+    def checkpoints(self, total_interactions: int) -> list[int]:
+        """檢查點 (已完成的互動次數)，最後一個一定是 total_interactions"""
+        step = max(total_interactions // self.checks, 1)
+        points = list(range(step, total_interactions, step))
+        points.append(total_interactions)
+        return points
+
+    def _bounds(self, strategy) -> tuple[float, float, float]:
+        """(平均分數, 下界, 上界)：每次互動的分數估計與其信賴區間"""
+        history = strategy.my_history
+        n = len(history)
+        if n < self.min_interactions:
+            return 0.0, -math.inf, math.inf
+
+        total = total_sq = 0
+        for result in MATCH_RESULTS:
+            count = history.count_of("match_result", result)
+            payoff = PAYOFF[result]
+            total += count * payoff
+            total_sq += count * payoff * payoff
+        mean = total / n
+        variance = max(total_sq / n - mean * mean, 0.0)
+        margin = self._z * math.sqrt(variance / n)
+        return mean, mean - margin, mean + margin
+
+    def _cutoff_settled(self, bounds: list[tuple[float, float, float, type]], k: int) -> bool:
+        """
+        "最後 k 名" 的種類組成是否已確定。
+
+        某個體 "確定在最後 k 名" = 至少 n - k 個個體的下界高於它的上界；
+        "確定不在" = 至少 k 個個體的上界低於它的下界。
+        其餘個體的名次未定，但若它們都是 "同一種類"，
+        無論誰落在線的哪一側，淘汰 / 複製的種類組成都相同
+        (個體每世代都會 reset，只有種類數量會影響下一世代)。
+        """
+        n = len(bounds)
+        lowers = sorted(b[1] for b in bounds)
+        uppers = sorted(b[2] for b in bounds)
+        undecided_types = set()
+        for _, lower, upper, strategy_type in bounds:
+            surely_above = n - bisect_right(lowers, upper)
+            surely_below = bisect_left(uppers, lower)
+            if surely_above < n - k and surely_below < k:
+                undecided_types.add(strategy_type)
+                if len(undecided_types) > 1:
+                    return False
+        return True
+
+    def should_stop(self, strategies: list) -> bool:
+        """淘汰線與複製線附近的種類組成是否都已確定"""
+        k = self.kill_count
+        if k <= 0 or 2 * k > len(strategies):
+            return False
+
+        bounds = [(*self._bounds(s), type(s)) for s in strategies]
+        # 淘汰線: 最後 k 名 / 複製線: 前 k 名 = 不在 "最後 n - k 名"
+        return (self._cutoff_settled(bounds, k)
+                and self._cutoff_settled(bounds, len(strategies) - k))
+
+    def record(self, interactions_run: int, interactions_total: int):
+        """記錄本次循環賽實際執行 / 原本上限的互動次數"""
+        self.interactions_run = interactions_run
+        self.interactions_total = interactions_total
+        self.saved_total += interactions_total - interactions_run
+        self.budget_total += interactions_total
+
+    @property
+    def stopped_early(self) -> bool:
+        """本世代的循環賽是否提前結束 (此時應以 "每次互動的平均分數" 比較個體)"""
+        return self.interactions_run < self.interactions_total
+
+    # --- 報表 ---
+
+    def end_generation(self, generation: int, verbose: bool = True):
+        saved = self.interactions_total - self.interactions_run
+        if verbose and self.interactions_total:
+            print(f"[EarlyStop] 世代 {generation}: 執行 {self.interactions_run}/{self.interactions_total} 互動, "
+                  f"節省 {saved} ({saved / self.interactions_total:.1%}) | "
+                  f"累計節省 {self.saved_total / self.budget_total:.1%}")
+        self.interactions_run = self.interactions_total = 0
@@ -1,20 +1,35 @@
-import random
-from tqdm import tqdm
-from definitions import Move, RESULT_MATRIX
-from strategies.base_strategy import BaseStrategy
-
-
-def apply_noise(intended_move: Move, noise: float) -> Move:
+import functools
+from definitions import Move
+from rng import SimulationRNG
+from topology import Graph
+from profiling import StrategyProfiler
+from early_stopping import EarlyStopping
+from interaction_trace import TraceWriter
+from reporting import DEFAULT_REPORTER, PROGRESS_BATCH, Reporter
+from strategies.base_strategy import BaseStrategy, configure_population
+
+
+def apply_noise(intended_move: Move, noise: float, rng: SimulationRNG) -> Move:
     """
     根據雜訊率，隨機翻轉一個 Move。
     """
-    if noise > 0 and random.random() < noise:
+    if noise > 0 and rng.chance(noise):
         return Move.CHEAT if intended_move == Move.COOPERATE else Move.COOPERATE
 
     return intended_move
 
 
-def run_tournament(strategies: list[BaseStrategy], rounds_per_game: int, avg_matches_per_strategy: int, noise: float = 0.0):
+def interaction_count(population_size: int, rounds_per_game: int, avg_matches_per_strategy: int) -> int:
+    """一次循環賽的總 "單一互動" 次數 = 總 "完整比賽" 場次 x 每場回合數 (各引擎共用)"""
+    total_matches = (population_size * avg_matches_per_strategy) // 2
+    return total_matches * rounds_per_game
+
+
+def run_tournament(strategies: list[BaseStrategy], rounds_per_game: int, avg_matches_per_strategy: int, noise: float = 0.0,
+                   rng: SimulationRNG | None = None, profiler: StrategyProfiler | None = None,
+                   early_stop: EarlyStopping | None = None, sort: bool = True,
+                   reporter: Reporter = DEFAULT_REPORTER, graph: Graph | None = None,
+                   trace: TraceWriter | None = None):
     """
     互動制模型 (Interaction-Based Model)
 
@@ -23,86 +38,149 @@ def run_tournament(strategies: list[BaseStrategy], rounds_per_game: int, avg_mat
 
     1. 總共模擬 N * M * R/2 次 "單一互動"。
     2. 每一次互動，隨機抽 2 人 (s1, s2) 只玩 "1 回合"。
+
+    所有亂數 (配對、雜訊、策略內部的機率) 都來自 rng，
+    同一個 seed 會得到完全相同的結果。
+
+    傳入 profiler 時，每個個體的 play / 手滑 / 更新會被換成計時包裝
+    (見 profiling.py)；未傳入時熱迴圈不受影響。
+
+    傳入 early_stop 時，每個檢查點會判斷淘汰 / 複製名單是否已在統計上確定，
+    確定後提前結束並改以 "每次互動的平均分數" 排名 (見 early_stopping.py)。
+
+    sort=False 時不排序，依原本的順序回傳 (由呼叫端以線性時間挑選，見 selection.py)。
+
+    傳入 graph 時，strategies[i] 位於圖的節點 i，每次互動改為均勻抽一條邊 (見 topology.py)，
+    每個對手的狀態也改用稀疏儲存。
+
+    日誌與進度條由 reporter 決定是否輸出 (見 reporting.py)；
+    進度條每 PROGRESS_BATCH 次互動才更新一次。
+
+    傳入 trace 時，每次互動的雙方與出招被追加到追蹤緩衝區，
+    每個批次結束時寫出 (見 interaction_trace.py)。
     """
+    if rng is None:
+        rng = SimulationRNG()
 
-    # 1. 重置所有策略
+    # 1. 重置所有策略 (依宣告的回溯深度建立歷史)，並交給它們同一個 RNG
+    configure_population(strategies, sparse=graph is not None)
     for strategy in strategies:
+        strategy.rng = rng
         strategy.reset()
 
     # --- 2. 計算總 "單一互動" 次數 ---
     population_size = len(strategies)
+    total_interactions = interaction_count(population_size, rounds_per_game, avg_matches_per_strategy)
 
-    # 總 "完整比賽" 的場次
-    total_matches = (population_size * avg_matches_per_strategy) // 2
-
-    # 總 "單一互動" 次數
-    total_interactions = total_matches * rounds_per_game
-
-    print(
+    reporter.detail(
         f"--- 開始循環賽 ({len(strategies)} 位參賽者, {avg_matches_per_strategy} 場均/人, {noise*100:.1f}% 雜訊) ---")
-    print(f"--- 總互動次數: {total_interactions} (隨機回合配對) ---")
-
-    # 3. 使用 tqdm 包裹 "總互動次數"
-    progress_bar = tqdm(
-        range(total_interactions),
-        desc="  世代演化中",
-        leave=False,
-        unit=" 互動"  # 單位是 "互動" 而非 "場"
-    )
-
-    # 4. 【隨機互動迴圈】(主迴圈)
-    for _ in progress_bar:
-
-        # 隨機"不重複"地抽出 2 個個體
-        strategy1, strategy2 = random.sample(strategies, 2)
-
-        # 取得雙方的 "意圖" 出招
-        true_intent1 = strategy1.play(
-            opponent_unique_id=strategy2.unique_id,
-            opponent_history=strategy2.my_history,
-            opponent_total_score=strategy2.total_score,
-        )
-        true_intent2 = strategy2.play(
-            opponent_unique_id=strategy1.unique_id,
-            opponent_history=strategy1.my_history,
-            opponent_total_score=strategy1.total_score,
-        )
-
-        # 取得 "手滑後的意圖" (Slipped Intent)
-        slipped_intent1 = strategy1.apply_internal_noise(true_intent1)
-        slipped_intent2 = strategy2.apply_internal_noise(true_intent2)
-
-        # 5. 處理雜訊
-        actual_move1 = apply_noise(slipped_intent1, noise)
-        actual_move2 = apply_noise(slipped_intent2, noise)
-
-        # 6. 查詢 "語意結果"
-        (result1, result2) = RESULT_MATRIX[(actual_move1, actual_move2)]
-
-        # 7. & 8. 【立刻更新】
-        #    雙方的 "my_history" (情緒) 和 "total_score" 被即時更新
-        strategy1.update(
-            opponent_unique_id=strategy2.unique_id,
-            my_intended_move=slipped_intent1,
-            my_actual_move=actual_move1,
-            opponent_intended_move=slipped_intent2,
-            opponent_actual_move=actual_move2,
-            match_result=result1
-        )
-
-        strategy2.update(
-            opponent_unique_id=strategy1.unique_id,
-            my_intended_move=slipped_intent2,
-            my_actual_move=actual_move2,
-            opponent_intended_move=slipped_intent1,
-            opponent_actual_move=actual_move1,
-            match_result=result2
-        )
-
-    print("\r--- 循環賽結束 ---")
-
-    # 4. 依分數排序 (保持不變)
-    sorted_strategies = sorted(
+    reporter.detail(f"--- 總互動次數: {total_interactions} (隨機回合配對) ---")
+
+    # 3. 進度條 (單位是 "互動" 而非 "場"，每個批次結束時才更新)
+    progress_bar = reporter.progress(total_interactions, "  世代演化中")
+
+    # 4. 準備 "整數編碼" 熱路徑
+    #    - 出招以 0/1 表示 (COOPERATE = 0, CHEAT = 1)，翻轉 = XOR 1
+    #    - result_code = 2 * 我 + 對手，直接作為扁平分數表的索引
+    #    - 只有在策略 "覆寫" 了 Enum 版方法時，才轉回 Enum 呼叫
+    plays = [s.play for s in strategies]
+    slippers = [s.code_slipper() for s in strategies]
+    recorders = [s.code_recorder() for s in strategies]
+    if profiler is not None:
+        plays = [profiler.wrap_play(s) for s in strategies]
+        slippers = [profiler.wrap_slipper(s, f) for s, f in zip(strategies, slippers)]
+        recorders = [profiler.wrap_recorder(s, f) for s, f in zip(strategies, recorders)]
+    cheat = Move.CHEAT
+    pair = rng.pair
+    if graph is not None:
+        if graph.node_count != len(strategies):
+            raise ValueError(f"互動圖有 {graph.node_count} 個節點，但群體有 {len(strategies)} 個體")
+        pair = functools.partial(rng.pair, graph=graph)
+    chance = rng.chance
+    trace_rows = trace.begin(strategies) if trace is not None else None
+
+    # 5. 【隨機互動迴圈】(主迴圈)
+    #    迴圈在 "停靠點" 之間執行：每 PROGRESS_BATCH 次互動 (更新進度條)，
+    #    以及提前停止的 "檢查點" (未啟用時只有總互動次數一個)
+    checkpoints = early_stop.checkpoints(total_interactions) if early_stop else [total_interactions]
+    stops = sorted(set(range(PROGRESS_BATCH, total_interactions, PROGRESS_BATCH)) | set(checkpoints))
+    check_at = set(checkpoints)
+    done = 0
+    for stop in stops:
+        for _ in range(stop - done):
+
+            # 隨機"不重複"地抽出 2 個個體 (由 RNG 的預抽區塊提供；有互動圖時為一條邊的兩端)
+            index1, index2 = pair(population_size)
+            strategy1, strategy2 = strategies[index1], strategies[index2]
+
+            # 取得雙方的 "意圖" 出招 (策略介面仍是 Enum)
+            true_intent1 = plays[index1](
+                strategy2.unique_id,
+                strategy2.my_history,
+                strategy2.total_score,
+            )
+            true_intent2 = plays[index2](
+                strategy1.unique_id,
+                strategy1.my_history,
+                strategy1.total_score,
+            )
+
+            # 取得 "手滑後的意圖" (Slipped Intent)，轉成整數編碼
+            intent1 = 1 if true_intent1 is cheat else 0
+            intent2 = 1 if true_intent2 is cheat else 0
+            slipped_intent1 = slippers[index1](intent1)
+            slipped_intent2 = slippers[index2](intent2)
+
+            # 6. 處理雜訊 (XOR 翻轉)
+            actual_move1 = slipped_intent1 ^ (noise > 0 and chance(noise))
+            actual_move2 = slipped_intent2 ^ (noise > 0 and chance(noise))
+
+            # 7. 查詢 "語意結果" (算術索引，取代 RESULT_MATRIX 查表)
+            result1 = 2 * actual_move1 + actual_move2
+            result2 = 2 * actual_move2 + actual_move1
+
+            # 8. 【立刻更新】
+            #    雙方的 "my_history" (情緒) 和 "total_score" 被即時更新
+            recorders[index1](
+                strategy2.unique_id,
+                slipped_intent1, actual_move1,
+                slipped_intent2, actual_move2,
+                result1
+            )
+            recorders[index2](
+                strategy1.unique_id,
+                slipped_intent2, actual_move2,
+                slipped_intent1, actual_move1,
+                result2
+            )
+
+            if trace_rows is not None:
+                trace_rows.extend((index1, index2,
+                                   intent1 | slipped_intent1 << 1 | actual_move1 << 2
+                                   | intent2 << 3 | slipped_intent2 << 4 | actual_move2 << 5))
+
+        if trace is not None:
+            trace.flush()
+        progress_bar.update(stop - done)
+        done = stop
+        if (early_stop is not None and done in check_at and done < total_interactions
+                and early_stop.should_stop(strategies)):
+            break
+    progress_bar.close()
+
+    reporter.detail("\r--- 循環賽結束 ---")
+
+    # 9. 依分數排序 (sort=False 時依原本的順序回傳)
+    #    (提前停止時各個體的互動次數不同，改以 "每次互動的平均分數" 排序)
+    if early_stop is not None:
+        early_stop.record(done, total_interactions)
+    if done < total_interactions:
+        reporter.detail(f"--- 提前停止: {done}/{total_interactions} 互動 (淘汰 / 複製名單已確定) ---")
+
+    if not sort:
+        return strategies
+    if done < total_interactions:
+        return sorted(
+            strategies, key=lambda s: s.total_score / max(len(s.my_history), 1), reverse=True)
+    return sorted(
         strategies, key=lambda s: s.total_score, reverse=True)
-
-    return sorted_strategies
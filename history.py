@@ -0,0 +1,508 @@
+import bisect
+import os
+import tempfile
+from array import array
+from collections.abc import Mapping, Sequence
+from definitions import MOVES, MATCH_RESULTS, MOVE_CODE, RESULT_CODE
+
+
+# 每一筆回合紀錄的欄位 (與舊版 dict 紀錄的 key 完全相同)
+FIELDS = (
+    "my_intended_move",
+    "my_actual_move",
+    "opponent_intended_move",
+    "opponent_actual_move",
+    "match_result",
+)
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+_FIELD_INDEX_GET = FIELD_INDEX.get
+
+# 每個欄位對應的 "整數 -> Enum" 解碼表 / "Enum -> 整數" 編碼表
+_DECODERS = (MOVES, MOVES, MOVES, MOVES, MATCH_RESULTS)
+_ENCODERS = (MOVE_CODE, MOVE_CODE, MOVE_CODE, MOVE_CODE, RESULT_CODE)
+
+# 初始容量 (之後以 2 倍成長)
+_INITIAL_CAPACITY = 16
+
+# 超過記憶體目標後，每個歷史仍至少可以成長到這個容量 (回合) 才開始寫出到磁碟
+# (因此目標是 "軟性" 的: 欄位記憶體的下限約為 受追蹤的歷史數 x 256 回合 x 5 bytes)
+_MIN_RESIDENT = 256
+
+
+class SpillStore:
+    """
+    歷史紀錄的磁碟暫存 (每個行程一個，見 configure_spill)
+
+    只追蹤 "沒有回溯上限" (maxlen=None) 的 HistoryLog 佔用的欄位記憶體 (resident)。
+    設定目標後，若某個歷史需要成長而總量會超過目標，改為把它較舊的一半回合
+    依 "每回合 5 bytes" 的列格式追加到暫存檔，欄位中只留最近的回合。
+
+    目標是軟性的，不是上限：
+    - 每個歷史至少保留 _MIN_RESIDENT 回合 (容量) 才會寫出，歷史很多時 (例如每對個體一份私怨歷史)
+      光是這個下限就可能超過目標 (見 stats() 的 histories / floor_bytes)。
+    - 只計算欄位資料，不含每個 HistoryLog 物件本身 (陣列標頭、統計計數) 的記憶體。
+    被寫出的回合仍可用索引 / 切片 / 迭代讀取 (os.pread)；統計 API 不受影響。
+    暫存檔中的資料全部失效 (例如 reset() 後舊的歷史被回收) 時，檔案會被截斷。
+    """
+
+    def __init__(self):
+        self.target = 0           # bytes (0 = 不限制，不寫出)
+        self.directory: str | None = None
+        self.histories = 0        # 受追蹤的歷史數
+        self.resident = 0         # 受追蹤歷史的欄位記憶體 (bytes)
+        self.live = 0             # 暫存檔中仍有效的 bytes
+        self.spilled_bytes = 0    # 累計寫出的 bytes
+        self.spilled_rounds = 0   # 累計寫出的回合數
+        self.spills = 0           # 寫出次數
+        self.epoch = 0            # fork 後遞增: 繼承自父行程的歷史不再對應這個檔案
+        self._file = None
+        self._end = 0
+
+    def _after_fork(self):
+        """子行程 (例如 ProcessPoolExecutor 的 worker) 使用自己的暫存檔，不與父行程共用檔案位置"""
+        self.epoch += 1
+        self.live = self.spilled_bytes = self.spilled_rounds = self.spills = 0
+        self._file = None
+        self._end = 0
+
+    def write(self, data: bytes) -> int:
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix="history_", dir=self.directory)
+        offset = self._end
+        os.pwrite(self._file.fileno(), data, offset)
+        self._end += len(data)
+        self.live += len(data)
+        self.spilled_bytes += len(data)
+        self.spills += 1
+        return offset
+
+    def read(self, offset: int, size: int) -> bytes:
+        return os.pread(self._file.fileno(), size, offset)
+
+    def release(self, size: int, epoch: int):
+        if epoch != self.epoch:
+            return
+        self.live -= size
+        if self.live <= 0 and self._file is not None:
+            self.live = 0
+            self._end = 0
+            os.ftruncate(self._file.fileno(), 0)
+
+    def stats(self) -> dict:
+        return {
+            "target_bytes": self.target,
+            "histories": self.histories,
+            # 受追蹤的歷史都長到 _MIN_RESIDENT 回合時，不寫出也能保留的欄位記憶體 (目標的實際下限)
+            "floor_bytes": self.histories * _MIN_RESIDENT * len(FIELDS),
+            "resident_bytes": self.resident,
+            "spill_file_bytes": self._end,
+            "spilled_bytes": self.spilled_bytes,
+            "spilled_rounds": self.spilled_rounds,
+            "spills": self.spills,
+        }
+
+
+SPILL = SpillStore()
+os.register_at_fork(after_in_child=SPILL._after_fork)
+
+
+def configure_spill(target_bytes: int, directory: str | None = None):
+    """
+    設定沒有回溯上限的歷史紀錄的記憶體目標 (軟性，見 SpillStore；0 = 不限制)。
+    directory 為暫存檔目錄 (None = 系統暫存目錄)。
+    """
+    SPILL.target = max(int(target_bytes), 0)
+    SPILL.directory = directory or None
+
+
+def spill_stats() -> dict:
+    """記憶體 / 磁碟暫存的累計統計 (見 SpillStore)"""
+    return SPILL.stats()
+
+
+class RoundRecord(Mapping):
+    """
+    單一回合紀錄的 "唯讀視圖"
+
+    以 5 個整數編碼建立，只有在策略讀取某個 key 時才解碼成 Enum。
+    可以像舊版的 dict 一樣使用：record["opponent_actual_move"]。
+    """
+
+    __slots__ = ("_codes",)
+
+    def __init__(self, codes: tuple[int, int, int, int, int]):
+        self._codes = codes
+
+    def __getitem__(self, key: str):
+        index = _FIELD_INDEX_GET(key)
+        if index is None:
+            raise KeyError(key)  # 未知的 key 與 dict 行為相同
+        return _DECODERS[index][self._codes[index]]
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return f"RoundRecord({dict(self)!r})"
+
+
+class HistoryLog(Sequence):
+    """
+    欄位式 (Columnar) 歷史紀錄
+
+    取代 "每回合一個 dict" 的作法：
+    - 每個欄位是一個 array('B') 欄位，每回合只佔 1 byte。
+    - 容量以 2 倍 "幾何成長"，攤銷後每次 append 為 O(1)。
+    - 對外是一個 "唯讀序列"，history[-1]["opponent_actual_move"]
+      等舊寫法可以繼續使用。
+
+    【統計 API】append 時以 O(1) 同步維護 "累計統計"，
+    策略應優先使用這些方法，而不是在 play() 中掃描歷史：
+    - count_of / rate_of:   某欄位出現某值的 "總次數 / 比率"
+    - last:                 某欄位 "上一回合" 的值
+    - streak:               某欄位 "目前連續" 出現某值的次數
+    - last_index:           某欄位 "最近一次" 出現某值的回合索引
+    - window_count:         某欄位在 "最近 N 回合" 內出現某值的次數
+                            (N 必須在建立時透過 windows 宣告)
+
+    【有限回溯 (maxlen)】指定 maxlen 時，欄位是固定大小的 "環形緩衝區"，
+    只保留最近 maxlen 回合 (0 = 完全不保留，只維護統計)：
+    - len() 與 last_index 仍然是 "總回合數 / 總索引"，統計 API 不受影響。
+    - 只有已被丟棄的回合無法再以索引讀取 (IndexError)，迭代只涵蓋保留的回合。
+    - maxlen 至少會被提高到最大的 window (窗口統計需要讀取離開窗口的回合)。
+
+    【記憶體目標 (configure_spill)】沒有 maxlen 的歷史在總量超過目標時，
+    較舊的回合被寫出到暫存檔 (見 SpillStore；每個歷史至少保留 _MIN_RESIDENT 回合)；
+    索引 / 切片 / 迭代 / codes 照常讀得到全部回合。
+    未寫出的歷史 append 路徑與原本相同 (只有容量用完時才檢查目標)。
+    """
+
+    __slots__ = ("_columns", "_length", "_capacity", "_limit", "_maxlen",
+                 "_counts", "_last_seen", "_last", "_windows",
+                 "_offset", "_segments", "_resident")
+
+    def __init__(self, windows: tuple[int, ...] = (), maxlen: int | None = None):
+        if maxlen is not None:
+            maxlen = max(maxlen, *windows, 0)
+            self._capacity = maxlen
+        else:
+            self._capacity = _INITIAL_CAPACITY
+        self._maxlen = maxlen
+        self._columns = tuple(array("B", bytes(self._capacity))
+                              for _ in FIELDS)
+        self._length = 0
+        # append 在 n >= _limit 時才進入慢速路徑 (成長 / 環形覆寫 / 寫出到磁碟)
+        self._limit = self._capacity
+
+        # 寫出到磁碟的部分 (只有 maxlen=None 且設定了記憶體目標時)：
+        # 回合 [0, _offset) 在暫存檔中，_segments = ([起始回合], [檔案位置], epoch)
+        self._offset = 0
+        self._segments = None
+        self._resident = 0
+        if maxlen is None and SPILL.target:
+            self._resident = self._capacity * len(FIELDS)
+            SPILL.resident += self._resident
+            SPILL.histories += 1
+
+        # 累計統計: 每個欄位 "每個值" 的出現次數 / 最近一次出現的索引
+        self._counts = tuple([0] * len(decoder) for decoder in _DECODERS)
+        self._last_seen = tuple([-1] * len(decoder) for decoder in _DECODERS)
+        self._last: tuple[int, ...] | None = None
+
+        # 固定窗口統計: {窗口大小: 與 _counts 相同結構的計數}
+        self._windows = {
+            window: tuple([0] * len(decoder) for decoder in _DECODERS)
+            for window in windows
+        }
+
+    # --- 寫入 (只由 BaseStrategy.update 呼叫) ---
+
+    def append_codes(self,
+                     my_intended: int,
+                     my_actual: int,
+                     opponent_intended: int,
+                     opponent_actual: int,
+                     result: int):
+        """
+        以 "整數編碼" 新增一回合紀錄，並 O(1) 更新所有統計。
+        """
+        n = self._length
+        codes = (my_intended, my_actual, opponent_intended, opponent_actual, result)
+        if self._windows:
+            # (先讀出 "離開窗口" 的回合，環形緩衝區中它可能正要被覆寫)
+            self._slide_windows(n, codes)
+
+        slot = n
+        if n >= self._limit:
+            if self._maxlen is None:
+                slot = self._make_room(n)
+            elif self._maxlen:
+                slot = n % self._maxlen  # 環形緩衝區: 覆寫最舊的回合
+            else:
+                slot = -1  # maxlen = 0: 不保留任何回合
+
+        if slot >= 0:
+            c0, c1, c2, c3, c4 = self._columns
+            c0[slot] = my_intended
+            c1[slot] = my_actual
+            c2[slot] = opponent_intended
+            c3[slot] = opponent_actual
+            c4[slot] = result
+
+        k0, k1, k2, k3, k4 = self._counts
+        k0[my_intended] += 1
+        k1[my_actual] += 1
+        k2[opponent_intended] += 1
+        k3[opponent_actual] += 1
+        k4[result] += 1
+
+        s0, s1, s2, s3, s4 = self._last_seen
+        s0[my_intended] = n
+        s1[my_actual] = n
+        s2[opponent_intended] = n
+        s3[opponent_actual] = n
+        s4[result] = n
+
+        self._last = codes
+        self._length = n + 1
+
+    def _slide_windows(self, n: int, codes: tuple[int, ...]):
+        """新回合進入窗口，(n - window) 回合離開窗口"""
+        for window, window_counts in self._windows.items():
+            leaving = self._slot(n - window)
+            for column, counts, code in zip(self._columns, window_counts, codes):
+                counts[code] += 1
+                if leaving >= 0:
+                    counts[column[leaving]] -= 1
+
+    def _slot(self, index: int) -> int:
+        """總索引 -> 欄位中的位置 (index < 0 時原樣傳回)"""
+        if index < 0:
+            return index
+        if self._maxlen is None:
+            return index - self._offset
+        return index % self._maxlen
+
+    def _make_room(self, n: int) -> int:
+        """
+        (沒有回溯上限) 第 n 回合寫入前確保欄位有空間，回傳它在欄位中的位置：
+        目標內 (或容量尚小於 _MIN_RESIDENT) 時加倍成長，否則把較舊的回合寫出到磁碟。
+        已寫出過的歷史每次 append 都經過這裡 (未寫出的歷史只在容量用完時)。
+        """
+        if n - self._offset < self._capacity:
+            return n - self._offset
+        if (self._offset or (SPILL.target and self._capacity >= _MIN_RESIDENT
+                             and SPILL.resident + self._capacity * len(FIELDS) > SPILL.target)):
+            if self._spill():
+                return n - self._offset
+        self._grow()
+        return n - self._offset
+
+    def _grow(self):
+        """容量加倍 (幾何成長)"""
+        padding = bytes(self._capacity)
+        for column in self._columns:
+            column.extend(padding)
+        if self._resident:
+            self._resident += len(padding) * len(FIELDS)
+            SPILL.resident += len(padding) * len(FIELDS)
+        self._capacity *= 2
+        self._limit = 0 if self._offset else self._capacity
+
+    def _spill(self) -> bool:
+        """
+        把欄位中較舊的回合 (保留最近一半與窗口所需) 以列格式追加到暫存檔。
+        沒有可寫出的回合時 (窗口大於容量的一半) 回傳 False。
+        """
+        keep = max(self._capacity // 2, *self._windows, 1)
+        count = self._length - self._offset - keep
+        if count <= 0:
+            return False
+        rows = bytearray(count * len(FIELDS))
+        padding = bytes(count)
+        for field, column in enumerate(self._columns):
+            rows[field::len(FIELDS)] = column[:count]
+            del column[:count]
+            column.extend(padding)
+
+        if self._segments is None:
+            self._segments = ([], [], SPILL.epoch)
+        starts, offsets, _ = self._segments
+        starts.append(self._offset)
+        offsets.append(SPILL.write(rows))
+        self._offset += count
+        self._limit = 0  # 欄位位置不再等於總索引: 之後每次 append 都經過 _make_room
+        SPILL.spilled_rounds += count
+        return True
+
+    def _spilled_rows(self, start: int, stop: int) -> bytes:
+        """從暫存檔讀取回合 [start, stop) (stop <= _offset)，每回合 5 bytes"""
+        starts, offsets, _ = self._segments
+        segment = bisect.bisect_right(starts, start) - 1
+        rows = bytearray()
+        while start < stop:
+            segment_end = starts[segment + 1] if segment + 1 < len(starts) else self._offset
+            end = min(stop, segment_end)
+            rows += SPILL.read(offsets[segment] + (start - starts[segment]) * len(FIELDS),
+                               (end - start) * len(FIELDS))
+            start = end
+            segment += 1
+        return bytes(rows)
+
+    def __del__(self):
+        if self._resident:
+            SPILL.resident -= self._resident
+            SPILL.histories -= 1
+        if self._offset:
+            SPILL.release(self._offset * len(FIELDS), self._segments[2])
+
+    # --- 統計 API (全部 O(1)) ---
+
+    def count_of(self, field: str, value) -> int:
+        """某欄位出現 value 的總次數"""
+        index = FIELD_INDEX[field]
+        return self._counts[index][_ENCODERS[index][value]]
+
+    def rate_of(self, field: str, value) -> float:
+        """某欄位出現 value 的比率 (沒有紀錄時為 0.0)"""
+        if not self._length:
+            return 0.0
+        return self.count_of(field, value) / self._length
+
+    def last(self, field: str):
+        """某欄位上一回合的值 (沒有紀錄時為 None)"""
+        if self._last is None:
+            return None
+        index = FIELD_INDEX[field]
+        return _DECODERS[index][self._last[index]]
+
+    def last_index(self, field: str, value) -> int:
+        """某欄位最近一次出現 value 的回合索引 (從未出現為 -1)"""
+        index = FIELD_INDEX[field]
+        return self._last_seen[index][_ENCODERS[index][value]]
+
+    def streak(self, field: str, value) -> int:
+        """某欄位 "目前" 連續出現 value 的回合數 (上一回合不是 value 則為 0)"""
+        index = FIELD_INDEX[field]
+        code = _ENCODERS[index][value]
+        if self._last is None or self._last[index] != code:
+            return 0
+
+        # 連續長度 = 距離 "最近一次出現其他值" 的回合數
+        last_seen = self._last_seen[index]
+        last_other = max(seen for other, seen in enumerate(last_seen)
+                         if other != code)
+        return self._length - 1 - last_other
+
+    def window_count(self, field: str, value, window: int) -> int:
+        """某欄位在最近 window 回合內出現 value 的次數"""
+        window_counts = self._windows.get(window)
+        if window_counts is None:
+            raise KeyError(f"window {window} 未在 HistoryLog 建立時宣告")
+        index = FIELD_INDEX[field]
+        return window_counts[index][_ENCODERS[index][value]]
+
+    # --- 讀取 (Sequence 介面) ---
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def first_retained(self) -> int:
+        """仍保留的最舊回合的總索引 (沒有上限時為 0)"""
+        if self._maxlen is None:
+            return 0
+        return max(self._length - self._maxlen, 0)
+
+    def __getitem__(self, index):
+        if index.__class__ is slice:
+            start = self.first_retained
+            indices = range(*index.indices(self._length))
+            if self._offset and indices and min(indices[0], indices[-1]) < self._offset:
+                return self._records_with_spilled(indices)
+            return [self._record(i) for i in indices
+                    if i >= start]
+
+        n = self._length
+        if index < 0:
+            index += n
+        if index < 0 or index >= n:
+            raise IndexError("history index out of range")
+
+        if self._maxlen is not None:
+            if index < n - self._maxlen:
+                raise IndexError("history index no longer retained (maxlen)")
+            index %= self._maxlen
+        elif self._offset:
+            if index < self._offset:
+                return RoundRecord(tuple(self._spilled_rows(index, index + 1)))
+            index -= self._offset
+
+        c0, c1, c2, c3, c4 = self._columns
+        return RoundRecord((c0[index], c1[index], c2[index], c3[index], c4[index]))
+
+    def __iter__(self):
+        if self._offset:
+            # 寫出到磁碟的部分: 每個區段一次讀取
+            rows = self._spilled_rows(0, self._offset)
+            for i in range(0, len(rows), len(FIELDS)):
+                yield RoundRecord(tuple(rows[i:i + len(FIELDS)]))
+        for i in range(max(self.first_retained, self._offset), self._length):
+            yield self._record(i)
+
+    def _record(self, i: int) -> RoundRecord:
+        if i < self._offset:
+            return RoundRecord(tuple(self._spilled_rows(i, i + 1)))
+        i = self._slot(i)
+        c0, c1, c2, c3, c4 = self._columns
+        return RoundRecord((c0[i], c1[i], c2[i], c3[i], c4[i]))
+
+    def _records_with_spilled(self, indices: range) -> list[RoundRecord]:
+        """切片包含寫出到磁碟的回合: 一次讀出涵蓋的範圍"""
+        low = min(indices[0], indices[-1])
+        high = min(max(indices[0], indices[-1]) + 1, self._offset)
+        rows = self._spilled_rows(low, high)
+        width = len(FIELDS)
+        return [RoundRecord(tuple(rows[(i - low) * width:(i - low + 1) * width])) if i < self._offset
+                else self._record(i) for i in indices]
+
+    def codes(self, field: str) -> array:
+        """
+        取得某個欄位 "仍保留的回合" 的整數編碼副本 (依時間順序，用於批次分析)。
+        """
+        field_index = FIELD_INDEX[field]
+        column = self._columns[field_index]
+        if self._offset:
+            spilled = self._spilled_rows(0, self._offset)[field_index::len(FIELDS)]
+            return array("B", spilled) + column[:self._length - self._offset]
+        if self._maxlen is None or self._length <= self._maxlen:
+            return column[:self._length]
+        if not self._maxlen:
+            return column[:0]
+        split = self._length % self._maxlen
+        return column[split:] + column[:split]
+
+    def nbytes(self) -> int:
+        """目前配置的欄位記憶體大小 (bytes，不含寫出到磁碟的部分)"""
+        return sum(column.buffer_info()[1] * column.itemsize
+                   for column in self._columns)
+
+    @property
+    def spilled_rounds(self) -> int:
+        """寫出到磁碟的回合數"""
+        return self._offset
+
+    def __repr__(self) -> str:
+        if self._maxlen is None:
+            if self._offset:
+                return f"HistoryLog(rounds={self._length}, spilled={self._offset})"
+            return f"HistoryLog(rounds={self._length})"
+        return f"HistoryLog(rounds={self._length}, maxlen={self._maxlen})"
+
+
+# 共用的 "空歷史" (尚未與某對手互動時使用，永遠不會被寫入)
+EMPTY_HISTORY = HistoryLog()
@@ -0,0 +1,271 @@
+"""
+逐次互動追蹤 (Interaction Trace)
+
+除錯策略 (例如 SmartProber、ChaoticRedeemer) 時需要某些世代的 "完整互動紀錄"。
+設定 TRACE_GENERATIONS 後，engine 每次互動追加一筆固定寬度的紀錄 (13 bytes)：
+
+    generation  uint32   世代
+    agent1      uint32   個體 1 的 unique_id
+    agent2      uint32   個體 2 的 unique_id
+    moves       uint8    雙方出招 (0 = COOPERATE, 1 = CHEAT)，每個 bit 一項:
+                         bit 0..2 = 個體 1 的 意圖 / 手滑後 / 實際
+                         bit 3..5 = 個體 2 的 意圖 / 手滑後 / 實際
+
+結果 (result_code = 2 * 我 + 對手) 由雙方的實際出招決定，讀取時再計算，不另外儲存。
+10^8 次互動約 1.3 GB (10^9 bytes)。
+
+熱迴圈中只把 (索引1, 索引2, 出招 bit) 追加到一個 array('q')；
+每個批次 (engine 的停靠點) 結束時才以 NumPy 轉換成紀錄、寫入預先配置的結構化陣列並寫出。
+
+檔案:
+    trace_<時間>.bin          檔頭 (MAGIC + JSON，補齊到 64 bytes) + 連續的紀錄
+    trace_<時間>.bin.agents   每個被追蹤的世代開始時的名冊 (世代, unique_id, 策略索引)
+
+讀取 (np.memmap，零複製；可安全讀取仍在寫入中的檔案):
+    python -m interaction_trace output/trace_<時間>.bin --generation 3 --strategy SmartProber
+"""
+import argparse
+import bisect
+import json
+import struct
+import sys
+from array import array
+
+import numpy as np
+
+MAGIC = b"EVOTRC1\n"
+_LENGTH = struct.Struct("<I")
+_HEADER_ALIGN = 64
+
+TRACE_DTYPE = np.dtype([
+    ("generation", "<u4"),
+    ("agent1", "<u4"),
+    ("agent2", "<u4"),
+    ("moves", "u1"),
+])
+ROSTER_DTYPE = np.dtype([
+    ("generation", "<u4"),
+    ("agent", "<u4"),
+    ("strategy", "<u2"),
+])
+
+# moves 欄位中各項的 bit 位置
+MOVE_BITS = {
+    "intended1": 0, "slipped1": 1, "actual1": 2,
+    "intended2": 3, "slipped2": 4, "actual2": 5,
+}
+
+# 名冊中不在 header 策略列表裡的種類
+UNKNOWN_STRATEGY = 0xFFFF
+
+
+def parse_generations(spec: str) -> set[int] | None:
+    """
+    解析 TRACE_GENERATIONS: "all" = 每個世代 (None)，否則為逗號分隔的世代或範圍，例如 "1,5-8"。
+    """
+    spec = spec.strip().lower()
+    if spec == "all":
+        return None
+    generations = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        generations.update(range(int(first), int(last or first) + 1))
+    return generations
+
+
+class TraceWriter:
+    """
+    追蹤檔寫入器 (由 simulation 建立，engine 在被追蹤的世代使用)
+
+    使用方式:
+        trace.generation = 世代          # simulation，只在 wants(世代) 時
+        rows = trace.begin(strategies)   # 寫入名冊，回傳熱迴圈追加用的 array('q')
+        rows.extend((index1, index2, 出招 bit))
+        trace.flush()                    # 每個批次結束時
+    """
+
+    def __init__(self, path: str, strategy_names: list[str], generations: set[int] | None = None,
+                 metadata: dict | None = None, chunk_size: int = 1 << 14):
+        self.path = path
+        self.generations = generations
+        self.generation = 0
+        self.records = 0
+        self._index_of = {name: i for i, name in enumerate(strategy_names)}
+        self._rows = array("q")
+        self._chunk = np.empty(chunk_size, dtype=TRACE_DTYPE)
+        self._agent_ids = np.zeros(0, dtype=np.uint32)
+
+        header = json.dumps({
+            "strategies": list(strategy_names),
+            "dtype": TRACE_DTYPE.descr,
+            "move_bits": MOVE_BITS,
+            "metadata": metadata or {},
+        }, ensure_ascii=False).encode()
+        data = MAGIC + _LENGTH.pack(len(header)) + header
+        # 無緩衝: 每個區塊直接寫到檔案 (reader 立即可見)
+        self._file = open(path, "wb", buffering=0)
+        self._file.write(data + b" " * (-len(data) % _HEADER_ALIGN))
+        self._roster = open(path + ".agents", "wb", buffering=0)
+
+    def wants(self, generation: int) -> bool:
+        """這個世代是否追蹤 (simulation 每個世代呼叫)"""
+        return self.generations is None or generation in self.generations
+
+    def begin(self, strategies: list) -> array:
+        """
+        開始追蹤一個循環賽 (世代為 self.generation，由 simulation 設定)：寫入名冊，
+        回傳熱迴圈追加用的 array。每次互動追加 3 個整數: 索引1, 索引2, 出招 bit (見 MOVE_BITS)。
+        """
+        self._agent_ids = np.fromiter((s.unique_id for s in strategies), dtype=np.uint32,
+                                      count=len(strategies))
+        roster = np.empty(len(strategies), dtype=ROSTER_DTYPE)
+        roster["generation"] = self.generation
+        roster["agent"] = self._agent_ids
+        roster["strategy"] = [self._index_of.get(type(s).__name__, UNKNOWN_STRATEGY) for s in strategies]
+        self._roster.write(roster.tobytes())
+        del self._rows[:]
+        return self._rows
+
+    def flush(self):
+        """把累積的互動轉成紀錄並寫出 (engine 每個批次結束時呼叫)"""
+        if not self._rows:
+            return
+        rows = np.frombuffer(self._rows, dtype=np.int64).reshape(-1, 3)
+        for start in range(0, len(rows), len(self._chunk)):
+            block = rows[start:start + len(self._chunk)]
+            chunk = self._chunk[:len(block)]
+            chunk["generation"] = self.generation
+            chunk["agent1"] = self._agent_ids[block[:, 0]]
+            chunk["agent2"] = self._agent_ids[block[:, 1]]
+            chunk["moves"] = block[:, 2]
+            self._file.write(chunk.tobytes())
+        self.records += len(rows)
+        del rows, block, chunk  # 釋放對 array 緩衝區的參照，才能清空
+        del self._rows[:]
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._roster.close()
+
+
+def _lower_bound(column: np.ndarray, value: int) -> int:
+    """在依序排列的欄位中二分搜尋 (逐元素讀取，不複製整個欄位)"""
+    return bisect.bisect_left(column, value)
+
+
+class TraceReader:
+    """
+    追蹤檔讀取器
+
+    records 是整個檔案的 np.memmap (結構化陣列，零複製)；
+    檔案仍在寫入時，最後一筆不完整的紀錄會被略過。
+    紀錄依世代排列，generation() 以二分搜尋取出一個世代的切片 (仍是 memmap 的視圖)。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是互動追蹤檔: {path}")
+            (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            self.header = json.loads(f.read(length))
+        data_offset = len(MAGIC) + _LENGTH.size + length
+        data_offset += -data_offset % _HEADER_ALIGN
+        self.strategy_names: list[str] = self.header["strategies"]
+        self.records = self._map(path, TRACE_DTYPE, data_offset)
+        self.roster = self._map(path + ".agents", ROSTER_DTYPE, 0)
+
+    @staticmethod
+    def _map(path: str, dtype: np.dtype, offset: int) -> np.ndarray:
+        try:
+            with open(path, "rb") as f:
+                size = f.seek(0, 2)
+        except FileNotFoundError:
+            return np.zeros(0, dtype=dtype)
+        count = max(size - offset, 0) // dtype.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def generations(self) -> list[int]:
+        """檔案中被追蹤的世代"""
+        return np.unique(self.roster["generation"]).tolist()
+
+    def generation(self, generation: int) -> np.ndarray:
+        """一個世代的所有互動 (memmap 視圖)"""
+        column = self.records["generation"]
+        return self.records[_lower_bound(column, generation):_lower_bound(column, generation + 1)]
+
+    def agents(self, generation: int, strategy: str | None = None) -> np.ndarray:
+        """一個世代的個體 ID (可只取某個策略)"""
+        column = self.roster["generation"]
+        roster = self.roster[_lower_bound(column, generation):_lower_bound(column, generation + 1)]
+        if strategy is not None:
+            roster = roster[roster["strategy"] == self.strategy_names.index(strategy)]
+        return np.asarray(roster["agent"])
+
+    @staticmethod
+    def involving(records: np.ndarray, agents) -> np.ndarray:
+        """篩選任一方屬於 agents 的互動"""
+        agents = np.asarray(agents, dtype=np.uint32)
+        return records[np.isin(records["agent1"], agents) | np.isin(records["agent2"], agents)]
+
+    @staticmethod
+    def decode(records: np.ndarray) -> dict[str, np.ndarray]:
+        """把 moves 欄位展開成各項出招 (0/1)，並計算雙方的 result_code"""
+        moves = np.asarray(records["moves"])
+        fields = {name: (moves >> bit) & 1 for name, bit in MOVE_BITS.items()}
+        fields["result1"] = 2 * fields["actual1"] + fields["actual2"]
+        fields["result2"] = 2 * fields["actual2"] + fields["actual1"]
+        return fields
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="讀取逐次互動追蹤檔")
+    parser.add_argument("path", help="trace_*.bin")
+    parser.add_argument("--generation", type=int, help="只看此世代")
+    parser.add_argument("--strategy", help="只看此策略的個體參與的互動 (需要 --generation)")
+    parser.add_argument("--agent", type=int, action="append", default=[], help="只看此個體 (可重複)")
+    parser.add_argument("--head", type=int, default=20, help="印出前 N 筆 (0 = 只印統計)")
+    args = parser.parse_args(argv)
+
+    reader = TraceReader(args.path)
+    print(f"--- {args.path}: {len(reader)} 次互動, 世代 {reader.generations()} ---")
+    records = reader.records if args.generation is None else reader.generation(args.generation)
+    agents = list(args.agent)
+    if args.strategy:
+        if args.generation is None:
+            parser.error("--strategy 需要搭配 --generation")
+        agents.extend(reader.agents(args.generation, args.strategy).tolist())
+    if args.agent or args.strategy:
+        records = reader.involving(records, agents)
+
+    fields = reader.decode(records)
+    count = len(records)
+    if count:
+        slipped = int(np.count_nonzero(fields["intended1"] != fields["slipped1"])
+                      + np.count_nonzero(fields["intended2"] != fields["slipped2"]))
+        noisy = int(np.count_nonzero(fields["slipped1"] != fields["actual1"])
+                    + np.count_nonzero(fields["slipped2"] != fields["actual2"]))
+        cheat = (int(fields["actual1"].sum()) + int(fields["actual2"].sum())) / (2 * count)
+        print(f"符合: {count} 次互動 | 背叛率 {cheat:.1%} | 手滑 {slipped} 次 | 雜訊翻轉 {noisy} 次")
+
+    # 每一方: 意圖 / 手滑後 / 實際 (C = COOPERATE, D = CHEAT)
+    for i in range(min(args.head, count)):
+        record = records[i]
+        side1 = "".join("CD"[fields[name][i]] for name in ("intended1", "slipped1", "actual1"))
+        side2 = "".join("CD"[fields[name][i]] for name in ("intended2", "slipped2", "actual2"))
+        print(f"世代 {int(record['generation']):>5} | {int(record['agent1']):>7} {side1} vs "
+              f"{side2} {int(record['agent2']):<7} | 結果 {int(fields['result1'][i])}/{int(fields['result2'][i])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,370 @@
+"""
+共用的磁碟工作佇列 (Shared On-Disk Job Queue)
+
+多個 simulator 容器掛載同一個 ./output 時，各自以 MODE=worker 從這個佇列領取不同的任務，
+而不是全部重複執行同一組參數：
+- 佇列是共用 volume 上的 SQLite 資料庫 (QUEUE_DB，WAL 模式)，每個任務 (一組參數 x 一個 seed) 一列。
+- 領取在 "BEGIN IMMEDIATE" 交易中完成 (同一時間只有一個 worker 能寫入)，
+  依優先度 (大的先) 與提交順序挑出一個任務並標記為自己的，因此不會有兩個 worker 領到同一個任務。
+- 執行中的 worker 每 HEARTBEAT_SECONDS 秒更新心跳；心跳超過 STALE_SECONDS 秒未更新的任務
+  (worker 當機 / 容器被刪除) 會在下一次領取時被放回佇列，重試 MAX_ATTEMPTS 次後標記為失敗。
+- 結果寫入 OUTPUT_DIR/queue/<任務 id>.<第幾次嘗試>.json (每次嘗試一個檔案，先寫暫存檔再原子改名)；
+  只有仍持有該任務的 worker 能把它標記為完成並記錄結果檔路徑 (tasks.result_path)，
+  再寫入結果資料庫與名次統計。已被回收的 worker 會刪除自己的結果檔，不會覆蓋其他 worker 的結果。
+
+參數在提交時就解析成完整的 read_parameters 結果，各個 worker 的環境變數不影響任務內容。
+
+執行方式 (於專案根目錄，可在同一台機器上開多個行程測試):
+    python -m job_queue submit --param NOISE=0.01 --replicates 8 --priority 1
+    python -m job_queue worker                  # 或 MODE=worker python app.py
+    python -m job_queue status
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import app
+
+QUEUE_DB = os.getenv("QUEUE_DB", os.path.join(app.OUTPUT_DIR, "queue.sqlite"))
+HEARTBEAT_SECONDS = float(os.getenv("HEARTBEAT_SECONDS", 10))
+STALE_SECONDS = float(os.getenv("STALE_SECONDS", 60))
+MAX_ATTEMPTS = int(os.getenv("MAX_ATTEMPTS", 3))
+POLL_SECONDS = float(os.getenv("POLL_SECONDS", 2))
+
+QUEUED, CLAIMED, FINISHED, FAILED = "queued", "claimed", "finished", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    batch TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    submitted TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    submitted_at TEXT NOT NULL,
+    claimed_at REAL,
+    heartbeat_at REAL,
+    finished_at TEXT,
+    result_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_by_queue ON tasks (status, priority DESC, seq);
+CREATE INDEX IF NOT EXISTS tasks_by_batch ON tasks (batch);
+"""
+
+
+def default_worker_id() -> str:
+    """容器的 hostname 各不相同；同一台機器上的多個行程以 pid 區分"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobQueue:
+    """SQLite 工作佇列 (每個行程 / 執行緒各自開一個連線)"""
+
+    def __init__(self, path: str = QUEUE_DB, stale_seconds: float = STALE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # isolation_level=None: 自行以 BEGIN IMMEDIATE 控制交易
+        self.connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _transaction(self):
+        return _Immediate(self.connection)
+
+    # --- 提交 ---
+
+    def submit(self, parameters: dict[str, str], replicates: int = 1, seed: int | None = None,
+               priority: int = 0) -> str:
+        """
+        提交 replicates 個任務 (seed, seed+1, ...)，回傳批次 id。
+        parameters 為環境變數名稱 -> 值，在此解析成完整參數 (未指定的沿用提交端的環境變數)。
+        """
+        parameters = {name: str(value) for name, value in parameters.items()}
+        known = set(app.PARAMETER_ENV.values())
+        unknown = set(parameters) - known
+        if unknown:
+            raise ValueError(f"未知的參數: {', '.join(sorted(unknown))} (可用: {', '.join(sorted(known))})")
+        params = app.read_parameters({**os.environ, **parameters})
+        base_seed = app.new_seed() if seed is None else seed
+        batch = uuid.uuid4().hex[:12]
+        now = datetime.now().isoformat()
+        with self._transaction():
+            (seq,) = self.connection.execute("SELECT COALESCE(MAX(seq), 0) FROM tasks").fetchone()
+            self.connection.executemany(
+                "INSERT INTO tasks (id, batch, priority, seq, submitted, parameters, seed, status, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(f"{batch}-{i}", batch, priority, seq + 1 + i, json.dumps(parameters),
+                  json.dumps(params), base_seed + i, QUEUED, now) for i in range(replicates)])
+        return batch
+
+    # --- worker ---
+
+    def claim(self, worker: str) -> dict | None:
+        """
+        領取一個任務 (原子操作)；先把心跳過期的任務放回佇列 (或標記失敗)。
+        沒有任務時回傳 None。
+        """
+        now = time.time()
+        with self._transaction():
+            self.connection.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, "
+                "error = CASE WHEN attempts >= ? THEN '心跳逾時 (已重試 ' || attempts || ' 次)' ELSE error END "
+                "WHERE status = ? AND heartbeat_at < ?",
+                (self.max_attempts, FAILED, QUEUED, self.max_attempts, CLAIMED, now - self.stale_seconds))
+            row = self.connection.execute(
+                "SELECT id, parameters, seed, attempts FROM tasks WHERE status = ? "
+                "ORDER BY priority DESC, seq LIMIT 1", (QUEUED,)).fetchone()
+            if row is None:
+                return None
+            task_id, params, seed, attempts = row
+            self.connection.execute(
+                "UPDATE tasks SET status = ?, worker = ?, attempts = attempts + 1, claimed_at = ?, heartbeat_at = ? "
+                "WHERE id = ?", (CLAIMED, worker, now, now, task_id))
+        return {"id": task_id, "params": json.loads(params), "seed": seed, "attempt": attempts + 1}
+
+    def heartbeat(self, task_id: str, worker: str) -> bool:
+        """更新心跳；任務已不屬於此 worker (被回收) 時回傳 False"""
+        cursor = self.connection.execute(
+            "UPDATE tasks SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = ?",
+            (time.time(), task_id, worker, CLAIMED))
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker: str, result_path: str) -> bool:
+        """標記完成 (只有仍持有任務的 worker 能成功)"""
+        cursor = self.connection.execute(
+            "UPDATE tasks SET status = ?, finished_at = ?, result_path = ?, error = NULL "
+            "WHERE id = ? AND worker = ? AND status = ?",
+            (FINISHED, datetime.now().isoformat(), result_path, task_id, worker, CLAIMED))
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: str, worker: str, error: str, retry: bool = True):
+        """任務失敗: 仍有重試次數時放回佇列，否則標記為失敗"""
+        self.connection.execute(
+            "UPDATE tasks SET status = CASE WHEN ? AND attempts < ? THEN ? ELSE ? END, "
+            "worker = NULL, error = ? WHERE id = ? AND worker = ? AND status = ?",
+            (retry, self.max_attempts, QUEUED, FAILED, error, task_id, worker, CLAIMED))
+
+    # --- 查詢 ---
+
+    def status(self) -> list[dict]:
+        """每個批次的任務數 (依狀態)"""
+        rows = self.connection.execute(
+            "SELECT batch, MIN(priority), MIN(submitted), status, COUNT(*) FROM tasks "
+            "GROUP BY batch, status ORDER BY MIN(seq)").fetchall()
+        batches: dict[str, dict] = {}
+        for batch, priority, submitted, status, count in rows:
+            entry = batches.setdefault(batch, {"batch": batch, "priority": priority,
+                                               "parameters": json.loads(submitted)})
+            entry[status] = count
+        return list(batches.values())
+
+    def workers(self) -> list[tuple[str, str, float]]:
+        """目前持有任務的 worker: (worker, 任務 id, 距上次心跳的秒數)"""
+        now = time.time()
+        return [(worker, task_id, now - heartbeat_at) for worker, task_id, heartbeat_at in
+                self.connection.execute("SELECT worker, id, heartbeat_at FROM tasks WHERE status = ?",
+                                        (CLAIMED,))]
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT (例外時 ROLLBACK)"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class _Heartbeat:
+    """任務執行期間，以背景執行緒定期更新心跳 (使用自己的連線)"""
+
+    def __init__(self, queue_path: str, task_id: str, worker: str, interval: float):
+        self._queue = JobQueue(queue_path)
+        self._task_id, self._worker, self._interval = task_id, worker, interval
+        self._stop = threading.Event()
+        self.lost = False
+        self._thread = threading.Thread(target=self._run, name="queue-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            try:
+                if not self._queue.heartbeat(self._task_id, self._worker):
+                    self.lost = True
+                    return
+            except sqlite3.OperationalError as e:
+                print(f"[Worker] 心跳更新失敗 (稍後重試): {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._queue.close()
+
+
+def _raise_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_worker(queue_path: str = QUEUE_DB, output_dir: str = app.OUTPUT_DIR, worker: str | None = None,
+               heartbeat_seconds: float = HEARTBEAT_SECONDS, poll_seconds: float = POLL_SECONDS,
+               max_tasks: int = 0, exit_when_empty: bool = False) -> int:
+    """
+    worker 主迴圈: 領取 -> 執行 -> 寫入結果，佇列為空時每 poll_seconds 秒檢查一次。
+    回傳完成的任務數 (max_tasks > 0 時做完即結束；exit_when_empty 時佇列空了就結束)。
+    """
+    worker = worker or default_worker_id()
+    queue = JobQueue(queue_path)
+    results_dir = os.path.join(output_dir, "queue")
+    os.makedirs(results_dir, exist_ok=True)
+    # docker stop (SIGTERM) 與 Ctrl+C 相同: 交還目前的任務後結束
+    signal.signal(signal.SIGTERM, _raise_interrupt)
+    print(f"--- Worker {worker}: 佇列 {queue_path} ---")
+
+    done = 0
+    task = None
+    try:
+        while max_tasks <= 0 or done < max_tasks:
+            task = queue.claim(worker)
+            if task is None:
+                if exit_when_empty:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            print(f"[Worker] 領取任務 {task['id']} (seed {task['seed']}, 第 {task['attempt']} 次)")
+            heartbeat = _Heartbeat(queue_path, task["id"], worker, heartbeat_seconds)
+            start_time = time.perf_counter()
+            try:
+                strategy_types = app.load_strategies_or_none()
+                if not strategy_types:
+                    queue.fail(task["id"], worker, "找不到任何策略", retry=False)
+                    task = None
+                    continue
+                ranking = app._run_replicate(strategy_types, task["params"], task["seed"])
+            except Exception as e:
+                queue.fail(task["id"], worker, f"{type(e).__name__}: {e}")
+                print(f"[Worker] 任務 {task['id']} 失敗: {e}")
+                task = None
+                continue
+            finally:
+                heartbeat.stop()
+
+            if heartbeat.lost:
+                # 心跳逾時，任務已被回收給其他 worker: 丟棄本次結果
+                print(f"[Worker] 任務 {task['id']} 已被回收，丟棄結果")
+                task = None
+                continue
+
+            versions = app.strategy_versions()
+            # 每次嘗試一個檔案: 任務被回收後，舊 worker 的結果不會覆蓋新 worker 的結果
+            result_path = os.path.join(results_dir, f"{task['id']}.{task['attempt']}.json")
+            result = {
+                "task": task["id"],
+                "worker": worker,
+                "timestamp_iso": datetime.now().isoformat(),
+                "elapsed_seconds": time.perf_counter() - start_time,
+                "parameters": {
+                    **task["params"],
+                    "seed": task["seed"],
+                    "strategy_count": len(strategy_types),
+                    "strategies_loaded": [t.__name__ for t in strategy_types],
+                    "strategy_versions": versions,
+                },
+                "ranking": ranking,
+            }
+            temp_path = f"{result_path}.{worker}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=4, ensure_ascii=False)
+            os.replace(temp_path, result_path)
+
+            if queue.complete(task["id"], worker, result_path):
+                app.record_rankings(task["params"], versions, [ranking], app.RANK_STATS_DIR)
+                store = app.open_results_store()
+                if store is not None:
+                    store.record_runs("queue", task["params"], {task["seed"]: ranking}, len(strategy_types),
+                                      versions, source=f"queue/{os.path.basename(result_path)}")
+                    store.close()
+                done += 1
+                print(f"[Worker] 任務 {task['id']} 完成 -> {result_path}")
+            else:
+                # 心跳之後才被回收 (其他 worker 已接手): 丟棄本次結果
+                os.remove(result_path)
+                print(f"[Worker] 任務 {task['id']} 已被回收，丟棄結果")
+            task = None
+    except KeyboardInterrupt:
+        print(f"\n[Worker] 停止 {worker}")
+        if task is not None:
+            queue.fail(task["id"], worker, "worker 停止", retry=True)
+    finally:
+        queue.close()
+    return done
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="共用的磁碟工作佇列")
+    parser.add_argument("--db", default=QUEUE_DB, help=f"佇列資料庫 (預設 {QUEUE_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = commands.add_parser("submit", help="提交任務")
+    submit_parser.add_argument("--param", action="append", default=[], help="參數 NAME=VALUE (可重複)")
+    submit_parser.add_argument("--seed", type=int)
+    submit_parser.add_argument("--replicates", type=int, default=1)
+    submit_parser.add_argument("--priority", type=int, default=0, help="數字大的先執行")
+
+    worker_parser = commands.add_parser("worker", help="執行 worker")
+    worker_parser.add_argument("--id", help="worker 名稱 (預設 hostname-pid)")
+    worker_parser.add_argument("--max-tasks", type=int, default=0, help="完成 N 個任務後結束 (0 = 不限)")
+    worker_parser.add_argument("--exit-when-empty", action="store_true", help="佇列空了就結束")
+
+    commands.add_parser("status", help="各批次的任務狀態與執行中的 worker")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        run_worker(args.db, worker=args.id, max_tasks=args.max_tasks, exit_when_empty=args.exit_when_empty)
+        return 0
+
+    queue = JobQueue(args.db)
+    try:
+        if args.command == "submit":
+            parameters = dict(item.split("=", 1) for item in args.param)
+            batch = queue.submit(parameters, args.replicates, args.seed, args.priority)
+            print(f"[Queue] 已提交批次 {batch}: {parameters or '(預設參數)'} x {args.replicates}")
+            return 0
+
+        for entry in queue.status():
+            counts = ", ".join(f"{status} {entry[status]}" for status in (QUEUED, CLAIMED, FINISHED, FAILED)
+                               if entry.get(status))
+            print(f"批次 {entry['batch']} | 優先度 {entry['priority']:>3} | {entry['parameters'] or '(預設參數)'} | {counts}")
+        for worker, task_id, age in queue.workers():
+            print(f"Worker {worker}: {task_id} (心跳 {age:.0f} 秒前)")
+        return 0
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import json
+import os
+import time
+
+# 被量測的三個熱路徑方法 (報表欄位順序)
+METHODS = ("play", "apply_internal_noise", "update")
+
+
+class StrategyProfiler:
+    """
+    策略熱路徑效能計數器 (Per-Strategy Profiler)
+
+    啟用時 (PROFILE_STRATEGIES > 0)，engine 會把每個個體的
+    play / apply_internal_noise / update 換成 "計時包裝"，
+    依 "策略類別" 累計：
+    - 牆鐘時間 (perf_counter) 與呼叫次數
+    - 每次呼叫 "看到" 的歷史長度 (總和與最大值)
+      * play:                    對手的公開日誌 (opponent_history)
+      * apply_internal_noise /
+        update:                  自己的公開日誌 (my_history)
+
+    每個世代結束時由 simulation 呼叫 end_generation()，
+    印出 "最耗時的前 N 個類別"，並追加一行 JSON 到 output_path。
+
+    【未啟用時】engine 不會收到 profiler，熱迴圈完全不變 (零額外開銷)。
+    """
+
+    def __init__(self, top_n: int = 10, output_path: str | None = None):
+        self.top_n = top_n
+        self.output_path = output_path
+        # {類別名稱: {方法: [秒數, 次數, 歷史長度總和, 歷史長度最大值]}}
+        self._stats: dict[str, dict[str, list]] = {}
+
+    def _counters(self, strategy) -> dict[str, list]:
+        name = type(strategy).__name__
+        counters = self._stats.get(name)
+        if counters is None:
+            counters = {method: [0.0, 0, 0, 0] for method in METHODS}
+            self._stats[name] = counters
+        return counters
+
+    # --- 包裝 (由 engine 在每次循環賽開始時呼叫) ---
+
+    def wrap_play(self, strategy):
+        play = strategy.play
+        stats = self._counters(strategy)["play"]
+        perf_counter = time.perf_counter
+
+        def timed_play(opponent_unique_id, opponent_history, opponent_score):
+            start = perf_counter()
+            move = play(opponent_unique_id, opponent_history, opponent_score)
+            stats[0] += perf_counter() - start
+            stats[1] += 1
+            seen = len(opponent_history)
+            stats[2] += seen
+            if seen > stats[3]:
+                stats[3] = seen
+            return move
+
+        return timed_play
+
+    def _wrap_own_history(self, strategy, method: str, func):
+        """包裝 "以自己的歷史為準" 的方法 (手滑 / 更新)"""
+        stats = self._counters(strategy)[method]
+        perf_counter = time.perf_counter
+
+        def timed(*args):
+            start = perf_counter()
+            value = func(*args)
+            stats[0] += perf_counter() - start
+            stats[1] += 1
+            seen = len(strategy.my_history)
+            stats[2] += seen
+            if seen > stats[3]:
+                stats[3] = seen
+            return value
+
+        return timed
+
+    def wrap_slipper(self, strategy, slipper):
+        return self._wrap_own_history(strategy, "apply_internal_noise", slipper)
+
+    def wrap_recorder(self, strategy, recorder):
+        return self._wrap_own_history(strategy, "update", recorder)
+
+    # --- 報表 ---
+
+    def snapshot(self) -> list[dict]:
+        """依 "總耗時" 由高到低排序的每個類別統計"""
+        rows = []
+        for name, counters in self._stats.items():
+            row = {"strategy": name, "total_seconds": 0.0}
+            for method in METHODS:
+                seconds, calls, history_sum, history_max = counters[method]
+                row[method] = {
+                    "seconds": seconds,
+                    "calls": calls,
+                    "avg_ns": seconds / calls * 1e9 if calls else 0.0,
+                    "avg_history": history_sum / calls if calls else 0.0,
+                    "max_history": history_max,
+                }
+                row["total_seconds"] += seconds
+            rows.append(row)
+        rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+        return rows
+
+    def end_generation(self, generation: int, verbose: bool = True):
+        """
+        印出本世代的 top-N 表格 (verbose=False 時不印)，寫入 output_path，然後歸零計數器。
+        """
+        rows = self.snapshot()
+        self._stats.clear()
+        if not rows:
+            return
+
+        if verbose:
+            self._print_table(generation, rows)
+
+        if self.output_path:
+            os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"generation": generation, "strategies": rows[:self.top_n]},
+                                   ensure_ascii=False) + "\n")
+
+    def _print_table(self, generation: int, rows: list[dict]):
+        print(f"--- 策略耗時 Top {self.top_n} (世代 {generation}) ---")
+        print(f"  {'策略':<20} {'總計ms':>8} {'play ns':>8} {'noise ns':>8} "
+              f"{'update ns':>9} {'呼叫數':>8} {'平均歷史':>8}")
+        for row in rows[:self.top_n]:
+            play = row["play"]
+            print(f"  {row['strategy']:<20} {row['total_seconds'] * 1e3:>8.1f} "
+                  f"{play['avg_ns']:>8.0f} {row['apply_internal_noise']['avg_ns']:>8.0f} "
+                  f"{row['update']['avg_ns']:>9.0f} {play['calls']:>8} "
+                  f"{play['avg_history']:>8.1f}")
@@ -0,0 +1,239 @@
+"""
+名次統計的串流彙整 (Streaming Rank Statistics)
+
+每次模擬結束時把最終排名 "折疊" 進一份小型狀態，不需要重新讀取所有結果 JSON：
+- 每個策略的名次平均 / 變異數: Welford 線上演算法 (合併時使用 Chan 等人的平行公式)。
+- 名次分佈 (分位數): 名次是 1..策略數 的整數，直接以 "每個名次的次數" 作為可合併的精確 sketch，
+  大小只和策略數有關。
+- 兩兩比較: "A 的名次高於 B" 的次數。
+
+狀態的大小只和策略數有關 (與折疊了多少次模擬無關)。
+每組 "參數 + 策略版本" 一個狀態檔 OUTPUT_DIR/rank_stats/<雜湊>.json
+(策略熱重載前後的模擬不會混在同一份統計中)；多個行程 / 容器共用 volume 時，
+以檔案鎖 (fcntl.flock) 保護 "讀取 -> 折疊 -> 原子寫回"。不同來源的狀態可以用 merge() 合併。
+
+執行方式 (於專案根目錄):
+    python -m rank_stats                       # 列出每組參數的統計
+    python -m rank_stats --group <雜湊> --pairs  # 單一組 + 兩兩勝率
+    python -m rank_stats a.json b.json          # 合併多個狀態檔 (例如來自不同機器) 後列出
+"""
+import argparse
+import fcntl
+import glob
+import hashlib
+import json
+import math
+import os
+import sys
+
+RANK_STATS_DIR = os.getenv("RANK_STATS_DIR", os.path.join(os.getenv("OUTPUT_DIR", "/app/output"), "rank_stats"))
+
+
+class RankStats:
+    """一組參數與策略版本下所有模擬的名次統計 (可折疊、可合併、可序列化)"""
+
+    def __init__(self, params: dict | None = None, strategy_versions: dict[str, str] | None = None):
+        self.params = params or {}
+        self.strategy_versions = strategy_versions or {}
+        self.runs = 0
+        self.count: dict[str, int] = {}
+        self.mean: dict[str, float] = {}
+        self.m2: dict[str, float] = {}
+        self.histogram: dict[str, list[int]] = {}   # histogram[name][rank - 1] = 次數
+        self.above: dict[str, dict[str, int]] = {}  # above[A][B] = A 名次高於 B 的次數
+
+    # --- 更新 ---
+
+    def fold(self, ranking: list[str]):
+        """折疊一次模擬的最終排名 (第一名在前)"""
+        self.runs += 1
+        for rank, name in enumerate(ranking, start=1):
+            n = self.count.get(name, 0) + 1
+            mean = self.mean.get(name, 0.0)
+            delta = rank - mean
+            mean += delta / n
+            self.count[name] = n
+            self.mean[name] = mean
+            self.m2[name] = self.m2.get(name, 0.0) + delta * (rank - mean)
+
+            histogram = self.histogram.setdefault(name, [])
+            if len(histogram) < rank:
+                histogram.extend([0] * (rank - len(histogram)))
+            histogram[rank - 1] += 1
+
+            above = self.above.setdefault(name, {})
+            for lower in ranking[rank:]:
+                above[lower] = above.get(lower, 0) + 1
+
+    def merge(self, other: "RankStats"):
+        """合併另一份狀態 (例如另一個 worker 的)；策略版本不同時 ValueError"""
+        if self.runs and other.runs and self.strategy_versions != other.strategy_versions:
+            raise ValueError("策略版本不同的統計不能合併")
+        if not self.runs:
+            self.strategy_versions = other.strategy_versions
+        self.runs += other.runs
+        for name, n_b in other.count.items():
+            n_a = self.count.get(name, 0)
+            mean_a, mean_b = self.mean.get(name, 0.0), other.mean[name]
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            self.count[name] = n
+            self.mean[name] = mean_a + delta * n_b / n
+            self.m2[name] = self.m2.get(name, 0.0) + other.m2[name] + delta * delta * n_a * n_b / n
+
+            histogram = self.histogram.setdefault(name, [])
+            if len(histogram) < len(other.histogram[name]):
+                histogram.extend([0] * (len(other.histogram[name]) - len(histogram)))
+            for i, value in enumerate(other.histogram[name]):
+                histogram[i] += value
+        for name, lowers in other.above.items():
+            above = self.above.setdefault(name, {})
+            for lower, value in lowers.items():
+                above[lower] = above.get(lower, 0) + value
+
+    # --- 查詢 ---
+
+    def variance(self, name: str) -> float:
+        """樣本變異數 (少於 2 次時為 0)"""
+        n = self.count.get(name, 0)
+        return self.m2[name] / (n - 1) if n > 1 else 0.0
+
+    def quantile(self, name: str, q: float) -> int:
+        """名次的 q 分位數 (累積次數第一次達到 q * n 的名次)"""
+        histogram = self.histogram[name]
+        target = q * sum(histogram)
+        cumulative = 0
+        for rank, value in enumerate(histogram, start=1):
+            cumulative += value
+            if cumulative >= target and cumulative > 0:
+                return rank
+        return len(histogram)
+
+    def win_rate(self, a: str, b: str) -> float | None:
+        """A 名次高於 B 的比例 (兩者從未同時出現時為 None)"""
+        wins = self.above.get(a, {}).get(b, 0)
+        losses = self.above.get(b, {}).get(a, 0)
+        return wins / (wins + losses) if wins + losses else None
+
+    def summary(self) -> list[dict]:
+        """依平均名次排序的統計表"""
+        rows = [{
+            "name": name,
+            "runs": self.count[name],
+            "mean_rank": self.mean[name],
+            "std_rank": math.sqrt(self.variance(name)),
+            "p10": self.quantile(name, 0.1),
+            "median": self.quantile(name, 0.5),
+            "p90": self.quantile(name, 0.9),
+        } for name in self.count]
+        rows.sort(key=lambda row: row["mean_rank"])
+        return rows
+
+    # --- 序列化 ---
+
+    def to_dict(self) -> dict:
+        return {
+            "params": self.params,
+            "strategy_versions": self.strategy_versions,
+            "runs": self.runs,
+            "strategies": {name: {"count": self.count[name], "mean": self.mean[name], "m2": self.m2[name],
+                                  "histogram": self.histogram[name]} for name in self.count},
+            "above": self.above,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RankStats":
+        stats = cls(data.get("params"), data.get("strategy_versions"))
+        stats.runs = data["runs"]
+        for name, entry in data["strategies"].items():
+            stats.count[name] = entry["count"]
+            stats.mean[name] = entry["mean"]
+            stats.m2[name] = entry["m2"]
+            stats.histogram[name] = list(entry["histogram"])
+        stats.above = {name: dict(lowers) for name, lowers in data["above"].items()}
+        return stats
+
+    @classmethod
+    def load(cls, path: str) -> "RankStats":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: str):
+        """原子寫入 (先寫暫存檔再改名)"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+def group_key(params: dict, strategy_versions: dict[str, str]) -> str:
+    """參數 + 策略版本 -> 狀態檔名 (只有相同參數、相同策略程式碼的模擬才放在一起比較)"""
+    payload = {"parameters": params, "strategies": strategy_versions}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def record_rankings(params: dict, strategy_versions: dict[str, str], rankings: list[list[str]],
+                    directory: str = RANK_STATS_DIR) -> str | None:
+    """
+    把幾次模擬的排名折疊進這組參數與策略版本的狀態檔 (檔案鎖保護，可被多個行程同時呼叫)。
+    directory 為空字串時不記錄。回傳狀態檔路徑。
+    """
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{group_key(params, strategy_versions)}.json")
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        stats = RankStats.load(path) if os.path.exists(path) else RankStats(params, strategy_versions)
+        for ranking in rankings:
+            stats.fold(ranking)
+        stats.save(path)
+    return path
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="名次統計 (串流彙整的結果)")
+    parser.add_argument("paths", nargs="*", help="要合併的狀態檔 (預設: 目錄中每組參數各自列出)")
+    parser.add_argument("--dir", default=RANK_STATS_DIR, help=f"狀態目錄 (預設 {RANK_STATS_DIR})")
+    parser.add_argument("--group", help="只列出此雜湊 (參數 + 策略版本)")
+    parser.add_argument("--pairs", action="store_true", help="同時列出兩兩勝率")
+    args = parser.parse_args(argv)
+
+    if args.paths:
+        merged = RankStats()
+        for path in args.paths:
+            try:
+                merged.merge(RankStats.load(path))
+            except ValueError as e:
+                print(f"[錯誤] {path}: {e}")
+                return 1
+        groups = [("(合併)", merged)]
+    else:
+        pattern = f"{args.group}.json" if args.group else "*.json"
+        groups = [(os.path.basename(path)[:-5], RankStats.load(path))
+                  for path in sorted(glob.glob(os.path.join(args.dir, pattern)))]
+    if not groups:
+        print(f"(沒有統計資料: {args.dir})")
+        return 0
+
+    for key, stats in groups:
+        print(f"\n=== {key}: {stats.runs} 次模擬 | {stats.params} ===")
+        rows = stats.summary()
+        for row in rows:
+            print(f"{row['name']:<20} 平均 {row['mean_rank']:>6.2f} ± {row['std_rank']:<5.2f} "
+                  f"P10/中位數/P90 {row['p10']:>3}/{row['median']:>3}/{row['p90']:>3}  ({row['runs']} 次)")
+        if args.pairs:
+            names = [row["name"] for row in rows]
+            print("\n兩兩勝率 (列高於欄的比例):")
+            print(" " * 20 + "".join(f"{name[:6]:>7}" for name in names))
+            for a in names:
+                cells = []
+                for b in names:
+                    rate = stats.win_rate(a, b) if a != b else None
+                    cells.append(f"{rate:>7.0%}" if rate is not None else f"{'-':>7}")
+                print(f"{a:<20}" + "".join(cells))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
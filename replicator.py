@@ -0,0 +1,413 @@
+"""
+快速模式：種類對種類的 "期望分數矩陣" + 複製者動態 (Replicator / Moran Dynamics)
+
+在 "隨機兩兩互動" 的模型中，個體的適應度主要由 "群體組成" 決定。
+快速模式因此分成兩個階段：
+1. 以蒙地卡羅估計每一對策略種類的 "每回合期望分數" (payoff matrix)，
+   結果依 "策略原始碼雜湊 + 參數" 快取在磁碟上 (PAYOFF_CACHE_DIR)。
+2. 在矩陣上演化 "種類的頻率" (不再模擬個體互動)，
+   數千個世代只需要數毫秒。
+
+演化動態 (ENGINE 環境變數):
+- replicator: 確定性的離散複製者動態，頻率低於 "一個個體" 即視為滅絕。
+- moran:      有限群體的 Moran 過程，每世代 kill_count 次 "依適應度誕生 / 隨機死亡"。
+
+驗證 (與完整的個體模擬比較排名，參數同樣讀取環境變數):
+    python -m replicator [--runs 3] [--dynamics replicator]
+"""
+import argparse
+import collections
+import fcntl
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import definitions
+import history
+from definitions import Move
+from reporting import DEFAULT_REPORTER, Reporter
+from rng import SimulationRNG
+from strategies import base_strategy
+from strategies.base_strategy import configure_population
+
+# 快速模式支援的演化動態 (即 ENGINE 的取值)
+DYNAMICS = ("replicator", "moran")
+
+# 期望分數矩陣的磁碟快取目錄
+PAYOFF_CACHE_DIR = os.getenv(
+    "PAYOFF_CACHE_DIR", os.path.join(os.getenv("OUTPUT_DIR", "/app/output"), "payoff_cache"))
+
+# 每一對策略種類的蒙地卡羅樣本數 (每個樣本是一場 rounds_per_game 回合的比賽)
+PAYOFF_SAMPLES = int(os.getenv("PAYOFF_SAMPLES", 20))
+
+
+# --- 1. 策略原始碼雜湊 (快取的 key) ---
+
+@functools.cache
+def _framework_digest() -> str:
+    """遊戲規則 / 歷史 / 策略合約 / 本模組的原始碼雜湊 (任何一個改動，快取全部失效)"""
+    digest = hashlib.sha256()
+    for module in (definitions, history, base_strategy, sys.modules[__name__]):
+        with open(inspect.getfile(module), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def strategy_source_hash(strategy_type: type) -> str:
+    """策略類別的 "原始碼雜湊" (類別所在檔案 + 類別名稱 + 框架原始碼)"""
+    digest = hashlib.sha256(_framework_digest().encode())
+    digest.update(strategy_type.__qualname__.encode())
+    with open(inspect.getfile(strategy_type), "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+# --- 2. 蒙地卡羅估計 ---
+
+def play_match(type1: type, type2: type, rounds: int, noise: float, rng: SimulationRNG) -> tuple[int, int]:
+    """
+    兩個 "新個體" 連續對戰 rounds 回合 (與 engine 相同的手滑 / 雜訊 / 記錄流程)，
+    回傳雙方的總分。
+    """
+    strategy1, strategy2 = type1(0), type2(1)
+    configure_population([strategy1, strategy2])
+    for strategy in (strategy1, strategy2):
+        strategy.rng = rng
+        strategy.reset()
+
+    play1, play2 = strategy1.play, strategy2.play
+    slip1, slip2 = strategy1.code_slipper(), strategy2.code_slipper()
+    record1, record2 = strategy1.code_recorder(), strategy2.code_recorder()
+    cheat = Move.CHEAT
+    chance = rng.chance
+
+    for _ in range(rounds):
+        intent1 = play1(1, strategy2.my_history, strategy2.total_score)
+        intent2 = play2(0, strategy1.my_history, strategy1.total_score)
+        slipped1 = slip1(1 if intent1 is cheat else 0)
+        slipped2 = slip2(1 if intent2 is cheat else 0)
+        actual1 = slipped1 ^ (noise > 0 and chance(noise))
+        actual2 = slipped2 ^ (noise > 0 and chance(noise))
+        record1(1, slipped1, actual1, slipped2, actual2, 2 * actual1 + actual2)
+        record2(0, slipped2, actual2, slipped1, actual1, 2 * actual2 + actual1)
+
+    return strategy1.total_score, strategy2.total_score
+
+
+class PayoffCache:
+    """
+    期望分數的磁碟快取
+
+    每組參數 (回合數 / 雜訊 / 樣本數) 一個 JSON 檔，內容為
+    {"<雜湊A>:<雜湊B>": [A 的每回合分數, B 的每回合分數]} (A <= B)。
+    新增或修改一個策略時，只有牽涉到它的配對需要重新估計。
+
+    多個行程 (副本 / 掃描 / 服務的 worker) 共用同一個目錄：save() 在 "<快取>.lock" 的
+    fcntl.flock 下合併磁碟上的內容，再以暫存檔 + os.replace() 原子寫入，
+    讀取者不會看到寫到一半的檔案，也不會丟掉其他行程新增的配對。
+    """
+
+    def __init__(self, directory: str, rounds_per_game: int, noise: float, samples: int):
+        self.path = os.path.join(
+            directory, f"payoff_r{rounds_per_game}_noise{noise:g}_s{samples}.json")
+        self.entries = self._read()
+        self.added: dict[str, list[float]] = {}  # 本行程新估計的配對 (save 時合併)
+
+    def _read(self) -> dict[str, list[float]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[Payoff] 警告：無法讀取快取 {self.path}: {e}")
+            return {}
+
+    def get(self, hash1: str, hash2: str) -> tuple[float, float] | None:
+        if hash1 <= hash2:
+            entry = self.entries.get(f"{hash1}:{hash2}")
+            return None if entry is None else (entry[0], entry[1])
+        entry = self.entries.get(f"{hash2}:{hash1}")
+        return None if entry is None else (entry[1], entry[0])
+
+    def put(self, hash1: str, hash2: str, payoff1: float, payoff2: float):
+        if hash1 <= hash2:
+            key, entry = f"{hash1}:{hash2}", [payoff1, payoff2]
+        else:
+            key, entry = f"{hash2}:{hash1}", [payoff2, payoff1]
+        self.entries[key] = self.added[key] = entry
+
+    def save(self):
+        if not self.added:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(f"{self.path}.lock", "a", encoding="utf-8") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                self.entries = {**self._read(), **self.added}
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.entries, f)
+                os.replace(temp_path, self.path)
+            self.added = {}
+        except OSError as e:
+            print(f"[Payoff] 警告：無法寫入快取 {self.path}: {e}")
+
+
+def estimate_payoff_matrix(strategy_types: list[type], rounds_per_game: int, noise: float,
+                           samples: int = PAYOFF_SAMPLES,
+                           cache_dir: str | None = PAYOFF_CACHE_DIR,
+                           reporter: Reporter = DEFAULT_REPORTER) -> np.ndarray:
+    """
+    估計 matrix[i, j] = 種類 i 對上種類 j 時 "每回合" 的期望分數。
+
+    每一對種類以 samples 場 rounds_per_game 回合的比賽取平均。
+    每一對使用由其快取 key 衍生的固定 seed，所以結果可重現、與模擬 seed 無關。
+    cache_dir 為 None 時不使用磁碟快取。
+    """
+    n = len(strategy_types)
+    hashes = [strategy_source_hash(t) for t in strategy_types]
+    cache = PayoffCache(cache_dir, rounds_per_game, noise, samples) if cache_dir else None
+    matrix = np.zeros((n, n))
+    estimated = 0
+
+    start_time = time.perf_counter()
+    for i in range(n):
+        for j in range(i, n):
+            cached = cache.get(hashes[i], hashes[j]) if cache else None
+            if cached is None:
+                key = ":".join(sorted((hashes[i], hashes[j])))
+                rng = SimulationRNG(int(hashlib.sha256(key.encode()).hexdigest()[:15], 16))
+                total1 = total2 = 0
+                for _ in range(samples):
+                    score1, score2 = play_match(strategy_types[i], strategy_types[j], rounds_per_game, noise, rng)
+                    total1 += score1
+                    total2 += score2
+                played = samples * rounds_per_game
+                cached = (total1 / played, total2 / played)
+                if i == j:
+                    # 同種類對戰：雙方的平均即為期望值
+                    cached = ((cached[0] + cached[1]) / 2,) * 2
+                if cache:
+                    cache.put(hashes[i], hashes[j], *cached)
+                estimated += 1
+            matrix[i, j], matrix[j, i] = cached
+
+    if cache:
+        cache.save()
+    pairs = n * (n + 1) // 2
+    reporter.detail(f"[Payoff] {pairs} 組配對: 快取命中 {pairs - estimated}, "
+          f"新估計 {estimated} ({time.perf_counter() - start_time:.2f} 秒)")
+    return matrix
+
+
+# --- 3. 演化動態 ---
+
+def replicator_step(matrix: np.ndarray, frequencies: np.ndarray, rate: float) -> np.ndarray:
+    """
+    離散複製者動態的一個世代。
+
+    rate = 每世代被替換的群體比例 (kill_count / 群體大小)，
+    讓 "一個世代" 的時間尺度與個體模擬相同。
+    """
+    fitness = matrix @ frequencies
+    mean_fitness = frequencies @ fitness
+    if mean_fitness <= 0:
+        return frequencies
+    return (1 - rate) * frequencies + rate * frequencies * fitness / mean_fitness
+
+
+def moran_step(matrix: np.ndarray, counts: np.ndarray, kill_count: int,
+               generator: np.random.Generator) -> np.ndarray:
+    """
+    Moran 過程的一個世代 (批次)：kill_count 個個體隨機死亡，
+    kill_count 個新個體依 "數量 x 適應度" 的比例誕生。
+    適應度不包含 "與自己對戰"。
+    """
+    population_size = counts.sum()
+    fitness = (matrix @ counts - np.diag(matrix)) / max(population_size - 1, 1)
+    weights = counts * fitness
+    total = weights.sum()
+    weights = weights / total if total > 0 else counts / population_size
+    deaths = generator.multivariate_hypergeometric(counts, kill_count)
+    births = generator.multinomial(kill_count, weights)
+    return counts - deaths + births
+
+
+def run_fast_simulation(
+    strategy_types: list[type],
+    initial_copies: int,
+    kill_count: int,
+    rounds_per_game: int,
+    noise: float,
+    stability_threshold: int,
+    dynamics: str = "replicator",
+    rng: SimulationRNG | None = None,
+    samples: int = PAYOFF_SAMPLES,
+    cache_dir: str | None = PAYOFF_CACHE_DIR,
+    reporter: Reporter = DEFAULT_REPORTER,
+) -> list[str]:
+    """
+    快速模式的演化模擬，回傳與 simulation.run_evolution_simulation 相同格式的最終排名
+    (終止條件與排名規則也相同)。輸出經過 reporter (與個體模擬相同的 VERBOSITY 規則)。
+    """
+    # (延遲匯入，避免 simulation -> replicator -> simulation 的循環匯入)
+    from simulation import _get_final_ranking
+
+    if dynamics not in DYNAMICS:
+        raise ValueError(f"未知的演化動態: {dynamics} (可用: {', '.join(DYNAMICS)})")
+    if rng is None:
+        rng = SimulationRNG()
+
+    names = [t.__name__ for t in strategy_types]
+    matrix = estimate_payoff_matrix(strategy_types, rounds_per_game, noise, samples, cache_dir, reporter)
+
+    n = len(strategy_types)
+    population_size = n * initial_copies
+    counts = np.full(n, initial_copies, dtype=np.int64)
+    frequencies = np.full(n, 1 / n)
+    rate = kill_count / population_size
+    extinct_below = 1 / population_size
+
+    alive = set(range(n))
+    extinction_order: list[str] = []
+    stability_counter = 0
+    generation = 0
+
+    start_time = time.perf_counter()
+    while True:
+        generation += 1
+
+        # --- 演化一個世代 ---
+        if dynamics == "replicator":
+            frequencies = replicator_step(matrix, frequencies, rate)
+            # 不到 "一個個體" 即視為滅絕
+            frequencies[frequencies < extinct_below] = 0.0
+            frequencies /= frequencies.sum()
+            current = {i for i in alive if frequencies[i] > 0}
+        else:
+            counts = moran_step(matrix, counts, kill_count, rng.generator)
+            current = {i for i in alive if counts[i] > 0}
+
+        # --- 檢查滅絕 ---
+        just_extinct = alive - current
+        if just_extinct:
+            # (排序，讓同一世代多個滅絕事件的順序可重現)
+            for name in sorted(names[i] for i in just_extinct):
+                extinction_order.append(name)
+                reporter.event(f"!!! 💀 滅絕事件 (世代 {generation}): {name} 已被淘汰 !!!")
+
+        # --- 檢查終止條件 (與個體模擬相同的順序) ---
+        stable = stability_counter >= stability_threshold
+        if stable or len(current) <= 1:
+            break
+
+        if current == alive:
+            stability_counter += 1
+        else:
+            stability_counter = 0
+            alive = current
+
+    elapsed = time.perf_counter() - start_time
+    shares = frequencies if dynamics == "replicator" else counts
+    final_counts = collections.Counter({names[i]: shares[i].item() for i in current})
+    reporter.event("\n" + "="*40)
+    if stable:
+        reporter.event(f"🏁 快速模式結束：生態系已達穩定狀態 (連續 {stability_threshold} 世代)")
+    else:
+        reporter.event("🏁 快速模式結束：已產生最終勝利者")
+    reporter.event(f"   {dynamics}: {generation} 世代, {elapsed * 1000:.1f} 毫秒")
+    reporter.event("="*40)
+    for name, share in final_counts.most_common():
+        if dynamics == "replicator":
+            reporter.detail(f"  - {name:<20}: {share * population_size:.1f} 個體 ({share:.1%})")
+        else:
+            reporter.detail(f"  - {name:<20}: {share} 個體")
+
+    # 同數量存活者的次要排序: 對目前群體的期望分數
+    expected = matrix @ (frequencies if dynamics == "replicator" else counts / counts.sum())
+    return _get_final_ranking(final_counts, extinction_order, stable=stable,
+                              mean_scores={names[i]: expected[i].item() for i in current})
+
+
+# --- 4. 驗證：與完整的個體模擬比較 ---
+
+def spearman(ranking1: list[str], ranking2: list[str]) -> float:
+    """兩個排名的 Spearman 等級相關係數 (只計算兩者共同的策略)"""
+    common = [name for name in ranking1 if name in ranking2]
+    n = len(common)
+    if n < 2:
+        return 1.0
+    position2 = {name: i for i, name in enumerate(name for name in ranking2 if name in common)}
+    d2 = sum((i - position2[name]) ** 2 for i, name in enumerate(common))
+    return 1 - 6 * d2 / (n * (n * n - 1))
+
+
+def main(argv: list[str] | None = None) -> int:
+    import app
+
+    parser = argparse.ArgumentParser(description="比較快速模式與完整個體模擬的排名")
+    parser.add_argument("--runs", type=int, default=3, help="完整個體模擬的次數 (預設 3)")
+    parser.add_argument("--dynamics", choices=DYNAMICS, default="replicator", help="快速模式的演化動態")
+    parser.add_argument("--seed", type=int, default=None, help="base seed (第 i 次個體模擬使用 seed + i)")
+    args = parser.parse_args(argv)
+
+    strategy_types = app.load_strategies_or_none()
+    if not strategy_types:
+        return 1
+
+    params = app.read_parameters()
+    if params["engine_mode"] in DYNAMICS:
+        params["engine_mode"] = "python"
+    app.print_parameters(params)
+    base_seed = app.new_seed() if args.seed is None else args.seed
+
+    # --- 快速模式 ---
+    start_time = time.perf_counter()
+    fast_ranking = run_fast_simulation(
+        strategy_types,
+        params["initial_copies"],
+        params["kill_count"],
+        params["rounds_per_game"],
+        params["noise"],
+        params["stability_threshold"],
+        dynamics=args.dynamics,
+        rng=SimulationRNG(base_seed),
+    )
+    fast_seconds = time.perf_counter() - start_time
+
+    # --- 完整個體模擬 ---
+    rankings = []
+    start_time = time.perf_counter()
+    for i in range(args.runs):
+        print(f"[Validate] 個體模擬 {i + 1}/{args.runs} (seed={base_seed + i})...")
+        rankings.append(app._run_replicate(strategy_types, params, base_seed + i))
+    full_seconds = time.perf_counter() - start_time
+
+    names = [t.__name__ for t in strategy_types]
+    report = app.aggregate_rankings(rankings, names)
+    consensus = [item["name"] for item in report]
+    mean_rank = {item["name"]: item["mean_rank"] for item in report}
+
+    print("\n" + "="*60)
+    print(f"=== 快速模式 ({args.dynamics}, {fast_seconds:.2f} 秒) vs "
+          f"個體模擬 ({args.runs} 次, {full_seconds:.1f} 秒) ===")
+    print("="*60)
+    print(f"{'名次':<6}{'快速模式':<24}{'個體模擬 (平均名次)':<24}")
+    for i, (fast_name, full_name) in enumerate(zip(fast_ranking, consensus)):
+        print(f"#{i + 1:<5}{fast_name:<24}{full_name} ({mean_rank[full_name]:.2f})")
+
+    for i, ranking in enumerate(rankings):
+        print(f"[Validate] Spearman (快速模式 vs seed={base_seed + i}): {spearman(fast_ranking, ranking):+.3f}")
+    print(f"[Validate] Spearman (快速模式 vs 平均名次): {spearman(fast_ranking, consensus):+.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+日誌與進度回報 (Reporting)
+
+engine / simulation 的所有輸出都經過 Reporter，依 "詳細程度" 與 "頻率上限" 決定是否印出：
+- VERBOSITY=2 (預設): 進度條 + 每世代完整的種類表 (原本的輸出)
+- VERBOSITY=1:        每世代一行摘要 + 重要事件 (滅絕、結束)，不顯示進度條
+- VERBOSITY=0:        安靜模式，不印出任何內容，也不建立進度條
+- LOG_INTERVAL:       兩次 "世代輸出" 之間至少間隔的秒數 (0 = 每個世代都印)；
+                      重要事件不受此限制。
+
+進度條只在每個批次 (PROGRESS_BATCH 次互動) 結束時更新一次，
+熱迴圈中不再有逐次互動的進度條開銷。
+"""
+import sys
+import time
+from tqdm import tqdm
+
+QUIET, SUMMARY, DETAIL = 0, 1, 2
+
+# 進度條每隔多少次互動更新一次
+PROGRESS_BATCH = 1 << 14
+
+
+class _NullProgress:
+    """安靜模式 / 不顯示進度條時使用 (介面與 tqdm 相同)"""
+
+    def update(self, n: int = 1):
+        pass
+
+    def close(self):
+        pass
+
+
+class Reporter:
+    """
+    Args:
+        verbosity (int): QUIET / SUMMARY / DETAIL。
+        log_interval (float): 兩次世代輸出之間的最短秒數 (0 = 不限制)。
+        progress_interval (float): 進度條的最短重繪間隔秒數 (tqdm mininterval)。
+    """
+
+    def __init__(self, verbosity: int = DETAIL, log_interval: float = 0.0, progress_interval: float = 0.1):
+        self.verbosity = verbosity
+        self.log_interval = log_interval
+        self.progress_interval = progress_interval
+        # 本世代的輸出是否印出 (由 begin_generation 依頻率上限決定)
+        self.active = True
+        self._last_log = None
+        self._suppressed = 0
+
+    def begin_generation(self) -> bool:
+        """每個世代開始時呼叫；回傳本世代是否輸出"""
+        if self.verbosity == QUIET:
+            self.active = False
+            return False
+        now = time.monotonic()
+        self.active = (self.log_interval <= 0 or self._last_log is None
+                       or now - self._last_log >= self.log_interval)
+        if self.active:
+            self._last_log = now
+        else:
+            self._suppressed += 1
+        return self.active
+
+    def take_suppressed(self) -> int:
+        """自上次輸出以來略過的世代數 (取出後歸零)"""
+        suppressed, self._suppressed = self._suppressed, 0
+        return suppressed
+
+    @property
+    def showing_detail(self) -> bool:
+        """本世代是否輸出完整內容 (其他模組的每世代報表依此決定是否印出)"""
+        return self.active and self.verbosity >= DETAIL
+
+    def detail(self, message: str):
+        """完整輸出 (VERBOSITY=2，受頻率上限限制)"""
+        if self.showing_detail:
+            print(message)
+
+    def summary(self, message: str):
+        """摘要輸出 (VERBOSITY=1 才印，受頻率上限限制)"""
+        if self.active and self.verbosity == SUMMARY:
+            print(message)
+
+    def event(self, message: str):
+        """重要事件 (VERBOSITY>=1，不受頻率上限限制)"""
+        if self.verbosity >= SUMMARY:
+            print(message)
+
+    def progress(self, total: int, desc: str):
+        """
+        建立進度條 (只在 DETAIL 且本世代輸出時顯示)。
+        呼叫端以 update(批次大小) 批次更新。
+        """
+        if not self.showing_detail:
+            return _NullProgress()
+        return tqdm(total=total, desc=desc, leave=False, unit=" 互動",
+                    mininterval=self.progress_interval, file=sys.stderr)
+
+
+# 未指定 reporter 時使用 (與原本的輸出相同)
+DEFAULT_REPORTER = Reporter()
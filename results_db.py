@@ -0,0 +1,320 @@
+"""
+結果資料庫 (SQLite Results Store)
+
+每次模擬的參數與排名都寫入 OUTPUT_DIR/results.sqlite (RESULTS_DB)，
+跨數千次執行的統計 (例如 "5% 雜訊下 Redeemer 的平均名次") 只需要一次有索引的查詢：
+- runs:              每次模擬一列 (常用參數各自一欄並建立索引，完整參數另存 JSON)
+- ranks:             每次模擬 x 每個策略的名次 (依策略建立索引)
+- generations /      TELEMETRY=db 時的每世代紀錄 (世代摘要 + 每個種類的數量與分數)
+  generation_counts
+
+寫入以交易 (transaction) 批次提交；每世代紀錄先放在記憶體，
+每 batch_size 筆或每 flush_seconds 秒才寫入一次，不會拖慢模擬。
+
+執行方式 (於專案根目錄):
+    python -m results_db import [目錄]                         # 一次性匯入既有的 ranking_*.json / replicates_*.json
+    python -m results_db query --strategy Redeemer --where noise=0.05
+    python -m results_db query --by noise --by selection      # 依參數分組的平均名次
+"""
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+# runs 表中 "各自一欄" 的參數 (read_parameters 的 key -> SQLite 型別)
+PARAMETER_COLUMNS = {
+    "initial_copies": "INTEGER",
+    "kill_count": "INTEGER",
+    "rounds_per_game": "INTEGER",
+    "avg_matches_per_strategy": "INTEGER",
+    "stability_threshold": "INTEGER",
+    "noise": "REAL",
+    "selection": "TEXT",
+    "topology": "TEXT",
+    "engine_mode": "TEXT",
+    "early_stop_confidence": "REAL",
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    seed INTEGER,
+    strategy_count INTEGER,
+    {", ".join(f"{name} {kind}" for name, kind in PARAMETER_COLUMNS.items())},
+    parameters TEXT NOT NULL,
+    source TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS runs_by_parameters ON runs (noise, kill_count, rounds_per_game, initial_copies);
+CREATE INDEX IF NOT EXISTS runs_by_engine ON runs (selection, topology, engine_mode);
+CREATE TABLE IF NOT EXISTS ranks (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    strategy TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    version TEXT,
+    PRIMARY KEY (run_id, strategy)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ranks_by_strategy ON ranks (strategy, rank);
+CREATE TABLE IF NOT EXISTS generations (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    generation INTEGER NOT NULL,
+    elapsed REAL,
+    interactions INTEGER,
+    stability_counter INTEGER,
+    extinct TEXT,
+    PRIMARY KEY (run_id, generation)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS generation_counts (
+    run_id INTEGER NOT NULL,
+    generation INTEGER NOT NULL,
+    strategy TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    score_mean REAL,
+    score_min REAL,
+    score_max REAL,
+    PRIMARY KEY (run_id, generation, strategy)
+) WITHOUT ROWID;
+"""
+
+
+class ResultsStore:
+    """SQLite 結果資料庫 (WAL 模式；多個行程可以同時讀取)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    # --- 寫入 ---
+
+    def _insert_run(self, kind: str, status: str, params: dict, seed: int | None,
+                    strategy_count: int | None, started_at: str, source: str | None = None) -> int:
+        columns = ["kind", "status", "started_at", "seed", "strategy_count",
+                   *PARAMETER_COLUMNS, "parameters", "source"]
+        values = [kind, status, started_at, seed, strategy_count,
+                  *(params.get(name) for name in PARAMETER_COLUMNS),
+                  json.dumps(params, ensure_ascii=False, sort_keys=True), source]
+        cursor = self.connection.execute(
+            f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values)
+        return cursor.lastrowid
+
+    def _insert_ranks(self, run_id: int, ranking: list[str], versions: dict[str, str]):
+        self.connection.executemany(
+            "INSERT INTO ranks (run_id, strategy, rank, version) VALUES (?, ?, ?, ?)",
+            [(run_id, name, rank, versions.get(name)) for rank, name in enumerate(ranking, start=1)])
+
+    def begin_run(self, kind: str, params: dict, seed: int | None, strategy_count: int) -> int:
+        """模擬開始時建立 "執行中" 的一列 (每世代紀錄需要 run_id)"""
+        with self.connection:
+            return self._insert_run(kind, "running", params, seed, strategy_count,
+                                    datetime.now().isoformat())
+
+    def finish_run(self, run_id: int, ranking: list[str], versions: dict[str, str] | None = None,
+                   source: str | None = None):
+        """
+        寫入排名並標記為完成。
+        source 為結果 JSON 的檔名 (與 record_runs 相同)，之後匯入同一個檔案時會被略過。
+        """
+        with self.connection:
+            self._insert_ranks(run_id, ranking, versions or {})
+            self.connection.execute(
+                "UPDATE runs SET status = 'finished', finished_at = ?, "
+                "source = CASE WHEN ? IS NULL THEN source ELSE ? || '#' || seed END WHERE id = ?",
+                (datetime.now().isoformat(), source, source, run_id))
+
+    def record_runs(self, kind: str, params: dict, rankings: dict[int, list[str]],
+                    strategy_count: int, versions: dict[str, str] | None = None,
+                    started_at: str | None = None, source: str | None = None) -> list[int]:
+        """
+        一次寫入多個已完成的模擬 ({seed: 排名}，例如副本模式)，全部在同一個交易中。
+        source 相同的資料已存在時略過 (匯入可重複執行)。
+        """
+        started_at = started_at or datetime.now().isoformat()
+        run_ids = []
+        with self.connection:
+            for seed, ranking in rankings.items():
+                run_source = f"{source}#{seed}" if source else None
+                try:
+                    run_id = self._insert_run(kind, "finished", params, seed, strategy_count,
+                                              started_at, run_source)
+                except sqlite3.IntegrityError:
+                    continue  # 已匯入
+                self.connection.execute("UPDATE runs SET finished_at = started_at WHERE id = ?", (run_id,))
+                self._insert_ranks(run_id, ranking, versions or {})
+                run_ids.append(run_id)
+        return run_ids
+
+    def generation_writer(self, run_id: int, batch_size: int = 200,
+                          flush_seconds: float = 2.0) -> "GenerationWriter":
+        return GenerationWriter(self, run_id, batch_size, flush_seconds)
+
+    # --- 查詢 ---
+
+    def rank_summary(self, where: dict[str, str] | None = None, strategy: str | None = None,
+                     by: list[str] | None = None) -> list[dict]:
+        """
+        平均名次統計 (只計入已完成的模擬)。
+
+        Args:
+            where: {參數欄位: 值}，例如 {"noise": "0.05"}。
+            strategy: 只統計此策略。
+            by: 依這些參數欄位分組。
+        """
+        by = by or []
+        for name in [*(where or {}), *by]:
+            if name not in PARAMETER_COLUMNS and name not in ("kind", "seed"):
+                raise ValueError(f"未知的參數欄位: {name} (可用: {', '.join(PARAMETER_COLUMNS)})")
+
+        conditions, values = ["runs.status = 'finished'"], []
+        for name, value in (where or {}).items():
+            conditions.append(f"runs.{name} = ?")
+            values.append(_coerce(name, value))
+        if strategy:
+            conditions.append("ranks.strategy = ?")
+            values.append(strategy)
+
+        group = [f"runs.{name}" for name in by] + ["ranks.strategy"]
+        rows = self.connection.execute(
+            f"SELECT {', '.join(group)}, COUNT(*), AVG(ranks.rank), MIN(ranks.rank), MAX(ranks.rank) "
+            f"FROM ranks JOIN runs ON runs.id = ranks.run_id "
+            f"WHERE {' AND '.join(conditions)} "
+            f"GROUP BY {', '.join(group)} ORDER BY {', '.join(group[:-1] + ['AVG(ranks.rank)'])}",
+            values).fetchall()
+        keys = [*by, "strategy", "runs", "mean_rank", "best_rank", "worst_rank"]
+        return [dict(zip(keys, row)) for row in rows]
+
+
+def _coerce(name: str, value: str):
+    kind = PARAMETER_COLUMNS.get(name, "INTEGER" if name == "seed" else "TEXT")
+    if kind == "INTEGER":
+        return int(value)
+    if kind == "REAL":
+        return float(value)
+    return value
+
+
+class GenerationWriter:
+    """
+    TELEMETRY=db 時的每世代紀錄 (介面與 telemetry.TelemetryWriter 相同)。
+    紀錄先累積在記憶體，每 batch_size 筆或每 flush_seconds 秒以一個交易寫入。
+    """
+
+    def __init__(self, store: ResultsStore, run_id: int, batch_size: int, flush_seconds: float):
+        self.store = store
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending: list[dict] = []
+        self._last_flush = time.monotonic()
+
+    def write(self, record: dict):
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            run_id = self.run_id
+            with self.store.connection:
+                self.store.connection.executemany(
+                    "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?, ?)",
+                    [(run_id, r["generation"], r["elapsed"], r["interactions"], r["stability_counter"],
+                      json.dumps(r["extinct"], ensure_ascii=False)) for r in self._pending])
+                self.store.connection.executemany(
+                    "INSERT OR REPLACE INTO generation_counts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, r["generation"], name, count, *r["scores"].get(name, (None, None, None)))
+                     for r in self._pending for name, count in r["counts"].items()])
+            self._pending.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+
+# --- 一次性匯入 ---
+
+def import_json_results(store: ResultsStore, directory: str) -> tuple[int, int]:
+    """匯入 directory 中的 ranking_*.json / replicates_*.json，回傳 (檔案數, 新增的模擬數)"""
+    files = sorted(glob.glob(os.path.join(directory, "ranking_*.json"))
+                   + glob.glob(os.path.join(directory, "replicates_*.json")))
+    imported = 0
+    for path in files:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Import] 略過無法讀取的檔案 {path}: {e}")
+            continue
+
+        params = data.get("parameters", {})
+        started_at = data.get("timestamp_iso") or datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+        versions = params.get("strategy_versions") or {}
+        strategy_count = params.get("strategy_count")
+        if "rankings" in data:
+            rankings = {entry.get("seed"): entry["ranking"] for entry in data["rankings"]}
+            kind = "replicate"
+        else:
+            rankings = {params.get("seed"): data["ranking"]}
+            kind = "single"
+        imported += len(store.record_runs(kind, params, rankings, strategy_count, versions,
+                                          started_at=started_at, source=os.path.basename(path)))
+    return len(files), imported
+
+
+def main(argv: list[str] | None = None) -> int:
+    default_path = os.getenv("RESULTS_DB") or os.path.join(os.getenv("OUTPUT_DIR", "/app/output"), "results.sqlite")
+    parser = argparse.ArgumentParser(description="結果資料庫: 匯入既有結果 / 查詢平均名次")
+    parser.add_argument("--db", default=default_path, help=f"資料庫路徑 (預設 {default_path})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="匯入既有的 ranking_*.json / replicates_*.json")
+    import_parser.add_argument("directory", nargs="?", default=os.getenv("OUTPUT_DIR", "/app/output"))
+
+    query_parser = commands.add_parser("query", help="平均名次統計")
+    query_parser.add_argument("--strategy", help="只統計此策略")
+    query_parser.add_argument("--where", action="append", default=[], help="參數條件 欄位=值，例如 noise=0.05 (可重複)")
+    query_parser.add_argument("--by", action="append", default=[], help="依參數欄位分組 (可重複)")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.db)
+    try:
+        if args.command == "import":
+            files, runs = import_json_results(store, args.directory)
+            print(f"[Import] {files} 個檔案，新增 {runs} 次模擬 -> {args.db}")
+            return 0
+
+        where = {}
+        for item in args.where:
+            name, _, value = item.partition("=")
+            where[name.strip()] = value.strip()
+        rows = store.rank_summary(where, args.strategy, args.by)
+        if not rows:
+            print("(沒有符合條件的結果)")
+            return 0
+        group_width = max(len(" ".join(str(row[name]) for name in args.by)) for row in rows) if args.by else 0
+        for row in rows:
+            group = " ".join(str(row[name]) for name in args.by)
+            prefix = f"{group:<{group_width}}  " if args.by else ""
+            print(f"{prefix}{row['strategy']:<20} 平均名次 {row['mean_rank']:>6.2f} "
+                  f"(最佳 {row['best_rank']}, 最差 {row['worst_rank']}, {row['runs']} 次)")
+        return 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
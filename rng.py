@@ -0,0 +1,193 @@
+import numpy as np
+
+
+class _Block:
+    """
+    一個預抽區塊: 值的 list + 下一個要取出的位置 (整數游標) + 區塊產生前的 generator 狀態。
+    checkpoint 只需要 (state, position) 就能重建同一個區塊並從同一個位置繼續。
+    """
+
+    __slots__ = ("values", "position", "state")
+
+    def __init__(self, values: list = (), state: dict | None = None, position: int = 0):
+        self.values = values
+        self.position = position
+        self.state = state
+
+    @property
+    def remaining(self) -> bool:
+        return self.position < len(self.values)
+
+
+class SimulationRNG:
+    """
+    模擬專用的亂數來源 (Simulation-scoped RNG)
+
+    取代散落各處的全域 random 模組：
+    - 每次模擬一個實例，可用 seed 重現 (同 seed -> 同排名)。
+    - 亂數以 "區塊 (block)" 為單位由 NumPy 一次產生，再以整數游標逐一提供
+      (游標超出區塊時以 IndexError 觸發重新產生，熱路徑上沒有額外的長度比較)，
+      避免每次互動都呼叫 random.sample / random.random 的開銷。
+
+    提供給 engine 與策略 (strategy.rng) 使用的介面：
+    - random():      [0, 1) 均勻亂數
+    - chance(p):     以機率 p 回傳 True (雜訊 / 手滑 / 慷慨...)
+    - pair(n):       從 0..n-1 中抽出 "不重複" 的兩個索引
+                     (傳入 graph 時改為均勻抽一條邊，見 topology.py)
+    - generator:     底層的 numpy.random.Generator (供向量化引擎批次使用)
+
+    get_state() / from_state() 以 "區塊產生前的 generator 狀態 + 游標位置"
+    描述預抽區塊 (而不是區塊本身)，讓 checkpoint 只需要幾百 bytes。
+    """
+
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, seed: int | None = None):
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (1 << 63))
+        self.seed = seed
+        self.generator = np.random.default_rng(seed)
+
+        self._uniforms = _Block()
+        self._pairs = _Block()
+        self._pair_n = None
+        self._pair_graph = None
+        self._chances: dict[float, _Block] = {}
+
+    # --- 單一亂數 (由區塊提供) ---
+
+    def random(self) -> float:
+        block = self._uniforms
+        i = block.position
+        block.position = i + 1
+        try:
+            return block.values[i]
+        except IndexError:
+            pass
+        self._uniforms = block = self._uniform_block(self.generator)
+        block.position = 1
+        return block.values[0]
+
+    def chance(self, p: float) -> bool:
+        """
+        以機率 p 回傳 True。
+
+        每個不同的 p 有自己預先抽好的 bool 區塊 (雜訊率通常是固定的幾個值)。
+        """
+        block = self._chances.get(p)
+        if block is not None:
+            i = block.position
+            block.position = i + 1
+            try:
+                return block.values[i]
+            except IndexError:
+                pass
+        if p <= 0:
+            return False
+
+        self._chances[p] = block = self._chance_block(self.generator, p)
+        block.position = 1
+        return block.values[0]
+
+    def pair(self, n: int, graph=None) -> tuple[int, int]:
+        """
+        從 0..n-1 中抽出不重複的 (i, j)，等同 random.sample(range(n), 2)。
+
+        傳入 graph (topology.Graph) 時，(i, j) 是均勻抽出的一條邊的兩端。
+        """
+        if n == self._pair_n and graph is self._pair_graph:
+            block = self._pairs
+            i = block.position
+            block.position = i + 1
+            try:
+                return block.values[i]
+            except IndexError:
+                pass
+
+        self._pairs = block = self._pair_block(self.generator, n, graph)
+        self._pair_n = n
+        self._pair_graph = graph
+        block.position = 1
+        return block.values[0]
+
+    # --- 區塊產生 (記錄產生前的 generator 狀態) ---
+
+    def _uniform_block(self, generator: np.random.Generator) -> _Block:
+        state = generator.bit_generator.state
+        return _Block(generator.random(self.BLOCK_SIZE).tolist(), state)
+
+    def _chance_block(self, generator: np.random.Generator, p: float) -> _Block:
+        state = generator.bit_generator.state
+        return _Block((generator.random(self.BLOCK_SIZE) < p).tolist(), state)
+
+    def _pair_block(self, generator: np.random.Generator, n: int, graph=None) -> _Block:
+        state = generator.bit_generator.state
+        if graph is not None:
+            return _Block(list(graph.pair_block(generator, self.BLOCK_SIZE)), state)
+        first = generator.integers(0, n, self.BLOCK_SIZE)
+        second = generator.integers(0, n - 1, self.BLOCK_SIZE)
+        second += second >= first  # 跳過 first，使兩者不重複
+        return _Block(list(zip(first.tolist(), second.tolist())), state)
+
+    # --- Checkpoint (可序列化為 JSON 的狀態) ---
+
+    @staticmethod
+    def _generator_at(state: dict) -> np.random.Generator:
+        generator = np.random.default_rng()
+        generator.bit_generator.state = state
+        return generator
+
+    def get_state(self) -> dict:
+        """目前的完整亂數狀態 (還原後會產生完全相同的後續亂數)"""
+        state = {
+            "seed": self.seed,
+            "generator": self.generator.bit_generator.state,
+            "uniforms": None,
+            "pairs": None,
+            "chances": [],
+        }
+        # (已用完的區塊不需保存: 下一次取用時本來就會重新產生)
+        if self._uniforms.remaining:
+            state["uniforms"] = [self._uniforms.state, self._uniforms.position]
+        if self._pairs.remaining:
+            state["pairs"] = [self._pairs.state, self._pairs.position, self._pair_n, self._pair_graph is not None]
+        for p, block in self._chances.items():
+            if block.remaining:
+                state["chances"].append([p, block.state, block.position])
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict, graph=None) -> "SimulationRNG":
+        """
+        由 get_state() 的結果還原 (重新產生預抽區塊，並把游標移到原本的位置)。
+        配對區塊是在圖上抽出的，必須傳入同一張圖 (graph)。
+        """
+        rng = cls(state["seed"])
+        rng.generator.bit_generator.state = state["generator"]
+
+        if state["uniforms"] is not None:
+            block_state, position = state["uniforms"]
+            rng._uniforms = rng._uniform_block(rng._generator_at(block_state))
+            rng._uniforms.position = position
+
+        if state["pairs"] is not None:
+            block_state, position, n, *on_graph = state["pairs"]
+            pair_graph = graph if on_graph and on_graph[0] else None
+            if on_graph and on_graph[0] and graph is None:
+                raise ValueError("此 RNG 狀態的配對區塊來自互動圖，還原時必須傳入 graph")
+            rng._pairs = rng._pair_block(rng._generator_at(block_state), n, pair_graph)
+            rng._pairs.position = position
+            rng._pair_n = n
+            rng._pair_graph = pair_graph
+
+        for p, block_state, position in state["chances"]:
+            rng._chances[p] = rng._chance_block(rng._generator_at(block_state), p)
+            rng._chances[p].position = position
+        return rng
+
+    def __repr__(self) -> str:
+        return f"SimulationRNG(seed={self.seed})"
+
+
+# 沒有指定 RNG 時 (例如單獨建立策略或直接呼叫 engine) 使用的共用實例
+DEFAULT_RNG = SimulationRNG()
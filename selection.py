@@ -0,0 +1,173 @@
+import abc
+import numpy as np
+from rng import SimulationRNG
+
+
+class SelectionOperator(abc.ABC):
+    """
+    選擇運算子 (Selection Operator) 的抽象基底類別
+
+    每個世代的循環賽結束後，由 simulation 呼叫 select()：
+    - 回傳 "被淘汰的個體索引" 與 "被複製的個體索引" (各 kill_count 個)。
+    - 複製的對象從 "淘汰前" 的整個群體中選出 (與原本的截斷選擇相同)。
+
+    所有運算子都是線性時間 (或 O(n + k log n))，不對整個群體排序：
+    fitness 先轉成 NumPy 陣列，再以 argpartition / 累積和 + 二分搜尋 選出 k 個。
+    所有隨機性都來自 rng.generator (同 seed -> 同結果)。
+    """
+
+    name: str = ""
+
+    @abc.abstractmethod
+    def select(self, fitness: np.ndarray, kill_count: int,
+               rng: SimulationRNG) -> tuple[list[int], list[int]]:
+        """
+        Args:
+            fitness (np.ndarray): 每個個體的適應度 (分數，越高越好)。
+            kill_count (int): 淘汰 / 複製的數量。
+        Returns:
+            (淘汰的索引, 複製的索引)
+        """
+        pass
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+def _lowest(fitness: np.ndarray, k: int) -> np.ndarray:
+    """適應度最低的 k 個索引 (由低到高)，O(n + k log k)"""
+    if k >= len(fitness):
+        return np.argsort(fitness, kind="stable")
+    candidates = np.argpartition(fitness, k - 1)[:k]
+    return candidates[np.argsort(fitness[candidates], kind="stable")]
+
+
+def _highest(fitness: np.ndarray, k: int) -> np.ndarray:
+    """適應度最高的 k 個索引 (由高到低)，O(n + k log k)"""
+    return _lowest(-fitness, k)
+
+
+def _roulette(weights: np.ndarray, k: int, generator: np.random.Generator,
+              universal: bool = False) -> np.ndarray:
+    """
+    依權重抽出 k 個索引 (可重複)：累積和 + 二分搜尋，O(n + k log n)。
+    universal=True 時使用 "隨機普遍抽樣" (SUS)：k 個等距指標只需一個亂數。
+    """
+    cumulative = np.cumsum(weights, dtype=np.float64)
+    total = cumulative[-1]
+    if total <= 0:
+        return generator.integers(0, len(weights), k)
+    if universal:
+        points = (generator.random() + np.arange(k)) * (total / k)
+    else:
+        points = generator.random(k) * total
+    return np.minimum(np.searchsorted(cumulative, points, side="right"), len(weights) - 1)
+
+
+class TruncationSelection(SelectionOperator):
+    """截斷選擇：淘汰分數最低的 k 個，複製分數最高的 k 個 (原本的規則)"""
+
+    name = "truncation"
+
+    def select(self, fitness, kill_count, rng):
+        return _lowest(fitness, kill_count).tolist(), _highest(fitness, kill_count).tolist()
+
+
+class TournamentSelection(SelectionOperator):
+    """
+    k-錦標賽選擇
+
+    - 淘汰: 每次隨機抽 size 個 (尚未被淘汰的) 個體，其中分數 "最低" 者被淘汰。
+    - 複製: 每次隨機抽 size 個個體，其中分數 "最高" 者被複製。
+    """
+
+    name = "tournament"
+
+    def __init__(self, size: int = 3):
+        if size < 1:
+            raise ValueError(f"錦標賽大小必須 >= 1: {size}")
+        self.size = size
+        self.name = f"tournament:{size}"
+
+    def select(self, fitness, kill_count, rng):
+        generator = rng.generator
+        n = len(fitness)
+        culled: list[int] = []
+        culled_set: set[int] = set()
+        while len(culled) < min(kill_count, n):
+            entrants = [i for i in generator.integers(0, n, self.size).tolist() if i not in culled_set]
+            if not entrants:
+                continue
+            loser = min(entrants, key=fitness.__getitem__)
+            culled.append(loser)
+            culled_set.add(loser)
+
+        entrants = generator.integers(0, n, (kill_count, self.size))
+        winners = entrants[np.arange(kill_count), np.argmax(fitness[entrants], axis=1)]
+        return culled, winners.tolist()
+
+
+class ProportionalSelection(SelectionOperator):
+    """
+    適應度比例選擇 (Roulette / SUS)
+
+    - 複製: 以 "隨機普遍抽樣" (SUS) 依分數比例選出 k 個。
+    - 淘汰: 依 "與最高分的差距" 為權重，不重複地抽出 k 個 (分數越低越容易被淘汰)。
+    """
+
+    name = "proportional"
+
+    def select(self, fitness, kill_count, rng):
+        generator = rng.generator
+        weights = fitness - min(fitness.min(), 0)
+        parents = _roulette(weights, kill_count, generator, universal=True)
+
+        unfitness = fitness.max() - fitness
+        total = unfitness.sum()
+        p = unfitness / total if total > 0 else None
+        kill = min(kill_count, len(fitness))
+        if p is not None and np.count_nonzero(p) < kill:
+            p = None  # 差距不足以抽出 k 個 (幾乎同分): 改為均勻抽樣
+        culled = generator.choice(len(fitness), kill, replace=False, p=p)
+        return culled.tolist(), parents.tolist()
+
+
+class MoranSelection(SelectionOperator):
+    """
+    Moran 過程 (birth-death)
+
+    k 次 "誕生 / 死亡" 事件：誕生者依分數比例 (輪盤) 選出，
+    死亡者從群體中均勻隨機選出 (與分數無關)。
+    """
+
+    name = "moran"
+
+    def select(self, fitness, kill_count, rng):
+        generator = rng.generator
+        weights = fitness - min(fitness.min(), 0)
+        parents = _roulette(weights, kill_count, generator)
+        culled = generator.choice(len(fitness), min(kill_count, len(fitness)), replace=False)
+        return culled.tolist(), parents.tolist()
+
+
+SELECTION_OPERATORS = {
+    "truncation": TruncationSelection,
+    "tournament": TournamentSelection,
+    "proportional": ProportionalSelection,
+    "moran": MoranSelection,
+}
+
+
+def make_selection(spec: str) -> SelectionOperator:
+    """
+    由設定字串建立選擇運算子 (SELECTION 環境變數)。
+
+    例: "truncation"、"tournament" (預設大小 3)、"tournament:5"、"proportional"、"moran"
+    """
+    name, _, argument = spec.partition(":")
+    operator_type = SELECTION_OPERATORS.get(name.strip().lower())
+    if operator_type is None:
+        raise ValueError(f"未知的選擇運算子: {spec} (可用: {', '.join(SELECTION_OPERATORS)})")
+    if argument:
+        return operator_type(int(argument))
+    return operator_type()
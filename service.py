@@ -0,0 +1,433 @@
+"""
+本機模擬服務 (Local Job Service)
+
+取代 app.py "同一組環境變數參數，跑完休息 10 秒再跑" 的迴圈 (MODE=service)：
+- 在本機開一個 HTTP 端點，客戶端以 JSON 提交模擬工作 (各自的參數 / seed / 重複次數 / 優先度)。
+- 工作依優先度排隊 (數字大的先跑，同優先度先到先跑)，拆成每個 seed 一個任務，
+  同時最多 WORKERS 個任務；有任務就立刻開始，沒有閒置的休息時間。
+- 每個工作開始時載入策略 (熱重載) 並記錄版本與檔案內容；任務連同這份內容送進 spawn 的 process pool，
+  worker 由內容重建策略類別 (見 StrategyLoader.load_sources)，重載後舊工作的其餘 seed 仍執行原本的程式碼。
+- 客戶端輪詢狀態、取回結果；結果同時寫入 OUTPUT_DIR/jobs/<id>.json、結果資料庫與名次統計。
+
+API (JSON):
+    POST   /jobs               提交: {"parameters": {"NOISE": 0.01, ...}, "seed": 1, "replicates": 4, "priority": 5}
+    GET    /jobs               所有工作的狀態
+    GET    /jobs/<id>          單一工作的狀態
+    GET    /jobs/<id>/result   結果 (尚未完成時回傳 409)
+    DELETE /jobs/<id>          取消 (只有排隊中的任務會被取消)
+    GET    /health             佇列長度與執行中的任務數
+
+parameters 的 key 與 app.py / sweep 相同 (環境變數名稱)，未指定的沿用服務本身的環境變數。
+
+執行方式 (於專案根目錄):
+    python -m service serve                                      # 啟動服務 (或 MODE=service python app.py)
+    python -m service submit --param NOISE=0.01 --replicates 4 --wait
+    python -m service status [<id>]
+    python -m service result <id>
+"""
+import argparse
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import app
+from strategy_loader import get_loader
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8765))
+
+QUEUED, RUNNING, FINISHED, FAILED, CANCELLED = "queued", "running", "finished", "failed", "cancelled"
+
+
+@dataclass
+class Job:
+    id: str
+    parameters: dict[str, str]  # 提交的參數 (環境變數名稱 -> 值)
+    params: dict                # read_parameters 的結果
+    seeds: list[int]
+    priority: int
+    status: str = QUEUED
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: str | None = None
+    finished_at: str | None = None
+    error: str | None = None
+    strategy_types: list[type] = field(default_factory=list)
+    versions: dict[str, str] = field(default_factory=dict)  # 載入 strategy_types 時的策略版本
+    sources: dict[str, bytes] = field(default_factory=dict)  # 同一版本的策略檔內容 (送給 worker)
+    rankings: dict[int, list[str]] = field(default_factory=dict)
+    running: int = 0
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "parameters": self.parameters,
+            "seeds": self.seeds,
+            "completed": len(self.rankings),
+            "replicates": len(self.seeds),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+def _run_task(strategy_names: list[str], sources: dict[str, bytes], params: dict, seed: int) -> list[str]:
+    """
+    (在 pool 的 worker 中執行) 以工作載入時的策略檔內容執行一個 seed。
+    類別由內容在 worker 中重建 (不 pickle 類別，也不讀取可能已被修改的檔案)。
+    """
+    types_by_name = {cls.__name__: cls for cls in get_loader("strategies").load_sources(sources)}
+    return app._run_replicate([types_by_name[name] for name in strategy_names], params, seed)
+
+
+def parse_submission(body: dict) -> tuple[dict[str, str], dict, list[int], int]:
+    """提交內容 -> (參數, read_parameters 結果, seeds, 優先度)；格式錯誤時 ValueError"""
+    parameters = {name: str(value) for name, value in (body.get("parameters") or {}).items()}
+    known = set(app.PARAMETER_ENV.values())
+    unknown = set(parameters) - known
+    if unknown:
+        raise ValueError(f"未知的參數: {', '.join(sorted(unknown))} (可用: {', '.join(sorted(known))})")
+    params = app.read_parameters({**os.environ, **parameters})
+
+    replicates = int(body.get("replicates", 1))
+    if replicates < 1:
+        raise ValueError("replicates 必須 >= 1")
+    base_seed = body.get("seed")
+    base_seed = app.new_seed() if base_seed is None else int(base_seed)
+    return parameters, params, [base_seed + i for i in range(replicates)], int(body.get("priority", 0))
+
+
+class JobService:
+    """
+    工作佇列 + 有界的 process pool
+
+    排程執行緒每次從優先佇列取出一個任務 (工作 x seed)，送進 process pool；
+    同時執行的任務數不超過 workers (其餘留在佇列中，讓晚到的高優先度工作可以插隊)。
+
+    pool 以 spawn 建立 (服務已有 HTTP 與排程執行緒，fork 可能把持有中的鎖複製進子行程)；
+    策略版本由任務攜帶的檔案內容決定，與 worker 何時啟動無關。
+    """
+
+    def __init__(self, output_dir: str, workers: int | None = None):
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.jobs: dict[str, Job] = {}
+        self._queue: list[tuple[int, int, str, int]] = []  # (-優先度, 順序, 工作 id, seed)
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         mp_context=multiprocessing.get_context("spawn"))
+        self._closed = False
+        self._scheduler = threading.Thread(target=self._schedule, name="job-scheduler", daemon=True)
+        self._scheduler.start()
+
+    # --- 客戶端操作 ---
+
+    def submit(self, body: dict) -> Job:
+        parameters, params, seeds, priority = parse_submission(body)
+        job = Job(uuid.uuid4().hex[:12], parameters, params, seeds, priority)
+        with self._lock:
+            self.jobs[job.id] = job
+            for seed in seeds:
+                heapq.heappush(self._queue, (-priority, next(self._order), job.id, seed))
+            self._ready.notify()
+        print(f"[Service] 收到工作 {job.id}: {parameters or '(預設參數)'} x {len(seeds)}, 優先度 {priority}")
+        return job
+
+    def cancel(self, job_id: str) -> Job | None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status in (QUEUED, RUNNING):
+                job.status = CANCELLED
+                job.finished_at = datetime.now().isoformat()
+        return job
+
+    def list_jobs(self) -> list[dict]:
+        with self._lock:
+            return [job.summary() for job in self.jobs.values()]
+
+    def result(self, job_id: str) -> dict | None:
+        """已完成的工作的結果 (服務重啟前的工作從結果檔讀取)"""
+        path = self._result_path(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def health(self) -> dict:
+        with self._lock:
+            running = sum(job.running for job in self.jobs.values())
+            return {"queued_tasks": len(self._queue), "running_tasks": running, "workers": self.workers}
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._ready.notify()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    # --- 排程 ---
+
+    def _schedule(self):
+        while True:
+            self._slots.acquire()  # 等待空出的 worker
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._ready.wait()
+                if self._closed:
+                    return
+                _, _, job_id, seed = heapq.heappop(self._queue)
+                job = self.jobs[job_id]
+                if job.status not in (QUEUED, RUNNING):
+                    self._slots.release()  # 已取消 / 失敗的工作: 丟棄剩下的任務
+                    continue
+                if job.status == QUEUED:
+                    job.status = RUNNING
+                    job.started_at = datetime.now().isoformat()
+                job.running += 1
+
+            if not job.strategy_types:
+                # 工作開始時才載入策略 (沿用熱重載)，同一個工作的所有 seed 使用同一組策略
+                job.strategy_types = app.load_strategies_or_none() or []
+                job.versions = app.strategy_versions()
+                job.sources = get_loader("strategies").sources()
+                if not job.strategy_types:
+                    with self._lock:
+                        job.running -= 1
+                        job.status, job.error = FAILED, "找不到任何策略"
+                        job.finished_at = datetime.now().isoformat()
+                    self._slots.release()
+                    continue
+            future = self._pool.submit(
+                _run_task, [t.__name__ for t in job.strategy_types], job.sources, job.params, seed)
+            future.add_done_callback(lambda f, job=job, seed=seed: self._task_done(job, seed, f))
+
+    def _task_done(self, job: Job, seed: int, future):
+        self._slots.release()
+        with self._lock:
+            job.running -= 1
+            if job.status != RUNNING:
+                return
+            error = future.exception()
+            if error is not None:
+                job.status, job.error = FAILED, f"{type(error).__name__}: {error}"
+                job.finished_at = datetime.now().isoformat()
+                print(f"[Service] 工作 {job.id} 失敗: {job.error}")
+                return
+            job.rankings[seed] = future.result()
+            if len(job.rankings) < len(job.seeds):
+                return
+        self._finish(job)
+
+    def _finish(self, job: Job):
+        """所有 seed 完成: 寫入結果檔與結果資料庫 (策略版本為工作載入策略時的版本)"""
+        versions = job.versions
+        strategy_names = [t.__name__ for t in job.strategy_types]
+        result = {
+            "job": job.id,
+            "timestamp_iso": datetime.now().isoformat(),
+            "parameters": {
+                **job.params,
+                "seed": job.seeds[0],
+                "replicates": len(job.seeds),
+                "strategy_count": len(job.strategy_types),
+                "strategies_loaded": strategy_names,
+                "strategy_versions": versions,
+            },
+            "submitted": job.parameters,
+        }
+        if len(job.seeds) == 1:
+            result["ranking"] = job.rankings[job.seeds[0]]
+        else:
+            result["summary"] = app.aggregate_rankings(
+                [job.rankings[seed] for seed in job.seeds], strategy_names)
+            result["rankings"] = [{"seed": seed, "ranking": job.rankings[seed]} for seed in job.seeds]
+
+        path = self._result_path(job.id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+        app.record_rankings(job.params, versions, [job.rankings[seed] for seed in job.seeds], app.RANK_STATS_DIR)
+        store = app.open_results_store()
+        if store is not None:
+            store.record_runs("job", job.params, {seed: job.rankings[seed] for seed in job.seeds},
+                              len(job.strategy_types), versions, started_at=job.started_at,
+                              source=f"jobs/{job.id}.json")
+            store.close()
+
+        with self._lock:
+            job.status = FINISHED
+            job.finished_at = datetime.now().isoformat()
+        print(f"[Service] 工作 {job.id} 完成 -> {path}")
+
+    def _result_path(self, job_id: str) -> str:
+        return os.path.join(self.output_dir, "jobs", f"{os.path.basename(job_id)}.json")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: JobService
+
+    def _send(self, status: int, body):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self) -> list[str]:
+        return [part for part in self.path.split("?")[0].split("/") if part]
+
+    def do_GET(self):
+        route = self._route()
+        if route == ["health"]:
+            return self._send(200, self.service.health())
+        if route == ["jobs"]:
+            return self._send(200, self.service.list_jobs())
+        if len(route) in (2, 3) and route[0] == "jobs":
+            job = self.service.jobs.get(route[1])
+            if len(route) == 2:
+                if job is None:
+                    return self._send(404, {"error": f"找不到工作 {route[1]}"})
+                return self._send(200, job.summary())
+            if route[2] == "result":
+                result = self.service.result(route[1])
+                if result is not None:
+                    return self._send(200, result)
+                if job is None:
+                    return self._send(404, {"error": f"找不到工作 {route[1]}"})
+                return self._send(409, {"error": f"工作尚未完成 ({job.status})", "status": job.status})
+        self._send(404, {"error": f"未知的路徑: {self.path}"})
+
+    def do_POST(self):
+        if self._route() != ["jobs"]:
+            return self._send(404, {"error": f"未知的路徑: {self.path}"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            job = self.service.submit(body)
+        except (ValueError, TypeError, AttributeError) as e:
+            return self._send(400, {"error": str(e)})
+        self._send(201, job.summary())
+
+    def do_DELETE(self):
+        route = self._route()
+        if len(route) != 2 or route[0] != "jobs":
+            return self._send(404, {"error": f"未知的路徑: {self.path}"})
+        job = self.service.cancel(route[1])
+        if job is None:
+            return self._send(404, {"error": f"找不到工作 {route[1]}"})
+        self._send(200, job.summary())
+
+    def log_message(self, format, *args):
+        pass  # 不逐筆印出 HTTP 請求
+
+
+def serve(host: str = SERVICE_HOST, port: int = SERVICE_PORT, workers: int | None = None,
+          output_dir: str = app.OUTPUT_DIR):
+    """啟動服務 (直到 Ctrl+C)"""
+    service = JobService(output_dir, workers)
+    handler = type("Handler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"--- 模擬服務: http://{host}:{port} ({service.workers} 個 worker，結果寫入 {output_dir}/jobs) ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[服務] 偵測到手動停止 (KeyboardInterrupt)。正在關閉...")
+    finally:
+        server.server_close()
+        service.close()
+
+
+# --- 客戶端 ---
+
+def _request(url: str, method: str = "GET", body: dict | None = None):
+    data = None if body is None else json.dumps(body).encode()
+    request = urllib.request.Request(url, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def main(argv: list[str] | None = None) -> int:
+    default_url = os.getenv("SERVICE_URL", f"http://127.0.0.1:{SERVICE_PORT}")
+    parser = argparse.ArgumentParser(description="本機模擬服務 / 客戶端")
+    parser.add_argument("--url", default=default_url, help=f"服務位址 (預設 {default_url})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="啟動服務")
+    serve_parser.add_argument("--host", default=SERVICE_HOST)
+    serve_parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    serve_parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", 0)) or None)
+
+    submit_parser = commands.add_parser("submit", help="提交工作")
+    submit_parser.add_argument("--param", action="append", default=[], help="參數 NAME=VALUE (可重複)")
+    submit_parser.add_argument("--seed", type=int)
+    submit_parser.add_argument("--replicates", type=int, default=1)
+    submit_parser.add_argument("--priority", type=int, default=0, help="數字大的先執行")
+    submit_parser.add_argument("--wait", action="store_true", help="等待完成並印出結果")
+
+    status_parser = commands.add_parser("status", help="工作狀態")
+    status_parser.add_argument("job", nargs="?")
+    result_parser = commands.add_parser("result", help="工作結果")
+    result_parser.add_argument("job")
+    cancel_parser = commands.add_parser("cancel", help="取消工作")
+    cancel_parser.add_argument("job")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        serve(args.host, args.port, args.workers)
+        return 0
+
+    url = args.url.rstrip("/")
+    if args.command == "submit":
+        parameters = dict(item.split("=", 1) for item in args.param)
+        body = {"parameters": parameters, "replicates": args.replicates, "priority": args.priority}
+        if args.seed is not None:
+            body["seed"] = args.seed
+        status, reply = _request(f"{url}/jobs", "POST", body)
+        if status != 201 or not args.wait:
+            print(json.dumps(reply, indent=2, ensure_ascii=False))
+            return 0 if status == 201 else 1
+        job_id = reply["id"]
+        while reply["status"] in (QUEUED, RUNNING):
+            time.sleep(1)
+            status, reply = _request(f"{url}/jobs/{job_id}")
+        if reply["status"] != FINISHED:
+            print(json.dumps(reply, indent=2, ensure_ascii=False))
+            return 1
+        args.job = job_id
+        args.command = "result"
+
+    if args.command == "status":
+        status, reply = _request(f"{url}/jobs" + (f"/{args.job}" if args.job else ""))
+    elif args.command == "result":
+        status, reply = _request(f"{url}/jobs/{args.job}/result")
+    else:
+        status, reply = _request(f"{url}/jobs/{args.job}", "DELETE")
+    print(json.dumps(reply, indent=2, ensure_ascii=False))
+    return 0 if status == 200 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,38 @@
 import collections
+import functools
+import time
+import numpy as np
 import engine
+from agent_ids import AgentIdPool
+from checkpoint import Checkpointer
+from early_stopping import EarlyStopping
+from history import spill_stats
+from interaction_trace import TraceWriter
+from profiling import StrategyProfiler
+from reporting import DEFAULT_REPORTER, Reporter
+from telemetry import TelemetryWriter
+from rng import SimulationRNG
+from selection import make_selection
+from topology import make_topology
 from strategies.base_strategy import BaseStrategy
 
 
-def _get_final_ranking(final_counts: collections.Counter, extinction_order: list[str], stable: bool) -> list[str]:
+def _get_final_ranking(final_counts: collections.Counter, extinction_order: list[str], stable: bool,
+                       mean_scores: dict[str, float] | None = None) -> list[str]:
     """
     根據最終狀態產生排名。
     規則:
     1. 存活者優先於滅絕者。
-    2. (穩定狀態) 存活者之間，依數量排名。
+    2. (穩定狀態) 存活者之間，依數量排名；數量相同時依 mean_scores (種類的平均分數) 排名。
     3. 滅絕者之間，依滅絕順序反向排名 (最先滅絕 = 最後一名)。
     """
     survivors = []
+    mean_scores = mean_scores or {}
 
     if stable:
-        # 穩定狀態下，依數量排序存活者
+        # 穩定狀態下，依數量排序存活者 (同數量時平均分數高者在前)
         sorted_survivors = sorted(
-            final_counts.items(), key=lambda item: item[1], reverse=True)
+            final_counts.items(), key=lambda item: (item[1], mean_scores.get(item[0], 0.0)), reverse=True)
         survivors = [name for name, count in sorted_survivors]
     else:
         # 非穩定狀態 (例如只剩一個贏家)，直接列出
@@ -27,6 +43,41 @@ def _get_final_ranking(final_counts: collections.Counter, extinction_order: list
     return final_ranking_list
 
 
+def _mean_fitness_by_type(scored_population: list[BaseStrategy], fitness: np.ndarray) -> dict[str, float]:
+    """本世代每個種類的平均適應度 (排名中同數量存活者的次要排序)"""
+    totals: dict[str, float] = collections.defaultdict(float)
+    counts: collections.Counter = collections.Counter()
+    for strategy, value in zip(scored_population, fitness.tolist()):
+        name = type(strategy).__name__
+        totals[name] += value
+        counts[name] += 1
+    return {name: totals[name] / counts[name] for name in counts}
+
+
+def _generation_record(generation: int, scored_population: list[BaseStrategy], current_counts: collections.Counter,
+                       extinct: list[str], stability_counter: int, interactions: int,
+                       elapsed: float, generation_seconds: float) -> dict:
+    """
+    一個世代的遙測紀錄 (見 telemetry.py)。
+    分數取自 "淘汰前" 的循環賽結果，數量則是 "演化後" 的群體。
+    """
+    scores_by_type: dict[str, list[int]] = collections.defaultdict(list)
+    for strategy in scored_population:
+        scores_by_type[type(strategy).__name__].append(strategy.total_score)
+
+    return {
+        "generation": generation,
+        "elapsed": elapsed,
+        "generation_seconds": generation_seconds,
+        "interactions": interactions,
+        "stability_counter": stability_counter,
+        "counts": dict(current_counts),
+        "scores": {name: [sum(scores) / len(scores), min(scores), max(scores)]
+                   for name, scores in scores_by_type.items()},
+        "extinct": extinct,
+    }
+
+
 def run_evolution_simulation(
     strategy_types: list[type],  # <-- 傳入的是 "類別" (e.g., TitForTat)
     initial_copies: int,         # e.g., 10
@@ -34,61 +85,206 @@ def run_evolution_simulation(
     rounds_per_game: int,
     avg_matches_per_strategy: int,
     noise: float,
-    stability_threshold: int     # e.g., 100
+    stability_threshold: int,    # e.g., 100
+    selection: str = "truncation",  # 選擇運算子 (見 selection.make_selection)
+    topology: str = "",          # 互動結構 (見 topology.make_topology，空字串 = 充分混合)
+    engine_mode: str = "python",  # "python"、"vectorized" (NumPy 查表引擎)，或快速模式 "replicator" / "moran"
+    seed: int | None = None,     # 相同 seed -> 相同排名 (None 則隨機)
+    profiler: StrategyProfiler | None = None,  # 每世代的策略耗時統計 (None = 不量測)
+    early_stop_confidence: float = 0.0,  # 淘汰 / 複製名單確定後提前結束循環賽 (0 = 關閉)
+    checkpointer: Checkpointer | None = None,  # 定期存檔; 已 load() 到狀態時從該世代接續
+    telemetry: TelemetryWriter | None = None,  # 每世代追加一筆遙測紀錄 (None = 不記錄)
+    trace: TraceWriter | None = None,  # 逐次互動追蹤 (只記錄 trace.wants() 的世代；None = 不記錄)
+    reporter: Reporter = DEFAULT_REPORTER  # 日誌詳細程度與頻率上限 (見 reporting.py)
 ):
     """
     執行一個完整的演化模擬。
     """
-    print("--- 🚀 開始演化模擬 ---")
-    print(f"設定: {len(strategy_types)} 種策略, 每種 {initial_copies} 個體")
-    print(f"淘汰/補位: {kill_count}")
-    print(f"場均: {avg_matches_per_strategy}")
-    print(f"回合/場: {rounds_per_game}")
-    print(f"雜訊: {noise*100:.1f}%")
-    print(f"穩定閾值: {stability_threshold} 世代")
-    print("---------------------------------")
-
-    # --- 1. 初始化群體 (Initialize Population) ---
-    # 建立一個包含 N * 10 = 70 個 "個體 (instances)" 的列表
-    population: list[BaseStrategy] = []
-    for s_type in strategy_types:
-        for _ in range(initial_copies):
-            population.append(s_type())
-
-    generation = 0
-    stability_counter = 0
-
-    # --- 2. 在迴圈外, 先印出 "初始狀態" (世代 0) ---
-    current_counts = collections.Counter(type(s).__name__ for s in population)
-    current_surviving_types_set = set(current_counts.keys())
-
-    print("\n--- 世代 0 (初始狀態) ---")
-    print(f"存活: {len(current_surviving_types_set)} 種")
-    for name, count in current_counts.most_common():
-        print(f"  - {name:<20}: {count} 個體")
-
-    last_surviving_types_set = current_surviving_types_set
-    extinction_order: list[str] = []
+    resume_state = checkpointer.resume_state if checkpointer is not None else None
+
+    # 整個模擬共用一個 RNG (配對、雜訊、策略的機率行為)
+    # 個體 ID 配發器 (密集小整數，被淘汰個體的 ID 會回收給新複製的個體)
+    # 互動圖由 seed 決定 (接續時以同一個 seed 重建)，節點數 = 群體大小
+    population_size = len(strategy_types) * initial_copies
+    if resume_state is not None:
+        graph = make_topology(topology, population_size, resume_state["rng"]["seed"])
+        rng = SimulationRNG.from_state(resume_state["rng"], graph=graph)
+        agent_ids = AgentIdPool.from_state(resume_state["agent_ids"])
+    else:
+        rng = SimulationRNG(seed)
+        graph = make_topology(topology, population_size, rng.seed)
+        agent_ids = AgentIdPool()
+
+    reporter.event("--- 🚀 開始演化模擬 ---")
+    reporter.event(f"設定: {len(strategy_types)} 種策略, 每種 {initial_copies} 個體")
+    reporter.event(f"淘汰/補位: {kill_count}")
+    reporter.event(f"選擇: {selection}")
+    reporter.event(f"場均: {avg_matches_per_strategy}")
+    reporter.event(f"回合/場: {rounds_per_game}")
+    reporter.event(f"雜訊: {noise*100:.1f}%")
+    reporter.event(f"穩定閾值: {stability_threshold} 世代")
+    reporter.event(f"引擎: {engine_mode}")
+    if graph is not None:
+        reporter.event(f"互動結構: {topology} ({graph.node_count} 節點, {graph.edge_count} 條邊)")
+    if early_stop_confidence > 0:
+        reporter.event(f"提前停止: 信心水準 {early_stop_confidence:.1%}")
+    reporter.event(f"Seed: {rng.seed}")
+    reporter.event("---------------------------------")
+
+    # 快速模式: 不模擬個體互動，改在 "種類對種類" 的期望分數矩陣上演化頻率
+    if engine_mode in ("replicator", "moran"):
+        import replicator  # 僅在使用時載入
+        if profiler is not None:
+            reporter.event("[Profiler] 快速模式不執行個體互動，本次不量測。")
+        if graph is not None:
+            reporter.event("[Topology] 快速模式假設群體充分混合，忽略互動結構。")
+        if trace is not None:
+            reporter.event("[Trace] 快速模式不執行個體互動，本次不記錄。")
+        if checkpointer is not None:
+            reporter.event("[Checkpoint] 快速模式不存檔 (整個模擬只需數毫秒)。")
+        if telemetry is not None:
+            reporter.event("[Telemetry] 快速模式不記錄每世代遙測。")
+        return replicator.run_fast_simulation(
+            strategy_types,
+            initial_copies,
+            kill_count,
+            rounds_per_game,
+            noise,
+            stability_threshold,
+            dynamics=engine_mode,
+            rng=rng,
+            reporter=reporter,
+        )
+
+    selector = make_selection(selection)
+
+    # 選擇 "評估" 用的循環賽引擎 (兩者介面相同)
+    if engine_mode == "vectorized" and graph is not None:
+        reporter.event("[Topology] 向量化引擎不支援互動圖，改用逐次互動引擎。")
+        engine_mode = "python"
+    if engine_mode == "vectorized":
+        import vector_engine  # 需要 NumPy，僅在使用時載入
+        run_tournament = vector_engine.run_tournament
+    else:
+        run_tournament = engine.run_tournament
+        if profiler is not None:
+            run_tournament = functools.partial(run_tournament, profiler=profiler)
+
+    if profiler is not None and engine_mode == "vectorized":
+        reporter.event("[Profiler] 向量化引擎不支援策略耗時統計，本次不量測。")
+        profiler = None
+
+    early_stop = None
+    if early_stop_confidence > 0:
+        if engine_mode == "vectorized":
+            reporter.event("[EarlyStop] 向量化引擎不支援提前停止，本次執行完整循環賽。")
+        else:
+            early_stop = EarlyStopping(kill_count, early_stop_confidence)
+            run_tournament = functools.partial(run_tournament, early_stop=early_stop)
+    run_tournament = functools.partial(run_tournament, reporter=reporter)
+    if graph is not None:
+        run_tournament = functools.partial(run_tournament, graph=graph)
+
+    # 逐次互動追蹤: 只有被追蹤的世代使用 traced_tournament
+    traced_tournament = None
+    if trace is not None:
+        if engine_mode == "vectorized":
+            reporter.event("[Trace] 向量化引擎不支援逐次互動追蹤，本次不記錄。")
+        else:
+            traced_tournament = functools.partial(run_tournament, trace=trace)
+
+    if resume_state is not None:
+        # --- 1'. 從 checkpoint 接續 (Resume) ---
+        types_by_name = {t.__name__: t for t in strategy_types}
+        population: list[BaseStrategy] = [
+            types_by_name[name](unique_id) for name, unique_id in resume_state["population"]]
+        generation = resume_state["generation"]
+        stability_counter = resume_state["stability_counter"]
+        last_surviving_types_set = set(resume_state["last_surviving_types"])
+        extinction_order: list[str] = list(resume_state["extinction_order"])
+
+        reporter.event(f"\n--- 世代 {generation} (從 checkpoint 接續) ---")
+        reporter.event(f"存活: {len(last_surviving_types_set)} 種 | 穩定度: {stability_counter}/{stability_threshold}")
+    else:
+        # --- 1. 初始化群體 (Initialize Population) ---
+        # 建立一個包含 N * 10 = 70 個 "個體 (instances)" 的列表
+        population: list[BaseStrategy] = []
+        for s_type in strategy_types:
+            for _ in range(initial_copies):
+                population.append(s_type(agent_ids.acquire()))
+        if graph is not None:
+            # 互動圖上的位置 = 群體中的索引: 隨機擺放，避免同種類聚成一塊
+            population = [population[i] for i in rng.generator.permutation(len(population))]
+
+        generation = 0
+        stability_counter = 0
+
+        # --- 2. 在迴圈外, 先印出 "初始狀態" (世代 0) ---
+        current_counts = collections.Counter(type(s).__name__ for s in population)
+        current_surviving_types_set = set(current_counts.keys())
+
+        reporter.detail("\n--- 世代 0 (初始狀態) ---")
+        reporter.detail(f"存活: {len(current_surviving_types_set)} 種")
+        for name, count in current_counts.most_common():
+            reporter.detail(f"  - {name:<20}: {count} 個體")
+        reporter.summary(f"世代 0 | 存活 {len(current_surviving_types_set)} 種")
+
+        last_surviving_types_set = current_surviving_types_set
+        extinction_order: list[str] = []
+
+    start_time = time.perf_counter()
+    generation_start = start_time
+    interactions_done = 0
+    # 歷史紀錄寫出到磁碟的累計回合數 (設定了記憶體目標時，見 history.configure_spill)
+    spilled_rounds = spill_stats()["spilled_rounds"]
 
     # --- 3. 世代主迴圈 (Main Loop) ---
     while True:
         generation += 1
+        # 本世代的日誌是否輸出 (詳細程度 + 頻率上限)
+        reporter.begin_generation()
 
         # --- 4. 評估 (Evaluation) ---
         # 呼叫 engine.py 為 "所有" 個體 (70個) 進行評分
-        # sorted_population 是依分數排序的 "個體 (instances)" 列表
-        sorted_population = engine.run_tournament(
+        # scored_population 維持原本的順序 (不排序，選擇運算子以線性時間挑選)
+        tournament = run_tournament
+        if traced_tournament is not None and trace.wants(generation):
+            trace.generation = generation
+            tournament = traced_tournament
+        scored_population = tournament(
             population,
             rounds_per_game,
             avg_matches_per_strategy,
-            noise
+            noise,
+            rng,
+            sort=False,
         )
 
         # --- 5. 演化 (Selection/Reproduction) ---
-        population = sorted_population[:-kill_count]
-        top_templates = sorted_population[:kill_count]
-        new_clones = [type(template)() for template in top_templates]
-        population.extend(new_clones)
+        # 提前停止時各個體的互動次數不同，改以 "每次互動的平均分數" 作為適應度
+        if early_stop is not None and early_stop.stopped_early:
+            fitness = np.fromiter((s.total_score / max(len(s.my_history), 1) for s in scored_population),
+                                  dtype=np.float64, count=len(scored_population))
+        else:
+            fitness = np.fromiter((s.total_score for s in scored_population),
+                                  dtype=np.float64, count=len(scored_population))
+        culled_indices, parent_indices = selector.select(fitness, kill_count, rng)
+
+        if graph is not None:
+            # 互動圖: 個體的位置固定，被淘汰的位置由 "分數最高的鄰居" 的種類補位
+            parent_indices = [graph.best_neighbor(i, fitness) for i in culled_indices]
+            population = list(scored_population)
+            for i in culled_indices:
+                agent_ids.release(scored_population[i].unique_id)
+            for i, parent in zip(culled_indices, parent_indices):
+                population[i] = type(scored_population[parent])(agent_ids.acquire())
+        else:
+            culled_set = set(culled_indices)
+            population = [s for i, s in enumerate(scored_population) if i not in culled_set]
+            for i in culled_indices:
+                agent_ids.release(scored_population[i].unique_id)
+            new_clones = [type(scored_population[i])(agent_ids.acquire()) for i in parent_indices]
+            population.extend(new_clones)
 
         # --- 6. 統計與追蹤 (列印 "演化後" 的結果) ---
         current_counts = collections.Counter(
@@ -96,33 +292,71 @@ def run_evolution_simulation(
         # 當前存活的 "種類" set
         current_surviving_types_set = set(current_counts.keys())
 
-        print(f"\n--- 世代 {generation} (演化後) ---")
-        print(
-            f"存活: {len(current_surviving_types_set)} 種 | 穩定度: {stability_counter}/{stability_threshold}")
-        # 依數量排序印出
-        for name, count in current_counts.most_common():
-            print(f"  - {name:<20}: {count} 個體")
+        if reporter.active:
+            skipped = reporter.take_suppressed()
+            skipped_note = f" (略過 {skipped} 世代的輸出)" if skipped else ""
+            reporter.detail(f"\n--- 世代 {generation} (演化後){skipped_note} ---")
+            reporter.detail(
+                f"存活: {len(current_surviving_types_set)} 種 | 穩定度: {stability_counter}/{stability_threshold}")
+            # 依數量排序印出
+            for name, count in current_counts.most_common():
+                reporter.detail(f"  - {name:<20}: {count} 個體")
+            spill = spill_stats()
+            if spill["spilled_rounds"] > spilled_rounds:
+                reporter.detail(
+                    f"[History] 本世代寫出 {spill['spilled_rounds'] - spilled_rounds} 回合到磁碟 "
+                    f"(累計 {spill['spilled_bytes'] / 2**20:.1f} MiB，常駐 {spill['resident_bytes'] / 2**20:.1f} MiB，"
+                    f"{spill['histories']} 份歷史的下限 {spill['floor_bytes'] / 2**20:.1f} MiB)")
+                spilled_rounds = spill["spilled_rounds"]
+            leader, leader_count = current_counts.most_common(1)[0]
+            reporter.summary(
+                f"世代 {generation} | 存活 {len(current_surviving_types_set)} 種 | "
+                f"穩定度 {stability_counter}/{stability_threshold} | 最多: {leader} ({leader_count}){skipped_note}")
+
+        if profiler is not None:
+            profiler.end_generation(generation, verbose=reporter.showing_detail)
+        if early_stop is not None:
+            early_stop.end_generation(generation, verbose=reporter.showing_detail)
 
         # --- 7. 檢查滅絕 ---
         just_extinct = last_surviving_types_set - current_surviving_types_set
         if just_extinct:
-            for name in just_extinct:
+            # (排序，讓同一世代多個滅絕事件的順序可重現)
+            for name in sorted(just_extinct):
                 extinction_order.append(name)
-                print(f"!!! 💀 滅絕事件: {name} 已被淘汰 !!!")
+                reporter.event(f"!!! 💀 滅絕事件 (世代 {generation}): {name} 已被淘汰 !!!")
+
+        # --- 7'. 遙測紀錄 (交給背景執行緒寫入，不會阻塞) ---
+        now = time.perf_counter()
+        if telemetry is not None:
+            # 引擎實際執行的互動次數 (向量化引擎不寫入查表式個體的 my_history，不能由歷史長度推算)
+            if early_stop is not None:
+                interactions_done += early_stop.interactions_run
+            else:
+                interactions_done += engine.interaction_count(
+                    len(scored_population), rounds_per_game, avg_matches_per_strategy)
+            telemetry.write(_generation_record(
+                generation, scored_population, current_counts, sorted(just_extinct),
+                stability_counter, interactions_done, now - start_time, now - generation_start))
+        generation_start = now
 
         # --- 8. 檢查終止條件 ---
         if stability_counter >= stability_threshold:
-            print("\n" + "="*40)
-            print(f"🏁 模擬結束：生態系已達穩定狀態 (連續 {stability_threshold} 世代)")
-            print("="*40)
-            return _get_final_ranking(current_counts, extinction_order, stable=True)
+            reporter.event("\n" + "="*40)
+            reporter.event(f"🏁 模擬結束：生態系已達穩定狀態 (連續 {stability_threshold} 世代)")
+            reporter.event("="*40)
+            final_ranking = _get_final_ranking(current_counts, extinction_order, stable=True,
+                                               mean_scores=_mean_fitness_by_type(scored_population, fitness))
+            break
 
         # 條件 2: 只剩一個贏家 (或全滅)
         if len(current_surviving_types_set) <= 1:
-            print("\n" + "="*40)
-            print("🏁 模擬結束：已產生最終勝利者")
-            print("="*40)
-            return _get_final_ranking(current_counts, extinction_order, stable=False)
+            reporter.event("\n" + "="*40)
+            reporter.event("🏁 模擬結束：已產生最終勝利者")
+            reporter.event("="*40)
+            final_ranking = _get_final_ranking(current_counts, extinction_order, stable=False,
+                                               mean_scores=_mean_fitness_by_type(scored_population, fitness))
+            break
 
         # --- 9. 【關鍵】更新穩定度計數器 ---
         #    (移到迴圈的 "最後", 在檢查完終止條件 "之後")
@@ -131,3 +365,19 @@ def run_evolution_simulation(
         else:
             stability_counter = 0
             last_surviving_types_set = current_surviving_types_set
+
+        # --- 10. 定期存檔 (Checkpoint) ---
+        if checkpointer is not None:
+            checkpointer.maybe_save(generation, lambda: {
+                "population": [[type(s).__name__, s.unique_id] for s in population],
+                "agent_ids": agent_ids.get_state(),
+                "stability_counter": stability_counter,
+                "last_surviving_types": sorted(last_surviving_types_set),
+                "extinction_order": extinction_order,
+                "rng": rng.get_state(),
+            })
+
+    # 模擬已完成，不需要再接續
+    if checkpointer is not None:
+        checkpointer.clear()
+    return final_ranking
@@ -1,12 +1,14 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class AlwaysCheat(BaseStrategy):
+class AlwaysCheat(StatisticsOnlyStrategy):
     """永遠欺騙"""
 
+    TABLE_RULE = "always_cheat"  # 可由向量化引擎查表執行
+
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
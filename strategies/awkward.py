@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class Awkward(BaseStrategy):
+class Awkward(StatisticsOnlyStrategy):
     """
     尷尬的策略 (Awkward Strategy) / 笨拙的合作者
 
@@ -19,7 +18,7 @@ class Awkward(BaseStrategy):
     P_SLIP = 0.10
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
@@ -33,7 +32,7 @@ class Awkward(BaseStrategy):
         """
 
         # 2. 檢查是否 "手滑"
-        if random.random() < self.P_SLIP:
+        if self.rng.chance(self.P_SLIP):
             # 糟糕！我想合作，但 "說出口" 的卻是背叛
             return Move.CHEAT
 
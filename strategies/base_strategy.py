@@ -1,8 +1,26 @@
 # strategies/base_strategy.py
 import abc
-import random
-import uuid
-from definitions import Move, MatchResult, PAYOFF  # 從根目錄的 definitions.py 匯入
+from array import array
+from definitions import Move, MatchResult, MOVES, MATCH_RESULTS, MOVE_CODE, RESULT_CODE, PAYOFF_BY_CODE  # 從根目錄的 definitions.py 匯入
+from history import HistoryLog, EMPTY_HISTORY
+from rng import SimulationRNG, DEFAULT_RNG
+from agent_ids import DEFAULT_AGENT_IDS
+
+
+class SparseSlots(dict):
+    """
+    "每個對手一格" 的稀疏版本 (互動圖上使用)：
+    以對手 ID 讀寫，讀取未寫入過的 ID 時回傳預設值 (不會新增項目)。
+    """
+
+    __slots__ = ("default",)
+
+    def __init__(self, default):
+        super().__init__()
+        self.default = default
+
+    def __missing__(self, key):
+        return self.default
 
 
 class BaseStrategy(abc.ABC):
@@ -11,34 +29,97 @@ class BaseStrategy(abc.ABC):
 
     紀錄內容包含：
     - 分數
-    - 歷史
+    - 歷史 (欄位式的 HistoryLog，見 history.py)
     """
 
     P_INTERNAL_NOISE = 0.02  # 2% 內部雜訊
 
-    def __init__(self):
-        self.unique_id = str(uuid.uuid4())  # 策略 "個體" 的唯一 ID
+    # 策略的所有隨機性都必須來自 self.rng (engine 會換成該次模擬的 RNG)
+    rng: SimulationRNG = DEFAULT_RNG
+
+    # 需要 "固定窗口統計" 的窗口大小 (例如 Statistical 的最近 10 回合)
+    # 會套用在自己的 my_history 與所有 "私怨" 歷史上
+    HISTORY_WINDOWS: tuple[int, ...] = ()
+
+    # 【有限回溯】策略需要 "以索引讀取" 的歷史回合數 (None = 全部保留，0 = 不需要)。
+    # 統計 API (count_of, last, streak, window_count...) 不受影響，
+    # 只使用統計 API 的策略可以全部宣告為 0，記憶體就不會隨回合數成長。
+    PRIVATE_HISTORY_DEPTH: int | None = None  # 每個對手的 "私怨" 歷史
+    GLOBAL_HISTORY_DEPTH: int | None = None   # 自己的 my_history (自己讀取的部分)
+    PUBLIC_HISTORY_DEPTH: int | None = None   # 對手傳入的 opponent_history (對手的 my_history)
+
+    # 群體中 "其他策略" 需要讀取本個體 my_history 的回合數，
+    # 由 engine 在 reset() 前以 configure_population() 設定 (預設全部保留)
+    public_history_depth: int | None = None
+
+    # 對手 ID 的上限 (群體中最大的 unique_id + 1)，同樣由 configure_population() 設定，
+    # 所有 "每個對手一格" 的陣列都以此長度預先配置
+    opponent_capacity: int = 0
+
+    # 互動圖 (見 topology.py) 上每個個體只會遇到少數鄰居：
+    # 此時 "每個對手一格" 的狀態改用稀疏的 dict (只保存實際遇過的對手)，
+    # 記憶體不再隨群體大小 * 群體大小成長
+    sparse_opponents: bool = False
+
+    # 若策略可被 "查表" 表達，宣告其規則名稱 (見 vector_engine.TABLE_RULES)，
+    # 向量化引擎會以 NumPy 陣列代替 play()/update() 執行它。
+    # 【注意】子類別若覆寫 play() 改變行為，必須把它設回 None。
+    TABLE_RULE: str | None = None
+
+    def __init__(self, unique_id: int | None = None):
+        # 策略 "個體" 的唯一 ID: 由 simulation 的 AgentIdPool 配發的小整數
+        # (單獨建立時取自共用配發器)
+        if unique_id is None:
+            unique_id = DEFAULT_AGENT_IDS.acquire()
+        self.unique_id = unique_id
 
         # ( reset() 會被 super() 呼叫 )
         self.reset()
 
     def reset(self):
-        # 歷史紀錄的 "key" 現在必須是 unique_id
-        self.opponent_history: dict[str, list[dict]] = {}
-        self.my_history: list[dict] = []
+        # 每個對手的 "私怨" 歷史，以對手的 unique_id 直接索引 (尚未互動為 None)
+        self.opponent_history: list[HistoryLog | None] | SparseSlots = (
+            SparseSlots(None) if self.sparse_opponents else [None] * self.opponent_capacity)
+        self.my_history: HistoryLog = HistoryLog(
+            self.HISTORY_WINDOWS,
+            maxlen=combine_depths(self.GLOBAL_HISTORY_DEPTH, self.public_history_depth))
         self.total_score: int = 0
 
+    def private_history(self, opponent_unique_id: int) -> HistoryLog:
+        """
+        取得與某對手的 "私怨" 歷史 (尚未互動過則為空的 HistoryLog)。
+
+        回傳的 HistoryLog 提供 O(1) 的統計 API (count_of, last, streak...)。
+        """
+        if self.sparse_opponents or opponent_unique_id < len(self.opponent_history):
+            return self.opponent_history[opponent_unique_id] or EMPTY_HISTORY
+        return EMPTY_HISTORY
+
+    # --- 每個對手一格的狀態 (以對手的 unique_id 索引) ---
+
+    def opponent_flags(self) -> bytearray | SparseSlots:
+        """建立 "每個對手一個旗標" 的 bitset (取代 set of ID，例如黑名單)"""
+        if self.sparse_opponents:
+            return SparseSlots(0)
+        return bytearray(self.opponent_capacity)
+
+    def opponent_counters(self) -> array | SparseSlots:
+        """建立 "每個對手一個整數" 的陣列 (取代 {ID: 次數} dict，例如記點)"""
+        if self.sparse_opponents:
+            return SparseSlots(0)
+        return array("i", bytes(4 * self.opponent_capacity))
+
     @abc.abstractmethod
     def play(self,
-             opponent_unique_id: str,
-             opponent_history: list[dict],
+             opponent_unique_id: int,
+             opponent_history: HistoryLog,
              opponent_total_score: int,
              ) -> Move:
         """
         決定此回合 "打算" 出什麼招。
         Args:
-            opponent_unique_id (str): 對手的 "個體" ID。
-            opponent_history (list[dict]): 對手過往遊戲紀錄
+            opponent_unique_id (int): 對手的 "個體" ID。
+            opponent_history (HistoryLog): 對手過往遊戲紀錄 (唯讀序列)
             opponent_total_score (int): 對手當前總分
         """
         pass
@@ -53,14 +134,14 @@ class BaseStrategy(abc.ABC):
         Returns:
             Move: "說出口的" 意圖 (Slipped Intent)。
         """
-        if random.random() < self.P_INTERNAL_NOISE:
+        if self.rng.chance(self.P_INTERNAL_NOISE):
             # 2% 的機率 "手滑"
             return Move.CHEAT if intended_move == Move.COOPERATE else Move.COOPERATE
 
         return intended_move
 
     def update(self,
-               opponent_unique_id: str,
+               opponent_unique_id: int,
                my_intended_move: Move,
                my_actual_move: Move,
                opponent_intended_move: Move,
@@ -68,25 +149,122 @@ class BaseStrategy(abc.ABC):
                match_result: MatchResult):
         """
         由 'engine' 呼叫，用來告知此回合的 "最終" 結果。
+
+        (策略沒有覆寫此方法時，engine 會直接呼叫整數版的 record())
         """
 
-        round_record = {
-            "my_intended_move": my_intended_move,
-            "my_actual_move": my_actual_move,
-            "opponent_intended_move": opponent_intended_move,
-            "opponent_actual_move": opponent_actual_move,
-            "match_result": match_result,
-        }
+        # 將 Enum 轉成 "整數編碼" 後記錄
+        self.record(
+            opponent_unique_id,
+            MOVE_CODE[my_intended_move],
+            MOVE_CODE[my_actual_move],
+            MOVE_CODE[opponent_intended_move],
+            MOVE_CODE[opponent_actual_move],
+            RESULT_CODE[match_result],
+        )
+
+    # --- 整數編碼的熱路徑 (engine 內部使用，策略不需覆寫) ---
+
+    def record(self,
+               opponent_unique_id: int,
+               my_intended: int,
+               my_actual: int,
+               opponent_intended: int,
+               opponent_actual: int,
+               result: int):
+        """
+        update() 的 "整數編碼" 版本：寫入歷史並更新總分。
+
+        沒有覆寫 update() 的策略，engine 會直接呼叫這個方法，
+        完全不需要建立 Enum。
+        """
 
         # 1. 依據 opponent 建立 match history
-        if opponent_unique_id not in self.opponent_history:
-            self.opponent_history[opponent_unique_id] = []
+        private_history = self.opponent_history[opponent_unique_id]
+        if private_history is None:
+            private_history = HistoryLog(self.HISTORY_WINDOWS, maxlen=self.PRIVATE_HISTORY_DEPTH)
+            self.opponent_history[opponent_unique_id] = private_history
 
-        self.opponent_history[opponent_unique_id].append(round_record)
+        private_history.append_codes(my_intended, my_actual, opponent_intended, opponent_actual, result)
 
         # 2. 建立自己的 match history
-        self.my_history.append(round_record)
+        self.my_history.append_codes(my_intended, my_actual, opponent_intended, opponent_actual, result)
+
+        # 3. 更新策略總分 (扁平分數表，以整數索引)
+        self.total_score += PAYOFF_BY_CODE[result]
+
+    def update_from_codes(self,
+                          opponent_unique_id: int,
+                          my_intended: int,
+                          my_actual: int,
+                          opponent_intended: int,
+                          opponent_actual: int,
+                          result: int):
+        """
+        (覆寫了 update() 的策略) 把整數編碼轉回 Enum 後呼叫 update()。
+        """
+        self.update(
+            opponent_unique_id,
+            MOVES[my_intended],
+            MOVES[my_actual],
+            MOVES[opponent_intended],
+            MOVES[opponent_actual],
+            MATCH_RESULTS[result],
+        )
+
+    def slip_code(self, intended: int) -> int:
+        """
+        apply_internal_noise() 的 "整數編碼" 版本 (0/1 翻轉)。
+        """
+        return intended ^ self.rng.chance(self.P_INTERNAL_NOISE)
+
+    def slip_code_via_enum(self, intended: int) -> int:
+        """
+        (覆寫了 apply_internal_noise() 的策略) 經由 Enum 呼叫覆寫的版本。
+        """
+        return MOVE_CODE[self.apply_internal_noise(MOVES[intended])]
 
-        # 3. 更新策略總分
-        score = PAYOFF[match_result]
-        self.total_score += score
+    def code_recorder(self):
+        """engine 使用的 "記錄" 函數：沒有覆寫 update() 時走整數熱路徑"""
+        if type(self).update is BaseStrategy.update:
+            return self.record
+        return self.update_from_codes
+
+    def code_slipper(self):
+        """engine 使用的 "手滑" 函數：沒有覆寫 apply_internal_noise() 時走整數熱路徑"""
+        if type(self).apply_internal_noise is BaseStrategy.apply_internal_noise:
+            return self.slip_code
+        return self.slip_code_via_enum
+
+
+class StatisticsOnlyStrategy(BaseStrategy):
+    """
+    只使用統計 API (count_of, last, streak, window_count...) 的策略的基底類別：
+    三種歷史都不需要以索引讀取，不保留任何回合 (HISTORY_WINDOWS 的窗口仍由 HistoryLog 自動保留)。
+    內建策略都繼承此類別；需要以索引讀取歷史的策略請直接繼承 BaseStrategy 並宣告各自的深度。
+    """
+
+    PRIVATE_HISTORY_DEPTH = GLOBAL_HISTORY_DEPTH = PUBLIC_HISTORY_DEPTH = 0
+
+
+def combine_depths(*depths: int | None) -> int | None:
+    """多個回溯需求的聯集: 任何一個是 None (全部保留) 則為 None，否則取最大值"""
+    if any(depth is None for depth in depths):
+        return None
+    return max(depths, default=0)
+
+
+def configure_population(strategies: list[BaseStrategy], sparse: bool = False):
+    """
+    (由 engine 在 reset() 前呼叫) 設定整個群體共用的參數：
+    1. 依所有策略的 PUBLIC_HISTORY_DEPTH，決定每個個體的 my_history
+       需要保留多少回合給 "對手" 讀取。
+    2. 依最大的 unique_id，決定 "每個對手一格" 陣列的長度
+       (sparse=True 時改用只保存遇過對手的 SparseSlots，互動圖使用)。
+    """
+    public_depth = combine_depths(*{type(s).PUBLIC_HISTORY_DEPTH for s in strategies})
+    opponent_capacity = max((s.unique_id for s in strategies), default=-1) + 1
+    for strategy in strategies:
+        strategy.public_history_depth = public_depth
+        strategy.opponent_capacity = opponent_capacity
+        strategy.sparse_opponents = sparse
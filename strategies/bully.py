@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class Bully(BaseStrategy):
+class Bully(StatisticsOnlyStrategy):
     """
     霸凌者 (Bully) / 諂媚者 (Sycophant)
 
@@ -19,7 +19,7 @@ class Bully(BaseStrategy):
     MIN_DATA_THRESHOLD = 20
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
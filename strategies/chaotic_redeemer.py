@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move, MatchResult
 
 
-class ChaoticRedeemer(BaseStrategy):
+class ChaoticRedeemer(StatisticsOnlyStrategy):
     """
     渾沌救贖者 (Chaotic Redeemer) - 您的 "25% 誤判意圖" 版本
 
@@ -21,24 +20,19 @@ class ChaoticRedeemer(BaseStrategy):
     # 25% 的機率 "誤判" 意圖
     P_MISJUDGE = 0.25
 
-    def __init__(self):
-        super().__init__()
-        self.grudge_list = set()
-        self.strike_counts = {}
-
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return Move.CHEAT
 
         return Move.COOPERATE
 
     def update(self,
-               opponent_unique_id: str,
+               opponent_unique_id: int,
                my_intended_move: Move,
                my_actual_move: Move,
                opponent_intended_move: Move,  # <-- 這是 "真實" 意圖
@@ -54,7 +48,7 @@ class ChaoticRedeemer(BaseStrategy):
             match_result
         )
 
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return
 
         # --- 【渾沌機制】---
@@ -62,7 +56,7 @@ class ChaoticRedeemer(BaseStrategy):
 
         perceived_intent = opponent_intended_move  # 預設 = 真實意圖
 
-        if random.random() < self.P_MISJUDGE:
+        if self.rng.chance(self.P_MISJUDGE):
             # 誤判發生！翻轉感知
             if opponent_intended_move == Move.COOPERATE:
                 perceived_intent = Move.CHEAT
@@ -71,7 +65,7 @@ class ChaoticRedeemer(BaseStrategy):
 
         # --- Redeemer 邏輯 (現在完全基於 "perceived_intent") ---
 
-        current_strikes = self.strike_counts.get(opponent_unique_id, 0)
+        current_strikes = self.strike_counts[opponent_unique_id]
 
         # 2. 【救贖機制】(基於感知)
         #    (我們假設自己的意圖是可信的)
@@ -85,13 +79,12 @@ class ChaoticRedeemer(BaseStrategy):
 
         # 4. 【黑名單】 (邏輯不變)
         if current_strikes >= self.STRIKE_LIMIT:
-            self.grudge_list.add(opponent_unique_id)
-            if opponent_unique_id in self.strike_counts:
-                del self.strike_counts[opponent_unique_id]
+            self.grudge_list[opponent_unique_id] = 1
+            self.strike_counts[opponent_unique_id] = 0
         else:
             self.strike_counts[opponent_unique_id] = current_strikes
 
     def reset(self):
         super().reset()
-        self.grudge_list = set()
-        self.strike_counts = {}
+        self.grudge_list = self.opponent_flags()
+        self.strike_counts = self.opponent_counters()
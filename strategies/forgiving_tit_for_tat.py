@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class ForgivingTitForTat(BaseStrategy):
+class ForgivingTitForTat(StatisticsOnlyStrategy):
     """
     寬容的牙還牙 (Forgiving Tit-for-Tat)
 
@@ -16,27 +16,24 @@ class ForgivingTitForTat(BaseStrategy):
     """
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        # 1. 取得 "私怨" 列表
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
+        # 1. 取得 "私怨" 歷史
+        private_history = self.private_history(opponent_unique_id)
 
-        if not private_history_list:
+        if not private_history:
             # 2. 第一回合，總是合作 (保持 "善良")
             return Move.COOPERATE
 
-        # 3. 取得上一回合的 "私怨" 紀錄 (dict)
-        last_private_record = private_history_list[-1]
-
-        # 4. 【關鍵點】
+        # 3. 【關鍵點】
         #    - 標準 TFT 看的是:
-        #      last_private_record["opponent_actual_move"]
+        #      private_history.last("opponent_actual_move")
         #
         #    - 本策略 (ForgivingTFT) 看的是:
-        opponent_last_intended_move = last_private_record["opponent_intended_move"]
+        opponent_last_intended_move = private_history.last("opponent_intended_move")
 
-        # 5. 複製對手 "上回合的意圖"
+        # 4. 複製對手 "上回合的意圖"
         return opponent_last_intended_move
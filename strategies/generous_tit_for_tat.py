@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class GenerousTitForTat(BaseStrategy):
+class GenerousTitForTat(StatisticsOnlyStrategy):
     """
     慷慨的牙還牙 (Generous Tit-for-Tat, GTFT)
 
@@ -18,20 +17,19 @@ class GenerousTitForTat(BaseStrategy):
     P_GENEROUS = 0.1
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
+        private_history = self.private_history(opponent_unique_id)
 
-        if not private_history_list:
+        if not private_history:
             # 第一回合，合作
             return Move.COOPERATE
 
         # 1. 取得對手上一回合的 "實際" 出招
-        last_private_record = private_history_list[-1]
-        opponent_last_actual_move = last_private_record["opponent_actual_move"]
+        opponent_last_actual_move = private_history.last("opponent_actual_move")
 
         # 2. 執行 TFT 邏輯 (決定 "意圖")
         my_intended_move = opponent_last_actual_move  # 複製
@@ -40,7 +38,7 @@ class GenerousTitForTat(BaseStrategy):
         # 如果我的意圖是 "背叛" (報復)
         if my_intended_move == Move.CHEAT:
             # 檢查是否要 "慷慨"
-            if random.random() < self.P_GENEROUS:
+            if self.rng.chance(self.P_GENEROUS):
                 # 慷慨觸發，改為合作
                 return Move.COOPERATE
 
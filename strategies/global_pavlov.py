@@ -1,13 +1,13 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move, MatchResult
 
 
-class GlobalPavlov(BaseStrategy):
+class GlobalPavlov(StatisticsOnlyStrategy):
     """
     全局巴甫洛夫 (Global Pavlov) 策略
 
     這是一個 "不看對手" 的策略。
-    它只看 "自己" 在 "整個錦標賽" 的 "上一回合" (self.my_history[-1]) 
+    它只看 "自己" 在 "整個錦標賽" 的 "上一回合" (self.my_history.last(...))
     的結果，來決定這一回合的出招。
 
     規則 (Win-Stay, Lose-Shift):
@@ -20,8 +20,10 @@ class GlobalPavlov(BaseStrategy):
     (此策略 "忽略" 傳入的 opponent_unique_id 和 opponent_history)
     """
 
+    TABLE_RULE = "global_pavlov"  # 可由向量化引擎查表執行
+
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
@@ -32,9 +34,8 @@ class GlobalPavlov(BaseStrategy):
             return Move.COOPERATE
 
         # 3. 取得 "上一回合" (對戰任何人) 的紀錄
-        last_global_record = self.my_history[-1]
-        my_last_move = last_global_record["my_actual_move"]
-        last_result = last_global_record["match_result"]
+        my_last_move = self.my_history.last("my_actual_move")
+        last_result = self.my_history.last("match_result")
 
         # 4. 檢查 "贏" (REWARD 或 TEMPTATION)
         if last_result == MatchResult.REWARD or last_result == MatchResult.TEMPTATION:
@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class GreedyProber(BaseStrategy):
+class GreedyProber(StatisticsOnlyStrategy):
     """
     貪婪的試探者 (GreedyProber)
 
@@ -21,23 +20,18 @@ class GreedyProber(BaseStrategy):
     P_GENEROUS = 0.1  # 10% 慷慨 (TFT 邏輯)
     P_SNEAKY = 0.1   # 10% 偷襲 (Joss 邏輯)
 
-    def __init__(self):
-        super().__init__()
-        self.responsive_list = set()
-        self.exploitable_list = set()
-
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
         # 1. 檢查是否已分類: 可敬的對手
-        if opponent_unique_id in self.responsive_list:
+        if self.responsive_list[opponent_unique_id]:
             return self._play_joss_tft(opponent_history)
 
         # 2. 檢查是否已分類: 可剝削者
-        if opponent_unique_id in self.exploitable_list:
+        if self.exploitable_list[opponent_unique_id]:
             return self._play_exploiter(opponent_unique_id, opponent_history)
 
         # 3. 尚未分類: 執行試探
@@ -54,14 +48,13 @@ class GreedyProber(BaseStrategy):
             return Move.CHEAT
 
         if current_round == (self.PROBE_ROUND + 1):
-            last_record = history[-1]
-            opponent_response = last_record["opponent_actual_move"]
+            opponent_response = history.last("opponent_actual_move")
 
             if opponent_response == Move.CHEAT:
-                self.responsive_list.add(opp_id)
+                self.responsive_list[opp_id] = 1
                 return self._play_joss_tft(history)  # 切換到 JOSS+TFT
             else:
-                self.exploitable_list.add(opp_id)
+                self.exploitable_list[opp_id] = 1
                 return Move.CHEAT
 
         return Move.COOPERATE
@@ -71,14 +64,12 @@ class GreedyProber(BaseStrategy):
         扮演剝削者 (永遠 D)，但持續監視
         (同 SmartProber)
         """
-        relevant_history = history[self.PROBE_ROUND:]
-
-        for record in relevant_history:
-            if record["opponent_actual_move"] == Move.CHEAT:
-                # 醒了！
-                self.exploitable_list.remove(opp_id)
-                self.responsive_list.add(opp_id)
-                return self._play_joss_tft(history)  # 切換到 JOSS+TFT
+        # "最近一次" 背叛的回合索引 >= PROBE_ROUND，代表曾經反抗 (O(1))
+        if history.last_index("opponent_actual_move", Move.CHEAT) >= self.PROBE_ROUND:
+            # 醒了！
+            self.exploitable_list[opp_id] = 0
+            self.responsive_list[opp_id] = 1
+            return self._play_joss_tft(history)  # 切換到 JOSS+TFT
 
         return Move.CHEAT
 
@@ -89,25 +80,24 @@ class GreedyProber(BaseStrategy):
         if not history:
             return Move.COOPERATE
 
-        last_record = history[-1]
-        opponent_last_actual_move = last_record["opponent_actual_move"]
+        opponent_last_actual_move = history.last("opponent_actual_move")
 
         # 1. TFT 邏輯
         my_intended_move = opponent_last_actual_move
 
         # 2. GTFT "慷慨" 邏輯
         if my_intended_move == Move.CHEAT:
-            if random.random() < self.P_GENEROUS:
+            if self.rng.chance(self.P_GENEROUS):
                 return Move.COOPERATE  # 慷慨
 
         # 3. Joss "偷襲" 邏輯
         if my_intended_move == Move.COOPERATE:
-            if random.random() < self.P_SNEAKY:
+            if self.rng.chance(self.P_SNEAKY):
                 return Move.CHEAT  # 偷襲!
 
         return my_intended_move
 
     def reset(self):
         super().reset()
-        self.responsive_list = set()
-        self.exploitable_list = set()
+        self.responsive_list = self.opponent_flags()
+        self.exploitable_list = self.opponent_flags()
@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class Grudger(BaseStrategy):
+class Grudger(StatisticsOnlyStrategy):
     """
     怨恨者 (Grudger) / 恐怖策略 (Grim Trigger)
 
@@ -14,31 +14,27 @@ class Grudger(BaseStrategy):
     (此策略只看 "私怨"，忽略傳入的 opponent_history)
     """
 
-    def __init__(self):
-        super().__init__()
-        # 用一個 set 來儲存 "我恨誰" (我對誰懷恨在心)
-        self.grudge_list = set()
+    TABLE_RULE = "grudger"  # 可由向量化引擎查表執行
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
         # 1. 檢查這個對手是否已在我的 "黑名單" 上
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return Move.CHEAT
 
         # 2. 如果不在黑名單上，檢查 "私怨" 歷史
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
+        private_history = self.private_history(opponent_unique_id)
 
-        # 3. 掃描 "所有" 過去的回合
-        for record in private_history_list:
-            if record["opponent_actual_move"] == Move.CHEAT:
-                # 4. 找到了！對手曾經背叛過
-                #    將他加入黑名單，並從這回合開始永遠背叛
-                self.grudge_list.add(opponent_unique_id)
-                return Move.CHEAT
+        # 3. 查詢對手 "曾經" 背叛的次數 (O(1) 統計，不再掃描歷史)
+        if private_history.count_of("opponent_actual_move", Move.CHEAT) > 0:
+            # 4. 找到了！對手曾經背叛過
+            #    將他加入黑名單，並從這回合開始永遠背叛
+            self.grudge_list[opponent_unique_id] = 1
+            return Move.CHEAT
 
         # 5. 如果歷史清白，且不在黑名單上，則合作
         return Move.COOPERATE
@@ -48,4 +44,5 @@ class Grudger(BaseStrategy):
         重置錦標賽時，也要清空 "黑名單"
         """
         super().reset()
-        self.grudge_list = set()
+        # 用一個 bitset 來儲存 "我恨誰" (我對誰懷恨在心)
+        self.grudge_list = self.opponent_flags()
@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class Joss(BaseStrategy):
+class Joss(StatisticsOnlyStrategy):
     """
     Joss (狡猾的策略 / 偷襲者)
 
@@ -18,20 +17,19 @@ class Joss(BaseStrategy):
     P_SNEAKY = 0.1
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
+        private_history = self.private_history(opponent_unique_id)
 
-        if not private_history_list:
+        if not private_history:
             # 第一回合，合作 (它偽裝成 "善良" 策略)
             return Move.COOPERATE
 
         # 1. 取得對手上一回合的 "實際" 出招
-        last_private_record = private_history_list[-1]
-        opponent_last_actual_move = last_private_record["opponent_actual_move"]
+        opponent_last_actual_move = private_history.last("opponent_actual_move")
 
         # 2. 執行 TFT 邏輯 (決定 "意圖")
         my_intended_move = opponent_last_actual_move
@@ -40,7 +38,7 @@ class Joss(BaseStrategy):
         # 如果我的意圖是 "合作"
         if my_intended_move == Move.COOPERATE:
             # 檢查是否要 "偷襲"
-            if random.random() < self.P_SNEAKY:
+            if self.rng.chance(self.P_SNEAKY):
                 # 偷襲觸發，改為背叛
                 return Move.CHEAT
 
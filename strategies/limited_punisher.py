@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move, MatchResult
 
 
-class LimitedPunisher(BaseStrategy):
+class LimitedPunisher(StatisticsOnlyStrategy):
     """
     有限懲罰者 (您的 "記點/救贖/有限報復" 變體)
 
@@ -20,21 +20,14 @@ class LimitedPunisher(BaseStrategy):
     STRIKE_LIMIT = 3
     PUNISHMENT_ROUNDS = 2  # <-- 設為 2, 避免觸發其他策略的 3 次上限
 
-    def __init__(self):
-        super().__init__()
-        # "記點" 系統
-        self.strike_counts = {}
-        # "懲罰" 計時器
-        self.punishment_timers = {}
-
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
         # 1. 檢查是否處於 "懲罰" 階段
-        rounds_left = self.punishment_timers.get(opponent_unique_id, 0)
+        rounds_left = self.punishment_timers[opponent_unique_id]
 
         if rounds_left > 0:
             return Move.CHEAT  # 正在懲罰
@@ -43,7 +36,7 @@ class LimitedPunisher(BaseStrategy):
         return Move.COOPERATE
 
     def update(self,
-               opponent_unique_id: str,
+               opponent_unique_id: int,
                my_intended_move: Move,
                my_actual_move: Move,
                opponent_intended_move: Move,
@@ -60,7 +53,7 @@ class LimitedPunisher(BaseStrategy):
         )
 
         # 1. 檢查是否正在懲罰
-        rounds_left = self.punishment_timers.get(opponent_unique_id, 0)
+        rounds_left = self.punishment_timers[opponent_unique_id]
 
         if rounds_left > 0:
             # 正在懲罰，計時器 -1
@@ -69,7 +62,7 @@ class LimitedPunisher(BaseStrategy):
             return
 
         # 2. 如果不在懲罰階段，則執行 "記點/救贖" 邏輯
-        current_strikes = self.strike_counts.get(opponent_unique_id, 0)
+        current_strikes = self.strike_counts[opponent_unique_id]
 
         # 3. 【救贖機制】
         if match_result == MatchResult.REWARD:
@@ -91,5 +84,7 @@ class LimitedPunisher(BaseStrategy):
 
     def reset(self):
         super().reset()
-        self.strike_counts = {}
-        self.punishment_timers = {}
+        # "記點" 系統
+        self.strike_counts = self.opponent_counters()
+        # "懲罰" 計時器
+        self.punishment_timers = self.opponent_counters()
@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move, MatchResult
 
 
-class Pavlov(BaseStrategy):
+class Pavlov(StatisticsOnlyStrategy):
     """
     巴甫洛夫 (Pavlov) 策略，又稱 "Win-Stay, Lose-Shift" (贏定輸變)。
 
@@ -16,23 +16,24 @@ class Pavlov(BaseStrategy):
     (此策略只看 "私怨"，忽略傳入的 opponent_history)
     """
 
+    TABLE_RULE = "pavlov"  # 可由向量化引擎查表執行
+
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        # 1. 取得 "私怨" 列表
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
+        # 1. 取得 "私怨" 歷史
+        private_history = self.private_history(opponent_unique_id)
 
-        if not private_history_list:
+        if not private_history:
             # 2. 第一回合，總是合作
             return Move.COOPERATE
 
         # 3. 取得上一回合的紀錄
-        last_record = private_history_list[-1]
-        my_last_move = last_record["my_actual_move"]
-        last_result = last_record["match_result"]
+        my_last_move = private_history.last("my_actual_move")
+        last_result = private_history.last("match_result")
 
         # 4. 檢查 "贏" (REWARD 或 TEMPTATION)
         if last_result == MatchResult.REWARD or last_result == MatchResult.TEMPTATION:
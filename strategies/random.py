@@ -1,14 +1,15 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class Random(BaseStrategy):
+class Random(StatisticsOnlyStrategy):
     """隨機"""
 
+    TABLE_RULE = "random"  # 可由向量化引擎查表執行
+
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
-        return Move.COOPERATE if random.random() < 0.5 else Move.CHEAT
+        return Move.COOPERATE if self.rng.chance(0.5) else Move.CHEAT
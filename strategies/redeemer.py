@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move, MatchResult
 
 
-class Redeemer(BaseStrategy):
+class Redeemer(StatisticsOnlyStrategy):
     """
     救贖者 (Redeemer) / 寬容記點策略
 
@@ -19,29 +19,21 @@ class Redeemer(BaseStrategy):
 
     STRIKE_LIMIT = 3  # 記點 3 次觸發
 
-    def __init__(self):
-        super().__init__()
-        # "黑名單" (Grudge list)
-        self.grudge_list = set()
-        # "記點" 系統 (Strike count)
-        # 結構: {'opponent_name': 1, ...}
-        self.strike_counts = {}
-
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
         # 1. 檢查這個對手是否已在我的 "黑名單" 上
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return Move.CHEAT
 
         # 2. 如果不在黑名單上，預設合作 (等待 update 更新記點)
         return Move.COOPERATE
 
     def update(self,
-               opponent_unique_id: str,
+               opponent_unique_id: int,
                my_intended_move: Move,
                my_actual_move: Move,
                opponent_intended_move: Move,
@@ -63,11 +55,11 @@ class Redeemer(BaseStrategy):
         )
 
         # 2. 如果已在黑名單，則不再更新記點
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return
 
         # 3. 取得當前的記點 (預設 0)
-        current_strikes = self.strike_counts.get(opponent_unique_id, 0)
+        current_strikes = self.strike_counts[opponent_unique_id]
 
         # 4. 【救贖機制】
         #    如果我們 "相互合作"，則抵銷一次記點
@@ -82,10 +74,9 @@ class Redeemer(BaseStrategy):
         # 6. 【黑名單觸發】
         #    檢查記點是否已達上限
         if current_strikes >= self.STRIKE_LIMIT:
-            self.grudge_list.add(opponent_unique_id)
-            # (可選) 觸發後清除記點，節省記憶體
-            if opponent_unique_id in self.strike_counts:
-                del self.strike_counts[opponent_unique_id]
+            self.grudge_list[opponent_unique_id] = 1
+            # (可選) 觸發後清除記點
+            self.strike_counts[opponent_unique_id] = 0
         else:
             # 7. 儲存更新後的記點
             self.strike_counts[opponent_unique_id] = current_strikes
@@ -95,5 +86,8 @@ class Redeemer(BaseStrategy):
         重置錦標賽時，也要清空 "黑名單" 和 "記點"
         """
         super().reset()
-        self.grudge_list = set()
-        self.strike_counts = {}
+        # "黑名單" (Grudge list)
+        self.grudge_list = self.opponent_flags()
+        # "記點" 系統 (Strike count)
+        # 結構: strike_counts[對手 ID] = 次數
+        self.strike_counts = self.opponent_counters()
@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move, MatchResult
 
 
-class SkepticalRedeemer(BaseStrategy):
+class SkepticalRedeemer(StatisticsOnlyStrategy):
     """
     多疑的救贖者 (Skeptical Redeemer)
 
@@ -25,24 +24,19 @@ class SkepticalRedeemer(BaseStrategy):
     # 誤判率 (同時也是錯放率 1.0 - 0.25 = 0.75)
     P_MISTRUST = 0.25
 
-    def __init__(self):
-        super().__init__()
-        self.grudge_list = set()
-        self.strike_counts = {}
-
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return Move.CHEAT
 
         return Move.COOPERATE
 
     def update(self,
-               opponent_unique_id: str,
+               opponent_unique_id: int,
                my_intended_move: Move,
                my_actual_move: Move,
                opponent_intended_move: Move,
@@ -58,10 +52,10 @@ class SkepticalRedeemer(BaseStrategy):
             match_result
         )
 
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return
 
-        current_strikes = self.strike_counts.get(opponent_unique_id, 0)
+        current_strikes = self.strike_counts[opponent_unique_id]
 
         # 1. 【救贖機制】(看意圖)
         if my_intended_move == Move.COOPERATE and \
@@ -73,7 +67,7 @@ class SkepticalRedeemer(BaseStrategy):
         if opponent_intended_move == Move.CHEAT:
             # 只有 25% 的機率 "正確" 記點
             # (有 75% 的機率 "誤判" 並放過)
-            if random.random() < self.P_MISTRUST:
+            if self.rng.chance(self.P_MISTRUST):
                 current_strikes += 1
 
         # 3. 【懷疑機制 - 誤判無辜】
@@ -82,18 +76,17 @@ class SkepticalRedeemer(BaseStrategy):
                 opponent_actual_move == Move.CHEAT:
 
             # 有 25% 的機率 "誤判" 並懲罰無辜者
-            if random.random() < self.P_MISTRUST:
+            if self.rng.chance(self.P_MISTRUST):
                 current_strikes += 1
 
         # (檢查黑名單的邏輯保持不變)
         if current_strikes >= self.STRIKE_LIMIT:
-            self.grudge_list.add(opponent_unique_id)
-            if opponent_unique_id in self.strike_counts:
-                del self.strike_counts[opponent_unique_id]
+            self.grudge_list[opponent_unique_id] = 1
+            self.strike_counts[opponent_unique_id] = 0
         else:
             self.strike_counts[opponent_unique_id] = current_strikes
 
     def reset(self):
         super().reset()
-        self.grudge_list = set()
-        self.strike_counts = {}
+        self.grudge_list = self.opponent_flags()
+        self.strike_counts = self.opponent_counters()
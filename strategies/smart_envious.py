@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class SmartEnvious(BaseStrategy):
+class SmartEnvious(StatisticsOnlyStrategy):
     """
     精明的嫉妒者 (SmartEnvious Strategy) - 統計優化版
 
@@ -25,7 +25,7 @@ class SmartEnvious(BaseStrategy):
     MIN_DATA_THRESHOLD = 20
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
@@ -50,13 +50,10 @@ class SmartEnvious(BaseStrategy):
 
             # --- 5. 統計分析對手的 "作弊率" ---
 
-            opponent_cheats = 0
-            for record in opponent_history:
-                # 檢查對手 "說出口的" 意圖 (即 my_intended_move in their history)
-                if record['my_intended_move'] == Move.CHEAT:
-                    opponent_cheats += 1
-
-            opponent_slipped_cheat_rate = opponent_cheats / opponent_total_interactions
+            # 查詢對手 "說出口的" 意圖 (即 my_intended_move in their history)
+            # (O(1) 累計統計，不再掃描對手的整個歷史)
+            opponent_slipped_cheat_rate = opponent_history.rate_of(
+                "my_intended_move", Move.CHEAT)
 
             # --- 6. 精明決策 ---
 
@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class SmartProber(BaseStrategy):
+class SmartProber(StatisticsOnlyStrategy):
     """
     智慧試探者 (SmartProber) - "更精明" 的版本
 
@@ -26,25 +25,18 @@ class SmartProber(BaseStrategy):
     # 用於 "Responsive" 狀態的 GTFT 邏輯
     P_GENEROUS = 0.1
 
-    def __init__(self):
-        super().__init__()
-        # 狀態 1: "可敬的對手" (切換到 GTFT)
-        self.responsive_list = set()
-        # 狀態 2: "可剝削者" (永遠背叛)
-        self.exploitable_list = set()
-
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
         # 1. 檢查是否已分類
-        if opponent_unique_id in self.responsive_list:
+        if self.responsive_list[opponent_unique_id]:
             # --- 狀態 1: 可敬的對手 (扮演 GTFT) ---
             return self._play_generous_tft(opponent_history)
 
-        if opponent_unique_id in self.exploitable_list:
+        if self.exploitable_list[opponent_unique_id]:
             # --- 狀態 2: 可剝削者 (持續背叛) ---
             return self._play_exploiter(opponent_unique_id, opponent_history)
 
@@ -67,16 +59,15 @@ class SmartProber(BaseStrategy):
         # (我們在第 5 回合才分析第 4 回合的結果)
         if current_round == (self.PROBE_ROUND + 1):
 
-            last_record = history[-1]  # R4 的紀錄
-            opponent_response = last_record["opponent_actual_move"]
+            opponent_response = history.last("opponent_actual_move")  # R4 的紀錄
 
             if opponent_response == Move.CHEAT:
                 # 4a. 對方報復了 -> 標記為 "Responsive"
-                self.responsive_list.add(opp_id)
+                self.responsive_list[opp_id] = 1
                 return self._play_generous_tft(history)  # 切換到 GTFT
             else:
                 # 4b. 對方容忍了 -> 標記為 "Exploitable"
-                self.exploitable_list.add(opp_id)
+                self.exploitable_list[opp_id] = 1
                 return Move.CHEAT  # 開始剝削
 
         # (R5 之後的罕見情況，如果分類失敗)
@@ -90,15 +81,13 @@ class SmartProber(BaseStrategy):
         # 檢查 "剝削" 期間，對手是否 "曾經" 反抗過
 
         # (我們只檢查 R4 之後的歷史, 因為 R4 之前我們是 C)
-        relevant_history = history[self.PROBE_ROUND:]
-
-        for record in relevant_history:
-            if record["opponent_actual_move"] == Move.CHEAT:
-                # 找到了！他醒了！(例如 TolerantGrudger 在 3 次後醒了)
-                # print(f"DEBUG: SmartProber 發現 {opp_id} 醒了!")
-                self.exploitable_list.remove(opp_id)
-                self.responsive_list.add(opp_id)
-                return self._play_generous_tft(history)  # 切換到 GTFT
+        # "最近一次" 背叛的回合索引 >= PROBE_ROUND，代表 R4 之後曾經反抗 (O(1))
+        if history.last_index("opponent_actual_move", Move.CHEAT) >= self.PROBE_ROUND:
+            # 找到了！他醒了！(例如 TolerantGrudger 在 3 次後醒了)
+            # print(f"DEBUG: SmartProber 發現 {opp_id} 醒了!")
+            self.exploitable_list[opp_id] = 0
+            self.responsive_list[opp_id] = 1
+            return self._play_generous_tft(history)  # 切換到 GTFT
 
         # 如果還沒醒，繼續剝削
         return Move.CHEAT
@@ -108,18 +97,19 @@ class SmartProber(BaseStrategy):
         if not history:
             return Move.COOPERATE
 
-        last_record = history[-1]
-        opponent_last_actual_move = last_record["opponent_actual_move"]
+        opponent_last_actual_move = history.last("opponent_actual_move")
 
         my_intended_move = opponent_last_actual_move  # TFT 邏輯
 
         if my_intended_move == Move.CHEAT:
-            if random.random() < self.P_GENEROUS:
+            if self.rng.chance(self.P_GENEROUS):
                 return Move.COOPERATE  # 慷慨
 
         return my_intended_move
 
     def reset(self):
         super().reset()
-        self.responsive_list = set()
-        self.exploitable_list = set()
+        # 狀態 1: "可敬的對手" (切換到 GTFT)
+        self.responsive_list = self.opponent_flags()
+        # 狀態 2: "可剝削者" (永遠背叛)
+        self.exploitable_list = self.opponent_flags()
@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class Statistical(BaseStrategy):
+class Statistical(StatisticsOnlyStrategy):
     """
     統計者 (Statistical) / 滑動窗口策略
 
@@ -19,30 +19,27 @@ class Statistical(BaseStrategy):
     COOPERATION_THRESHOLD = 0.6  # 合作率必須 "大於等於 60%"
     # ---------------------------
 
+    # 宣告需要 "最近 N 回合" 的窗口統計 (由 HistoryLog 以 O(1) 維護)
+    HISTORY_WINDOWS = (LOOKBACK_WINDOW,)
+
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        # 1. 取得 "私怨" 列表
-        private_history_list = self.opponent_history.get(
-            opponent_unique_id, [])
+        # 1. 取得 "私怨" 歷史
+        private_history = self.private_history(opponent_unique_id)
 
         # 2. 檢查歷史是否足夠長
         #    如果不足 (例如剛開局)，則保持合作
-        if len(private_history_list) < self.LOOKBACK_WINDOW:
+        if len(private_history) < self.LOOKBACK_WINDOW:
             return Move.COOPERATE
 
-        # 3. 只看 "最近" 的 N 筆紀錄
-        recent_records = private_history_list[-self.LOOKBACK_WINDOW:]
-
-        # 4. 統計對手在 "實際" 遊戲中合作了幾次
+        # 3. & 4. 查詢對手在 "最近 N 回合" 的 "實際" 遊戲中合作了幾次
         #    (您也可以改成 "opponent_intended_move" 來使其免疫雜訊)
-        opponent_coop_count = sum(
-            1 for record in recent_records
-            if record["opponent_actual_move"] == Move.COOPERATE
-        )
+        opponent_coop_count = private_history.window_count(
+            "opponent_actual_move", Move.COOPERATE, self.LOOKBACK_WINDOW)
 
         # 5. 計算合作率
         opponent_coop_rate = opponent_coop_count / self.LOOKBACK_WINDOW
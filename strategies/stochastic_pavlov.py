@@ -1,9 +1,8 @@
-import random
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move, MatchResult
 
 
-class StochasticPavlov(BaseStrategy):
+class StochasticPavlov(StatisticsOnlyStrategy):
     """
     隨機巴甫洛夫 (Stochastic Pavlov) / 猶豫的巴甫洛夫
 
@@ -23,21 +22,19 @@ class StochasticPavlov(BaseStrategy):
     P_RECONCILE = 0.8
 
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        private_history_list = self.opponent_history.get(
-            opponent_unique_id, [])
+        private_history = self.private_history(opponent_unique_id)
 
-        if not private_history_list:
+        if not private_history:
             # 第一回合，總是合作
             return Move.COOPERATE
 
-        last_record = private_history_list[-1]
-        my_last_move = last_record["my_actual_move"]
-        last_result = last_record["match_result"]
+        my_last_move = private_history.last("my_actual_move")
+        last_result = private_history.last("match_result")
 
         # 1. --- 贏-定 (Win-Stay) ---
         #    (100% 確定性)
@@ -50,7 +47,7 @@ class StochasticPavlov(BaseStrategy):
         # 情況 A: 上次是 SUCKER (我出了 C)
         if my_last_move == Move.COOPERATE:
             # 檢查是否 "報復"
-            if random.random() < self.P_RETALIATE:
+            if self.rng.chance(self.P_RETALIATE):
                 return Move.CHEAT  # (Shift)
             else:
                 return Move.COOPERATE  # (Stay - 猶豫了)
@@ -58,7 +55,7 @@ class StochasticPavlov(BaseStrategy):
         # 情況 B: 上次是 PUNISHMENT (我出了 D)
         else:  # my_last_move == Move.CHEAT
             # 檢查是否 "和解"
-            if random.random() < self.P_RECONCILE:
+            if self.rng.chance(self.P_RECONCILE):
                 return Move.COOPERATE  # (Shift)
             else:
                 return Move.CHEAT  # (Stay - 猶豫了)
@@ -1,28 +1,26 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class TitForTat(BaseStrategy):
+class TitForTat(StatisticsOnlyStrategy):
     """以牙還牙 (TFT)"""
 
+    TABLE_RULE = "tit_for_tat"  # 可由向量化引擎查表執行
+
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
-        # 1. 取得 "私怨" 列表
-        #    使用 .get(key, default) 更安全，避免 KeyError
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
+        # 1. 取得 "私怨" 歷史 (未互動過則為空)
+        private_history = self.private_history(opponent_unique_id)
 
-        if not private_history_list:
+        if not private_history:
             # 2. 沒有 "私怨" 歷史 (第一回合)，則合作
             return Move.COOPERATE
 
-        # 3. 取得上一回合的 "私怨" 紀錄 (這是一個 dict)
-        last_private_record = private_history_list[-1]
-
-        # 4. 【修正點】從紀錄中取出對手的 "實際" 出招
-        opponent_last_actual_move = last_private_record["opponent_actual_move"]
+        # 3. 【修正點】取出對手上一回合的 "實際" 出招 (O(1) 統計)
+        opponent_last_actual_move = private_history.last("opponent_actual_move")
 
-        # 5. 複製該出招
+        # 4. 複製該出招
         return opponent_last_actual_move
@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class TitForTwoTats(BaseStrategy):
+class TitForTwoTats(StatisticsOnlyStrategy):
     """
     兩報還一牙 (Tit-for-Two-Tats, TFTT)
 
@@ -13,28 +13,22 @@ class TitForTwoTats(BaseStrategy):
     3. 這使它能原諒 "單次" 的雜訊或背叛。
     """
 
+    TABLE_RULE = "tit_for_two_tats"  # 可由向量化引擎查表執行
+
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
-
-        # 1. 檢查歷史是否足夠 (至少 2 回合)
-        if len(private_history_list) < 2:
-            return Move.COOPERATE
-
-        # 2. 取得最近兩回合的紀錄
-        last_record = private_history_list[-1]
-        second_last_record = private_history_list[-2]
+        private_history = self.private_history(opponent_unique_id)
 
-        # 3. 檢查對手是否 "連續兩次" 背叛
-        if last_record["opponent_actual_move"] == Move.CHEAT and \
-           second_last_record["opponent_actual_move"] == Move.CHEAT:
+        # 1. 檢查對手是否 "連續兩次" (以上) 背叛
+        #    (歷史不足 2 回合時，連續次數必定小於 2)
+        if private_history.streak("opponent_actual_move", Move.CHEAT) >= 2:
 
             # 觸發！報復一次
             return Move.CHEAT
 
-        # 4. 如果沒有連續兩次背叛，則合作
+        # 2. 如果沒有連續兩次背叛，則合作
         return Move.COOPERATE
@@ -1,8 +1,8 @@
-from strategies.base_strategy import BaseStrategy
+from strategies.base_strategy import StatisticsOnlyStrategy
 from definitions import Move
 
 
-class TolerantGrudger(BaseStrategy):
+class TolerantGrudger(StatisticsOnlyStrategy):
     """
     寬容的怨恨者 (Tolerant Grudger) / 三振出局 (Three Strikes)
 
@@ -17,46 +17,31 @@ class TolerantGrudger(BaseStrategy):
 
     STRIKE_LIMIT = 3  # 連續背叛 3 次觸發
 
-    def __init__(self):
-        super().__init__()
-        # 用一個 set 來儲存 "黑名單"
-        self.grudge_list = set()
-
     def play(self,
-             opponent_unique_id: str,
+             opponent_unique_id: int,
              opponent_history: list[dict],
              opponent_total_score: int,
              ) -> Move:
 
         # 1. 檢查這個對手是否已在我的 "黑名單" 上
-        if opponent_unique_id in self.grudge_list:
+        if self.grudge_list[opponent_unique_id]:
             return Move.CHEAT
 
-        # 2. 取得 "私怨" 列表
-        private_history_list = self.opponent_history.get(opponent_unique_id, [])
-
-        # 3. 檢查是否有足夠的歷史來觸發 (必須至少 3 回合)
-        if len(private_history_list) < self.STRIKE_LIMIT:
-            # 歷史不足，繼續合作
-            return Move.COOPERATE
-
-        # 4. 只檢查 "最近的 3 回合"
-        recent_records = private_history_list[-self.STRIKE_LIMIT:]
+        # 2. 取得 "私怨" 歷史
+        private_history = self.private_history(opponent_unique_id)
 
-        # 5. 檢查是否 "全部" 都是背叛
-        # (我們使用 all() 產生器來快速檢查)
-        is_consecutive_cheat = all(
-            record["opponent_actual_move"] == Move.CHEAT
-            for record in recent_records
-        )
+        # 3. 檢查對手 "目前連續" 背叛的次數 (O(1) 統計)
+        #    (歷史不足 3 回合時，連續次數必定小於 3)
+        is_consecutive_cheat = private_history.streak(
+            "opponent_actual_move", Move.CHEAT) >= self.STRIKE_LIMIT
 
         if is_consecutive_cheat:
-            # 6. 觸發！三振出局
+            # 4. 觸發！三振出局
             # print(f"DEBUG: {self.name} 將 {opponent_unique_id} 加入黑名單!")
-            self.grudge_list.add(opponent_unique_id)
+            self.grudge_list[opponent_unique_id] = 1
             return Move.CHEAT
 
-        # 7. 如果未觸發，則繼續合作
+        # 5. 如果未觸發，則繼續合作
         return Move.COOPERATE
 
     def reset(self):
@@ -64,4 +49,5 @@ class TolerantGrudger(BaseStrategy):
         重置錦標賽時，也要清空 "黑名單"
         """
         super().reset()
-        self.grudge_list = set()
+        # 用一個 bitset 來儲存 "黑名單"
+        self.grudge_list = self.opponent_flags()
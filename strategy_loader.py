@@ -0,0 +1,169 @@
+"""
+策略熱重載 (Strategy Hot Reload)
+
+app 的 7x24 迴圈每一輪都會重新載入 strategies/。
+importlib.import_module 會直接回傳快取中的舊模組，修改掛載進容器的策略檔後必須重啟才會生效；
+StrategyLoader 改為維護一份 "檔案索引" (mtime + 大小 + 內容雜湊)：
+- 未變更的檔案 (mtime / 大小相同) 直接沿用上一輪的類別，不讀檔、不 import。
+- mtime 變了但內容雜湊相同 (例如 touch)，只更新索引。
+- 內容變更或新增的檔案，從 "剛讀到的內容" 編譯並執行成新的模組 (不經過 .pyc 快取，
+  保證執行的程式碼就是記錄的雜湊)。
+- 被刪除的檔案，從索引與 sys.modules 移除。
+
+每一輪的成本只和 "變更的檔案數" 成正比 (其餘只需要一次 stat)。
+sources() / load_sources() 把 "目前這一組內容" 交給其他行程 (例如 spawn 出來的 worker)，
+由同樣的內容重建出同一版本的類別，而不必重新讀取可能已被修改的檔案。
+注意：只追蹤每個策略檔本身；base_strategy.py 等框架檔案變更仍需重啟。
+"""
+import hashlib
+import inspect
+import os
+import sys
+import types
+from dataclasses import dataclass, field
+
+from strategies.base_strategy import BaseStrategy
+
+# 不是策略的檔案
+SKIPPED_FILES = ("__init__.py", "base_strategy.py")
+
+
+@dataclass
+class _Entry:
+    mtime_ns: int
+    size: int
+    digest: str
+    module_name: str
+    source: bytes
+    strategy_types: list[type] = field(default_factory=list)
+
+
+class StrategyLoader:
+    """
+    一個策略目錄的熱重載器 (以 get_loader() 取得共用的實例)。
+
+    load() 回傳目前的策略類別 (依檔名排序，讓同一個 seed 的群體順序一致)，
+    versions() 回傳每個策略類別 "所在檔案的內容雜湊"，寫入結果檔以便追溯。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.package = os.path.basename(os.path.normpath(directory))
+        self._index: dict[str, _Entry] = {}
+        # load_sources() 已執行過的內容 (內容雜湊 -> 策略類別)
+        self._by_digest: dict[str, list[type]] = {}
+
+    def load(self) -> list[type]:
+        seen = set()
+        changed = reused = 0
+        with os.scandir(self.directory) as entries:
+            files = sorted((e for e in entries if e.name.endswith(".py") and e.name not in SKIPPED_FILES),
+                           key=lambda e: e.name)
+
+        for dir_entry in files:
+            seen.add(dir_entry.name)
+            stat = dir_entry.stat()
+            entry = self._index.get(dir_entry.name)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                reused += 1
+                continue  # 未變更: 沿用
+
+            try:
+                with open(dir_entry.path, "rb") as f:
+                    source = f.read()
+            except OSError as e:
+                print(f"[Loader] 錯誤：無法讀取 {dir_entry.path}: {e}")
+                continue
+            digest = hashlib.sha256(source).hexdigest()
+            if entry is not None and entry.digest == digest:
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                reused += 1
+                continue  # 只有 mtime 改變
+
+            changed += 1
+            module_name = f"{self.package}.{dir_entry.name[:-3]}"
+            action = "載入" if entry is None else "重新載入"
+            try:
+                strategy_types = self._exec_module(module_name, dir_entry.path, source)
+            except Exception as e:
+                # 載入失敗: 保留舊版本 (若有)，下一輪檔案再變更時重試
+                print(f"[Loader] 錯誤：無法{action} {module_name}: {e}")
+                if entry is not None:
+                    entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                continue
+
+            self._index[dir_entry.name] = _Entry(
+                stat.st_mtime_ns, stat.st_size, digest, module_name, source, strategy_types)
+            for cls in strategy_types:
+                print(f"[Loader] {action}策略類別: {cls.__name__} ({digest[:12]})")
+
+        for name in set(self._index) - seen:
+            entry = self._index.pop(name)
+            sys.modules.pop(entry.module_name, None)
+            changed += 1
+            print(f"[Loader] 已移除: {entry.module_name}")
+
+        if changed:
+            print(f"[Loader] {changed} 個檔案有變更，{reused} 個沿用")
+        return self.loaded()
+
+    def loaded(self) -> list[type]:
+        """目前索引中的策略類別 (不掃描目錄，與上一次 load() 的結果相同)"""
+        return [cls for name in sorted(self._index) for cls in self._index[name].strategy_types]
+
+    def versions(self) -> dict[str, str]:
+        """{策略類別名稱: 檔案內容雜湊 (前 12 碼)}"""
+        return {cls.__name__: entry.digest[:12]
+                for entry in self._index.values() for cls in entry.strategy_types}
+
+    def sources(self) -> dict[str, bytes]:
+        """{檔名: 內容} (與 loaded() 為同一組版本)"""
+        return {name: entry.source for name, entry in self._index.items()}
+
+    def load_sources(self, sources: dict[str, bytes]) -> list[type]:
+        """
+        由 sources() 的內容建立策略類別 (依檔名排序)，不讀取目錄、不改變索引。
+        同一份內容 (雜湊) 只執行一次，之後沿用。
+        """
+        strategy_types = []
+        for name in sorted(sources):
+            source = sources[name]
+            digest = hashlib.sha256(source).hexdigest()
+            if digest not in self._by_digest:
+                self._by_digest[digest] = self._exec_module(
+                    f"{self.package}.{name[:-3]}", os.path.join(self.directory, name), source)
+            strategy_types.extend(self._by_digest[digest])
+        return strategy_types
+
+    def _exec_module(self, module_name: str, path: str, source: bytes) -> list[type]:
+        """以讀到的 source 建立新的模組物件，成功後才取代 sys.modules 中的舊版本"""
+        module = types.ModuleType(module_name)
+        module.__file__ = path
+        module.__package__ = self.package
+        code = compile(source, path, "exec")
+
+        previous = sys.modules.get(module_name)
+        sys.modules[module_name] = module  # 模組執行期間 (例如 dataclass) 需要能找到自己
+        try:
+            exec(code, module.__dict__)
+        except BaseException:
+            if previous is None:
+                sys.modules.pop(module_name, None)
+            else:
+                sys.modules[module_name] = previous
+            raise
+
+        return [cls for _, cls in inspect.getmembers(module, inspect.isclass)
+                if issubclass(cls, BaseStrategy) and cls is not BaseStrategy
+                and cls.__module__ == module_name]
+
+
+_LOADERS: dict[str, StrategyLoader] = {}
+
+
+def get_loader(directory: str) -> StrategyLoader:
+    """每個目錄共用一個 loader (索引跨輪保留)"""
+    key = os.path.abspath(directory)
+    if key not in _LOADERS:
+        _LOADERS[key] = StrategyLoader(directory)
+    return _LOADERS[key]
@@ -0,0 +1,243 @@
+"""
+參數掃描 (Parameter Sweep)
+
+把 app.run_main_simulation 讀取的環境變數 (NOISE、KILL_AND_REPRODUCE_COUNT、ROUNDS_PER_GAME...)
+展開成 "格子 (cell)"，每格執行 replicates 次獨立模擬，平行排程到 process pool：
+- 格子 = grid 的笛卡兒積 (另可附加 list 中逐一列出的設定)。
+- 任務依 "預估耗時" 由長到短送出 (最長的先跑，避免最後只剩一個大任務在跑)。
+- 每個任務的結果寫成一個 JSON；重新執行時，已有結果的任務會被略過。
+  結果檔以 "完整參數 (格子 + 環境變數 + 預設值) + 策略名稱與版本" 的雜湊命名 (並記錄在檔案中)，
+  格子以外的環境變數或策略有變更時不會沿用舊結果。
+- 全部完成後輸出一份彙整表 (results.csv / results.json)。
+
+規格檔 (JSON):
+    {
+        "grid": {"NOISE": [0.01, 0.05], "ROUNDS_PER_GAME": [100, 200]},
+        "list": [{"NOISE": 0.1, "KILL_AND_REPRODUCE_COUNT": 10}],
+        "replicates": 4
+    }
+
+執行方式 (於專案根目錄):
+    python -m sweep sweep.json
+    python -m sweep --grid NOISE=0.01,0.05 --grid ROUNDS_PER_GAME=100,200 --replicates 4
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import app
+
+
+def expand_cells(spec: dict) -> list[dict[str, str]]:
+    """規格 -> 格子列表 (每格是 {環境變數: 值})，值一律轉成字串 (與環境變數相同)"""
+    cells = []
+    grid = spec.get("grid") or {}
+    if grid:
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            cells.append({name: str(value) for name, value in zip(names, values)})
+    for entry in spec.get("list") or []:
+        cells.append({name: str(value) for name, value in entry.items()})
+
+    known = set(app.PARAMETER_ENV.values())
+    for cell in cells:
+        unknown = set(cell) - known
+        if unknown:
+            raise ValueError(f"未知的參數: {', '.join(sorted(unknown))} (可用: {', '.join(sorted(known))})")
+    return cells
+
+
+def task_key(params: dict, strategy_versions: dict[str, str]) -> str:
+    """結果檔的鍵: read_parameters 的完整參數 + 策略名稱與版本 (任何一項不同就不沿用結果)"""
+    payload = {"parameters": params, "strategies": strategy_versions}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _result_path(output_dir: str, key: str, seed: int) -> str:
+    return os.path.join(output_dir, f"cell_{key}_seed{seed}.json")
+
+
+def _load_result(path: str, key: str) -> dict | None:
+    """已有且鍵相符的結果 (沒有或不相符時為 None)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return result if result.get("key") == key else None
+
+
+def expected_cost(params: dict, strategy_count: int) -> float:
+    """
+    預估耗時 (只用來排序)：每世代的互動次數 = 群體大小 * 場均 / 2 * 回合數。
+    快速模式不模擬個體互動，視為最短。
+    """
+    if params["engine_mode"] in ("replicator", "moran"):
+        return 0.0
+    population_size = strategy_count * params["initial_copies"]
+    return population_size * params["avg_matches_per_strategy"] / 2 * params["rounds_per_game"]
+
+
+def _run_task(strategy_types: list[type], params: dict, seed: int, result_path: str, cell: dict,
+              key: str, strategy_versions: dict[str, str]) -> str:
+    """(worker 子行程) 執行一次模擬，原子寫入結果檔"""
+    start_time = time.perf_counter()
+    ranking = app._run_replicate(strategy_types, params, seed)
+    result = {
+        "key": key,
+        "strategy_versions": strategy_versions,
+        "cell": cell,
+        "parameters": params,
+        "seed": seed,
+        "elapsed_seconds": time.perf_counter() - start_time,
+        "ranking": ranking,
+    }
+    temp_path = f"{result_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    os.replace(temp_path, result_path)
+    return result_path
+
+
+def run_sweep(spec: dict, output_dir: str, workers: int | None = None, base_seed: int = 0) -> list[dict]:
+    """
+    執行整個掃描，回傳彙整表的每一列 (每格一列)。
+
+    第 r 次重複使用 seed = base_seed + r (每一格相同，讓格子之間可以比較)。
+    """
+    strategy_types = app.load_strategies_or_none()
+    if not strategy_types:
+        return []
+    strategy_names = [t.__name__ for t in strategy_types]
+    strategy_versions = app.strategy_versions()
+
+    cells = expand_cells(spec)
+    replicates = int(spec.get("replicates", 1))
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    # --- 1. 建立任務 (略過已有結果的) ---
+    tasks = []
+    skipped = 0
+    keys = []
+    for cell in cells:
+        params = app.read_parameters({**os.environ, **cell})
+        key = task_key(params, strategy_versions)
+        keys.append(key)
+        for replicate in range(replicates):
+            seed = base_seed + replicate
+            result_path = _result_path(output_dir, key, seed)
+            if _load_result(result_path, key) is not None:
+                skipped += 1
+                continue
+            tasks.append((expected_cost(params, len(strategy_types)), cell, params, seed, result_path, key))
+
+    # --- 2. 最長的先跑 ---
+    tasks.sort(key=lambda task: task[0], reverse=True)
+    print(f"--- 參數掃描: {len(cells)} 格 x {replicates} 次, 待執行 {len(tasks)} "
+          f"(已有結果 {skipped}), {workers} 個行程 ---")
+
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_run_task, strategy_types, params, seed, result_path, cell,
+                        key, strategy_versions): (cell, seed)
+            for _, cell, params, seed, result_path, key in tasks
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            cell, seed = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[錯誤] 掃描任務失敗 ({cell}, seed={seed}): {e}")
+                continue
+            print(f"[Sweep] {done}/{len(tasks)} 完成 ({cell}, seed={seed})")
+    print(f"--- 掃描執行 {time.perf_counter() - start_time:.1f} 秒 ---")
+
+    # --- 3. 彙整 (從磁碟讀取，包含先前已完成的結果) ---
+    rows = []
+    for cell, key in zip(cells, keys):
+        rankings = []
+        for replicate in range(replicates):
+            result = _load_result(_result_path(output_dir, key, base_seed + replicate), key)
+            if result is not None:
+                rankings.append(result["ranking"])
+        report = app.aggregate_rankings(rankings, strategy_names)
+        rows.append({
+            **cell,
+            "replicates": len(rankings),
+            "winner": report[0]["name"] if report else "",
+            "mean_rank": {item["name"]: item["mean_rank"] for item in report},
+        })
+    write_table(rows, output_dir, strategy_names)
+    return rows
+
+
+def write_table(rows: list[dict], output_dir: str, strategy_names: list[str]):
+    """彙整表: results.json (完整) 與 results.csv (每格一列，每個策略一欄平均名次)"""
+    with open(os.path.join(output_dir, "results.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=4, ensure_ascii=False)
+
+    parameter_columns = list(dict.fromkeys(
+        name for row in rows for name in row if name not in ("replicates", "winner", "mean_rank")))
+    with open(os.path.join(output_dir, "results.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(parameter_columns + ["replicates", "winner"] + strategy_names)
+        for row in rows:
+            writer.writerow(
+                [row.get(name, "") for name in parameter_columns]
+                + [row["replicates"], row["winner"]]
+                + [f"{row['mean_rank'][name]:.2f}" if name in row["mean_rank"] else ""
+                   for name in strategy_names])
+    print(f"\n[Sweep] 彙整表已儲存至: {os.path.join(output_dir, 'results.csv')}")
+
+
+def _parse_grid(items: list[str]) -> dict[str, list[str]]:
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if not values:
+            raise ValueError(f"--grid 格式應為 NAME=v1,v2,...: {item}")
+        grid[name.strip()] = [value.strip() for value in values.split(",")]
+    return grid
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="參數掃描: 以 process pool 平行執行參數格子 x 重複次數")
+    parser.add_argument("spec", nargs="?", help="規格 JSON (grid / list / replicates)")
+    parser.add_argument("--grid", action="append", default=[], help="NAME=v1,v2,... (可重複，與規格檔合併)")
+    parser.add_argument("--replicates", type=int, help="每格的重複次數 (覆寫規格檔)")
+    parser.add_argument("--workers", type=int, default=0, help="平行行程數 (預設為 CPU 核心數)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed (第 r 次重複使用 seed + r)")
+    parser.add_argument("--name", help="輸出目錄名稱 (預設為規格檔名或 sweep)")
+    args = parser.parse_args(argv)
+
+    spec = {}
+    if args.spec:
+        with open(args.spec, encoding="utf-8") as f:
+            spec = json.load(f)
+    spec.setdefault("grid", {}).update(_parse_grid(args.grid))
+    if args.replicates is not None:
+        spec["replicates"] = args.replicates
+    if not spec["grid"] and not spec.get("list"):
+        parser.error("請提供規格檔或 --grid")
+
+    name = args.name or (os.path.splitext(os.path.basename(args.spec))[0] if args.spec else "sweep")
+    output_dir = os.path.join(app.OUTPUT_DIR, "sweeps", name)
+    rows = run_sweep(spec, output_dir, workers=args.workers or None, base_seed=args.seed)
+
+    print("\n" + "="*40)
+    for row in rows:
+        cell = ", ".join(f"{k}={v}" for k, v in row.items() if k not in ("replicates", "winner", "mean_rank"))
+        print(f"  {cell:<50} 勝者: {row['winner']:<20} ({row['replicates']} 次)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+每世代遙測資料 (Per-Generation Telemetry)
+
+simulation 每個世代追加一筆紀錄 (TELEMETRY=jsonl 或 bin)：
+種類數量、各種類分數的平均/最小/最大、滅絕事件、穩定度、累計互動次數與牆鐘時間。
+
+讀取 (逐筆、惰性，可安全讀取仍在寫入中的檔案):
+    python -m telemetry output/telemetry_<時間>.jsonl [--tail 5]
+"""
+import argparse
+import collections
+import json
+import math
+import queue
+import struct
+import sys
+import threading
+import time
+
+FORMATS = ("jsonl", "bin")
+
+# --- 二進位格式 ---
+# 檔頭: MAGIC + frame(JSON header)
+# 之後每個世代一個 frame: uint32 長度 + 內容
+#   內容 = _GENERATION (世代, 穩定度, 累計互動, 經過秒數, 本世代秒數)
+#        + 每個種類 (依 header 順序) _TYPE_ROW (數量, 平均, 最小, 最大；沒有個體時分數為 NaN)
+#        + uint16 滅絕數量 + 每個滅絕種類的 uint16 索引
+MAGIC = b"EVOTEL1\n"
+_LENGTH = struct.Struct("<I")
+_GENERATION = struct.Struct("<IIQdd")
+_TYPE_ROW = struct.Struct("<Ifff")
+_INDEX = struct.Struct("<H")
+
+
+def _encode_binary(record: dict, index_of: dict[str, int], names: list[str]) -> bytes:
+    parts = [_GENERATION.pack(record["generation"], record["stability_counter"],
+                              record["interactions"], record["elapsed"], record["generation_seconds"])]
+    counts, scores = record["counts"], record["scores"]
+    nan = (math.nan,) * 3
+    for name in names:
+        parts.append(_TYPE_ROW.pack(counts.get(name, 0), *scores.get(name, nan)))
+    parts.append(_INDEX.pack(len(record["extinct"])))
+    parts.extend(_INDEX.pack(index_of[name]) for name in record["extinct"])
+    payload = b"".join(parts)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _decode_binary(payload: bytes, names: list[str]) -> dict:
+    generation, stability_counter, interactions, elapsed, generation_seconds = \
+        _GENERATION.unpack_from(payload, 0)
+    offset = _GENERATION.size
+    counts, scores = {}, {}
+    for name in names:
+        count, mean, low, high = _TYPE_ROW.unpack_from(payload, offset)
+        offset += _TYPE_ROW.size
+        if count:
+            counts[name] = count
+        if not math.isnan(mean):
+            scores[name] = [mean, low, high]
+    (extinct_count,) = _INDEX.unpack_from(payload, offset)
+    offset += _INDEX.size
+    extinct = [names[_INDEX.unpack_from(payload, offset + i * _INDEX.size)[0]]
+               for i in range(extinct_count)]
+    return {
+        "generation": generation,
+        "elapsed": elapsed,
+        "generation_seconds": generation_seconds,
+        "interactions": interactions,
+        "stability_counter": stability_counter,
+        "counts": counts,
+        "scores": scores,
+        "extinct": extinct,
+    }
+
+
+class TelemetryWriter:
+    """
+    串流寫入器
+
+    write() 只把紀錄放進佇列 (不會阻塞 simulation)，
+    由背景執行緒負責編碼、寫入緩衝區，並每 flush_seconds 秒 flush 一次。
+    """
+
+    def __init__(self, path: str, strategy_names: list[str], fmt: str = "jsonl",
+                 metadata: dict | None = None, flush_seconds: float = 1.0):
+        if fmt not in FORMATS:
+            raise ValueError(f"未知的遙測格式: {fmt} (可用: {', '.join(FORMATS)})")
+        self.path = path
+        self.format = fmt
+        self.flush_seconds = flush_seconds
+        self._names = list(strategy_names)
+        self._index_of = {name: i for i, name in enumerate(self._names)}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+
+        header = {"format": fmt, "strategies": self._names, "metadata": metadata or {}}
+        if fmt == "jsonl":
+            self._file = open(path, "w", encoding="utf-8")
+            self._file.write(json.dumps({"header": header}, ensure_ascii=False) + "\n")
+        else:
+            self._file = open(path, "wb")
+            data = json.dumps(header, ensure_ascii=False).encode()
+            self._file.write(MAGIC + _LENGTH.pack(len(data)) + data)
+        self._file.flush()
+
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: dict):
+        """追加一筆世代紀錄 (非阻塞)"""
+        self._queue.put(record)
+
+    def close(self):
+        """寫完佇列中剩餘的紀錄並關閉檔案"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _encode(self, record: dict):
+        if self.format == "jsonl":
+            return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        return _encode_binary(record, self._index_of, self._names)
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                record = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                # 閒置時把緩衝區寫出，讓 reader 看到最新的世代
+                self._file.flush()
+                last_flush = time.monotonic()
+                continue
+            if record is None:
+                break
+            self._file.write(self._encode(record))
+            if time.monotonic() - last_flush >= self.flush_seconds:
+                self._file.flush()
+                last_flush = time.monotonic()
+        self._file.close()
+
+
+class TelemetryReader:
+    """
+    遙測檔的惰性讀取器
+
+    逐筆產生世代紀錄 (dict，兩種格式的欄位相同)，不會把整個檔案載入記憶體。
+    檔案仍在寫入時，最後一筆 "不完整" 的紀錄會被略過 (tail-safe)。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.format = "bin" if f.read(len(MAGIC)) == MAGIC else "jsonl"
+            if self.format == "bin":
+                (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+                self.header = json.loads(f.read(length))
+                self._data_offset = f.tell()
+            else:
+                f.seek(0)
+                self.header = json.loads(f.readline())["header"]
+                self._data_offset = f.tell()
+        self.strategy_names: list[str] = self.header["strategies"]
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            f.seek(self._data_offset)
+            if self.format == "jsonl":
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        return  # 寫到一半的最後一行
+                    yield json.loads(line)
+            else:
+                while True:
+                    prefix = f.read(_LENGTH.size)
+                    if len(prefix) < _LENGTH.size:
+                        return
+                    (length,) = _LENGTH.unpack(prefix)
+                    payload = f.read(length)
+                    if len(payload) < length:
+                        return  # 寫到一半的最後一個 frame
+                    yield _decode_binary(payload, self.strategy_names)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="讀取每世代遙測檔")
+    parser.add_argument("path", help="telemetry_*.jsonl 或 telemetry_*.bin")
+    parser.add_argument("--tail", type=int, default=0, help="只印出最後 N 個世代 (0 = 全部)")
+    args = parser.parse_args(argv)
+
+    reader = TelemetryReader(args.path)
+    print(f"--- {args.path} ({reader.format}, {len(reader.strategy_names)} 種策略) ---")
+    records = iter(reader)
+    if args.tail > 0:
+        records = collections.deque(records, maxlen=args.tail)
+
+    for record in records:
+        counts = ", ".join(f"{name} {count}" for name, count in
+                           sorted(record["counts"].items(), key=lambda item: -item[1]))
+        extinct = f" | 滅絕: {', '.join(record['extinct'])}" if record["extinct"] else ""
+        print(f"世代 {record['generation']:>5} | {record['elapsed']:>8.1f}s | "
+              f"穩定度 {record['stability_counter']:>3} | {counts}{extinct}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+群體的互動結構 (Population Topology)
+
+預設的群體是 "充分混合" 的：每次互動從整個群體中隨機抽兩人。
+設定 TOPOLOGY 後，個體固定在圖的節點上，只和 "鄰居" 互動：
+- 鄰接關係以 CSR 陣列 (indptr / indices) 保存，另存一份無向邊陣列 (edge_u / edge_v)；
+  全部是 NumPy 整數陣列，10^6 個節點也不會為每條邊建立 Python 物件。
+- 配對 = 均勻抽一條邊 (再隨機決定方向)，由 SimulationRNG 以區塊預抽，每次 O(1)。
+- 演化時，被淘汰的位置改由 "分數最高的鄰居" 的種類補位 (見 simulation.py)。
+
+TOPOLOGY 格式 (與 SELECTION 相同的 "名稱:參數" 寫法):
+    ring[:k]                 環狀，每個節點連到左右各 k 個 (預設 2)
+    lattice[:rows]           二維環面方格 (上下左右 4 鄰居)，rows x cols = 群體大小；
+                             未指定 rows 時取最接近正方形的分解 (例如 138 = 6 x 23)
+    small_world[:k[:p]]      Watts-Strogatz: 環狀 (k) 後以機率 p 重新連接 (預設 2, 0.1)
+    scale_free[:m]           Barabási-Albert: 每個新節點以偏好連結接上 m 條邊 (預設 2)
+    file:<路徑>              邊列表檔 (每行 "u v"，# 開頭為註解)，節點編號必須小於群體大小
+"""
+import math
+from array import array
+
+import numpy as np
+
+
+class Graph:
+    """
+    無向圖 (CSR 鄰接表)
+
+    建立時會移除自迴圈與重複的邊。
+    - indptr[i]:indptr[i+1] 是節點 i 的鄰居在 indices 中的範圍
+    - edge_u[e], edge_v[e] 是第 e 條無向邊 (u < v)
+    """
+
+    def __init__(self, node_count: int, edges: np.ndarray):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        if len(edges) and (edges.min() < 0 or edges.max() >= node_count):
+            raise ValueError(f"邊的端點超出範圍 (節點數 {node_count})")
+
+        u, v = edges[:, 0], edges[:, 1]
+        keep = u != v
+        low, high = np.minimum(u[keep], v[keep]), np.maximum(u[keep], v[keep])
+        keys = np.unique(low * node_count + high)
+
+        self.node_count = node_count
+        index_type = np.int32 if node_count < 2**31 else np.int64
+        self.edge_u = (keys // node_count).astype(index_type)
+        self.edge_v = (keys % node_count).astype(index_type)
+
+        sources = np.concatenate((self.edge_u, self.edge_v))
+        targets = np.concatenate((self.edge_v, self.edge_u))
+        order = np.argsort(sources, kind="stable")
+        self.indices = targets[order]
+        self.indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=node_count), out=self.indptr[1:])
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_u)
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def pair_block(self, generator: np.random.Generator, size: int):
+        """
+        預抽 size 個配對 (供 SimulationRNG.pair 使用)：
+        均勻抽一條 "有向" 邊 (= 無向邊 + 方向)，回傳 (i, j) 的迭代器。
+        """
+        if self.edge_count == 0:
+            raise ValueError("圖中沒有任何邊，無法配對")
+        picks = generator.integers(0, 2 * self.edge_count, size)
+        edge = picks >> 1
+        flip = (picks & 1).astype(bool)
+        u, v = self.edge_u[edge], self.edge_v[edge]
+        return zip(np.where(flip, v, u).tolist(), np.where(flip, u, v).tolist())
+
+    def best_neighbor(self, node: int, fitness: np.ndarray) -> int:
+        """適應度最高的鄰居 (同分取第一個；沒有鄰居時為自己)"""
+        neighbors = self.neighbors(node)
+        if len(neighbors) == 0:
+            return node
+        return int(neighbors[np.argmax(fitness[neighbors])])
+
+    def __repr__(self) -> str:
+        return f"Graph(nodes={self.node_count}, edges={self.edge_count})"
+
+
+# --- 圖產生器 (全部以 NumPy 批次建立邊陣列) ---
+
+def ring(node_count: int, k: int = 2) -> Graph:
+    nodes = np.arange(node_count)
+    edges = [np.stack((nodes, (nodes + d) % node_count), axis=1) for d in range(1, k + 1)]
+    return Graph(node_count, np.concatenate(edges))
+
+
+def lattice(node_count: int, rows: int | None = None) -> Graph:
+    """
+    rows x cols 的二維環面方格 (rows * cols = node_count)。
+    rows 未指定時取不大於 sqrt(node_count) 的最大因數 (最接近正方形)；
+    群體大小為質數時只能是 1 x n，即每個節點 2 個鄰居的環。
+    """
+    if rows is None:
+        rows = next(r for r in range(math.isqrt(node_count), 0, -1) if node_count % r == 0)
+    if rows <= 0 or node_count % rows:
+        raise ValueError(f"lattice 的列數 {rows} 無法整除群體大小 {node_count}")
+    cols = node_count // rows
+    nodes = np.arange(node_count)
+    row, col = nodes // cols, nodes % cols
+    right = row * cols + (col + 1) % cols
+    down = ((row + 1) % rows) * cols + col
+    return Graph(node_count, np.concatenate((np.stack((nodes, right), axis=1),
+                                             np.stack((nodes, down), axis=1))))
+
+
+def small_world(node_count: int, k: int = 2, p: float = 0.1,
+                generator: np.random.Generator | None = None) -> Graph:
+    generator = generator or np.random.default_rng()
+    nodes = np.arange(node_count)
+    edges = np.concatenate([np.stack((nodes, (nodes + d) % node_count), axis=1)
+                            for d in range(1, k + 1)])
+    rewire = generator.random(len(edges)) < p
+    edges[rewire, 1] = generator.integers(0, node_count, int(rewire.sum()))
+    return Graph(node_count, edges)
+
+
+def scale_free(node_count: int, m: int = 2, generator: np.random.Generator | None = None) -> Graph:
+    """
+    Barabási-Albert 偏好連結：從 m+1 個節點的完全圖開始，
+    每個新節點從 "目前所有邊的端點" 中均勻抽 m 個 (= 依度數成比例) 連接。
+    端點以扁平的 array 保存 (不建立 Python 物件)；抽到重複的目標時，
+    重複的邊會在建圖時被移除。
+    """
+    if node_count <= m:
+        raise ValueError(f"scale_free 需要大於 m 個節點: {node_count} <= {m}")
+    generator = generator or np.random.default_rng()
+    seed_nodes = m + 1
+    seed_edges = [(i, j) for i in range(seed_nodes) for j in range(i)]
+    total = 2 * len(seed_edges) + 2 * m * (node_count - seed_nodes)
+
+    endpoints = array("q", bytes(8 * total))
+    for position, (i, j) in enumerate(seed_edges):
+        endpoints[2 * position], endpoints[2 * position + 1] = i, j
+    filled = 2 * len(seed_edges)
+
+    picks = iter(())
+    for node in range(seed_nodes, node_count):
+        available = filled
+        for _ in range(m):
+            try:
+                pick = next(picks)
+            except StopIteration:
+                picks = iter(generator.random(1 << 16).tolist())
+                pick = next(picks)
+            endpoints[filled] = node
+            endpoints[filled + 1] = endpoints[int(pick * available)]
+            filled += 2
+    return Graph(node_count, np.frombuffer(endpoints, dtype=np.int64))
+
+
+def from_edge_list(path: str, node_count: int) -> Graph:
+    edges = np.loadtxt(path, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2)
+    file_nodes = int(edges.max()) + 1 if len(edges) else 0
+    if file_nodes > node_count:
+        raise ValueError(f"邊列表 {path} 有 {file_nodes} 個節點，但群體只有 {node_count} 個體")
+    return Graph(node_count, edges)
+
+
+TOPOLOGIES = ("ring", "lattice", "small_world", "scale_free", "file")
+
+
+def make_topology(spec: str, node_count: int, seed: int | None = None) -> Graph | None:
+    """
+    由設定字串建立互動圖 (TOPOLOGY 環境變數)；空字串 / "well_mixed" 代表充分混合 (None)。
+
+    隨機圖使用由 seed 衍生的獨立亂數流 (不消耗模擬的 RNG)，
+    同一個 seed 會得到同一張圖 (checkpoint 接續時可重建)。
+    """
+    spec = spec.strip()
+    if not spec or spec == "well_mixed":
+        return None
+    name, _, argument = spec.partition(":")
+    name = name.strip().lower()
+    if name == "file":
+        return from_edge_list(argument, node_count)
+
+    arguments = [a for a in argument.split(":") if a]
+    generator = np.random.default_rng([seed or 0, 1])
+    if name == "ring":
+        return ring(node_count, *(int(a) for a in arguments[:1]))
+    if name == "lattice":
+        return lattice(node_count, *(int(a) for a in arguments[:1]))
+    if name == "small_world":
+        k = int(arguments[0]) if arguments else 2
+        p = float(arguments[1]) if len(arguments) > 1 else 0.1
+        return small_world(node_count, k, p, generator)
+    if name == "scale_free":
+        return scale_free(node_count, *(int(a) for a in arguments[:1]), generator=generator)
+    raise ValueError(f"未知的互動結構: {spec} (可用: well_mixed, {', '.join(TOPOLOGIES)})")
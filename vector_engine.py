@@ -0,0 +1,321 @@
+import numpy as np
+import engine
+from definitions import Move, PAYOFF_BY_CODE
+from reporting import DEFAULT_REPORTER, Reporter
+from rng import SimulationRNG
+from strategies.base_strategy import BaseStrategy, configure_population
+
+
+# --- 1. "查表式" 策略的決策規則 ---
+#
+# 每個規則是一個 "狀態 -> 出招" 的函數，狀態由以下 bit 組成 (皆為 0/1)：
+#   first       : 我與這個對手 "從未" 互動過
+#   opp_last    : 對手上一回合 (私怨) 的 "實際" 出招 (1 = CHEAT)
+#   my_last     : 我上一回合 (私怨) 的 "實際" 出招
+#   opp_cheat2  : 對手 (私怨) "連續 2 次以上" 實際背叛
+#   grudge      : 對手 (私怨) "曾經" 實際背叛
+#   g_first     : 我在整個錦標賽中 "從未" 互動過
+#   g_my_last   : 我 "全局" 上一回合的實際出招
+#   g_opp_last  : 我 "全局" 上一回合 "對手" 的實際出招
+#   coin        : 公平硬幣 (Random 用)
+#
+# 注意：Pavlov 的 "贏" (REWARD / TEMPTATION) 等價於 "對手上回合合作"，
+#       因此 Win-Stay, Lose-Shift = my_last XOR opp_last。
+STATE_BITS = ("first", "opp_last", "my_last", "opp_cheat2", "grudge",
+              "g_first", "g_my_last", "g_opp_last", "coin")
+
+C, D = 0, 1
+_BIT = {name: 1 << i for i, name in enumerate(STATE_BITS)}
+
+TABLE_RULES = {
+    "always_cooperate": lambda s: C,
+    "always_cheat": lambda s: D,
+    "random": lambda s: s["coin"],
+    "tit_for_tat": lambda s: C if s["first"] else s["opp_last"],
+    "pavlov": lambda s: C if s["first"] else s["my_last"] ^ s["opp_last"],
+    "global_pavlov": lambda s: C if s["g_first"] else s["g_my_last"] ^ s["g_opp_last"],
+    "grudger": lambda s: s["grudge"],
+    "tit_for_two_tats": lambda s: s["opp_cheat2"],
+}
+RULE_NAMES = tuple(TABLE_RULES)
+
+
+def _build_decision_table() -> np.ndarray:
+    """
+    將每個規則展開成 [規則, 狀態編號] -> 出招 的查表 (uint8)。
+    """
+    table = np.zeros((len(RULE_NAMES), 1 << len(STATE_BITS)), dtype=np.uint8)
+    for state_index in range(table.shape[1]):
+        state = {name: (state_index >> bit) & 1
+                 for bit, name in enumerate(STATE_BITS)}
+        for rule_index, name in enumerate(RULE_NAMES):
+            table[rule_index, state_index] = TABLE_RULES[name](state)
+    return table
+
+
+DECISION_TABLE = _build_decision_table()
+
+# result_code = 2 * my_move + opponent_move (見 definitions.MATCH_RESULTS)
+PAYOFF_TABLE = np.array(PAYOFF_BY_CODE, dtype=np.int64)
+
+# 一次預先抽取多少 "批次" 的配對與亂數
+BATCHES_PER_CHUNK = 256
+# 每個 chunk 的陣列最多 CHUNK_ELEMENTS 個元素 (批次數 x 群體大小)，
+# 大群體時減少批次數，讓預抽的暫存陣列維持在數十 MB 以內
+CHUNK_ELEMENTS = 1 << 22
+
+# 群體的 "配對數" (n * n) 不超過此值時，私怨狀態使用 n * n 的密集陣列；
+# 超過時只保存 "抽到過的配對" (依配對編號排序的稀疏陣列)，記憶體與實際互動的配對數成正比
+DENSE_PAIR_LIMIT = 1 << 20
+
+
+def _build_pair_transition() -> np.ndarray:
+    """
+    私怨狀態轉移表。
+
+    索引 key = (舊狀態 & (opp_last | grudge)) | (result_code << 2)，
+    其中 result_code 的 bit0 = 對手實際出招、bit1 = 我的實際出招
+    (剛好落在被遮掉的 bit2、bit3 上)。
+    """
+    table = np.zeros(32, dtype=np.int64)
+    for key in range(32):
+        old_opp_last = (key >> 1) & 1
+        old_grudge = (key >> 4) & 1
+        opp_actual = (key >> 2) & 1
+        my_actual = (key >> 3) & 1
+        table[key] = (
+            opp_actual * _BIT["opp_last"]
+            | my_actual * _BIT["my_last"]
+            | (opp_actual & old_opp_last) * _BIT["opp_cheat2"]
+            | (old_grudge | opp_actual) * _BIT["grudge"]
+        )
+    return table
+
+
+PAIR_TRANSITION = _build_pair_transition()
+_PAIR_KEEP = _BIT["opp_last"] | _BIT["grudge"]
+
+# 全局狀態: 由 result_code 直接得出 (g_my_last, g_opp_last)
+GLOBAL_TRANSITION = np.array(
+    [(code >> 1) * _BIT["g_my_last"] | (code & 1) * _BIT["g_opp_last"]
+     for code in range(4)], dtype=np.int64)
+
+
+def table_rule_of(strategy_type: type) -> str | None:
+    """
+    判斷某個策略類別能否由向量化引擎 "查表" 執行。
+
+    條件：宣告了已知的 TABLE_RULE，play() 就是宣告 TABLE_RULE 的類別的 play()
+    (子類別覆寫 play() 卻沿用父類別的 TABLE_RULE 時，查表會忽略它自己的邏輯)，
+    且沒有覆寫 apply_internal_noise() / update() (否則必須走 Python 路徑)。
+    """
+    rule = getattr(strategy_type, "TABLE_RULE", None)
+    if rule not in TABLE_RULES:
+        return None
+    owner = next(cls for cls in strategy_type.__mro__ if "TABLE_RULE" in vars(cls))
+    if strategy_type.play is not owner.play:
+        return None
+    if strategy_type.apply_internal_noise is not BaseStrategy.apply_internal_noise:
+        return None
+    if strategy_type.update is not BaseStrategy.update:
+        return None
+    return rule
+
+
+def _play_python_slots(strategies, slippers, is_table, me, opp, scores, slipped):
+    """
+    (混合群體) 非查表式個體照常呼叫 play() 與 (整數版) 內部雜訊，
+    結果寫回 slipped。
+    """
+    for slot in np.flatnonzero(~is_table[me]).tolist():
+        index = me[slot]
+        opponent_index = opp[slot]
+        opponent = strategies[opponent_index]
+        true_intent = strategies[index].play(
+            opponent.unique_id,
+            opponent.my_history,
+            int(scores[opponent_index]),
+        )
+        slipped[slot] = slippers[index](1 if true_intent is Move.CHEAT else 0)
+
+
+def _update_python_slots(strategies, recorders, is_table, me, opp, scores, slipped, actual, result, swap):
+    """
+    (混合群體) 非查表式個體以整數編碼記錄 (必要時轉回 Enum 呼叫 update())；
+    查表式個體則把紀錄寫進公開日誌 (my_history) 並同步 total_score，
+    讓 Python 策略看到與原引擎一致的對手資訊。
+    """
+    rows = zip(me.tolist(), opp.tolist(), is_table[me].tolist(),
+               slipped.tolist(), actual.tolist(),
+               slipped[swap].tolist(), actual[swap].tolist(), result.tolist())
+    for i, j, table_driven, my_slip, my_act, opp_slip, opp_act, res in rows:
+        if table_driven:
+            strategy = strategies[i]
+            strategy.my_history.append_codes(my_slip, my_act, opp_slip, opp_act, res)
+            strategy.total_score = int(scores[i])
+            continue
+        recorders[i](strategies[j].unique_id, my_slip, my_act, opp_slip, opp_act, res)
+
+
+class _SparsePairState:
+    """
+    大群體的私怨狀態: 只保存抽到過的配對 (配對編號 = 我 * n + 對手)。
+
+    keys 依編號排序，states 為對應的狀態 (與密集陣列相同的 bit)；
+    每個 chunk 先把新出現的配對插入 (初始狀態 first)，再把配對編號換成 states 的索引，
+    批次迴圈就和密集陣列一樣以索引讀寫 states。
+    """
+
+    def __init__(self):
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.states = np.zeros(0, dtype=np.int64)
+
+    def index(self, pair_keys: np.ndarray) -> np.ndarray:
+        """配對編號 -> states 的索引 (新配對先以初始狀態插入)"""
+        unique = np.unique(pair_keys)
+        positions = np.searchsorted(self.keys, unique)
+        known = positions < len(self.keys)
+        known[known] = self.keys[positions[known]] == unique[known]
+        if not known.all():
+            self.keys = np.insert(self.keys, positions[~known], unique[~known])
+            self.states = np.insert(self.states, positions[~known], _BIT["first"])
+        return np.searchsorted(self.keys, pair_keys)
+
+
+def run_tournament(strategies: list[BaseStrategy], rounds_per_game: int, avg_matches_per_strategy: int, noise: float = 0.0,
+                   rng: SimulationRNG | None = None, sort: bool = True,
+                   reporter: Reporter = DEFAULT_REPORTER):
+    """
+    向量化的互動制模型 (NumPy Vectorized Interaction Model)
+
+    與 engine.run_tournament 相同的介面與總互動次數 (N * M * R/2)，差別在於：
+    1. 每一 "批次" 把群體隨機排列後兩兩配對 (批次內沒有人重複出場)，
+       整批一起計算出招、雜訊、結果與分數。
+    2. "查表式" 策略 (見 TABLE_RULES) 的私怨/全局狀態存在 NumPy 陣列中，
+       出招由 DECISION_TABLE 一次查出。
+    3. 其他策略 "退回" Python 路徑 (照常呼叫 play / apply_internal_noise / update)。
+       此時查表式個體的公開日誌 (my_history) 與 total_score 每批次同步，
+       讓 Python 策略看到的對手資訊與原引擎一致。
+
+    注意：查表式個體的 "私怨" 歷史 (opponent_history) 只保存在陣列中，
+    不會寫回 HistoryLog。
+    """
+
+    if rng is None:
+        rng = SimulationRNG()
+
+    # 1. 重置所有策略 (依宣告的回溯深度建立歷史)，並交給它們同一個 RNG
+    configure_population(strategies)
+    for strategy in strategies:
+        strategy.rng = rng
+        strategy.reset()
+
+    # --- 2. 計算總 "單一互動" 次數 (與 engine.run_tournament 相同) ---
+    population_size = len(strategies)
+    total_interactions = engine.interaction_count(population_size, rounds_per_game, avg_matches_per_strategy)
+
+    reporter.detail(
+        f"--- 開始向量化循環賽 ({population_size} 位參賽者, {avg_matches_per_strategy} 場均/人, {noise*100:.1f}% 雜訊) ---")
+
+    # --- 3. 建立每個個體的 "規則編號" 與內部雜訊率 ---
+    rules = [table_rule_of(type(s)) for s in strategies]
+    rule_index = np.array([RULE_NAMES.index(r) if r else -1 for r in rules], dtype=np.int64)
+    is_table = rule_index >= 0
+    internal_noise = np.array([s.P_INTERNAL_NOISE for s in strategies], dtype=np.float64)
+
+    table_count = int(is_table.sum())
+    has_python = table_count < population_size
+    slippers = [s.code_slipper() for s in strategies]
+    recorders = [s.code_recorder() for s in strategies]
+    reporter.detail(f"--- 總互動次數: {total_interactions} (查表式 {table_count} / Python {population_size - table_count} 個體) ---")
+
+    # --- 4. 狀態陣列 ---
+    # 狀態直接以 STATE_BITS 的 bit 位置打包，查表前只需 OR 起來：
+    # - pair_state[我 * n + 對手]: first, opp_last, my_last, opp_cheat2, grudge
+    #   (n * n > DENSE_PAIR_LIMIT 時改為 _SparsePairState，索引換成抽到過的配對的編號)
+    # - global_state[我]:          g_first, g_my_last, g_opp_last
+    n = population_size
+    sparse_pairs = _SparsePairState() if n * n > DENSE_PAIR_LIMIT else None
+    pair_state = np.full(n * n, _BIT["first"], dtype=np.int64) if sparse_pairs is None else None
+    global_state = np.full(n, _BIT["g_first"], dtype=np.int64)
+    scores = np.zeros(n, dtype=np.int64)
+    rule_offset = np.where(is_table, rule_index, 0) * DECISION_TABLE.shape[1]
+    flat_table = DECISION_TABLE.reshape(-1)
+
+    # 批次亂數直接使用 RNG 底層的 numpy Generator
+    generator = rng.generator
+
+    pairs_per_batch = n // 2
+    progress_bar = reporter.progress(total_interactions, "  世代演化中")
+
+    # --- 5. 【批次互動迴圈】 ---
+    done = 0
+    while done < total_interactions and pairs_per_batch > 0:
+        # 5a. 一次預先產生 "多個批次" 的配對與所有亂數 (chunk)
+        #     每個批次 = 群體的一個隨機排列，前半與後半兩兩配對 (批次內不重複)
+        batch_pairs = min(pairs_per_batch, total_interactions - done)
+        chunk = max(1, min(BATCHES_PER_CHUNK, CHUNK_ELEMENTS // n, (total_interactions - done) // batch_pairs))
+        size = 2 * batch_pairs
+        swap = np.concatenate((np.arange(batch_pairs, size), np.arange(batch_pairs)))
+
+        me_chunk = np.tile(np.arange(n), (chunk, 1))
+        generator.permuted(me_chunk, axis=1, out=me_chunk)
+        me_chunk = me_chunk[:, :size]
+        pair_chunk = me_chunk * n + me_chunk[:, swap]
+        if sparse_pairs is not None:
+            pair_chunk = sparse_pairs.index(pair_chunk)
+            pair_state = sparse_pairs.states
+        # 硬幣 bit 與其他狀態 bit 不重疊，可以預先加進查表位移
+        offset_chunk = rule_offset[me_chunk] + (generator.random((chunk, size)) < 0.5) * _BIT["coin"]
+        internal_flip = generator.random((chunk, size)) < internal_noise[me_chunk]
+        external_flip = generator.random((chunk, size)) < noise
+        total_flip = internal_flip ^ external_flip
+
+        for b in range(chunk):
+            me = me_chunk[b]
+            pair = pair_chunk[b]
+
+            # 5b. 查表式個體：由狀態 bit 組出狀態編號，一次查出 "意圖"
+            old_pair_state = pair_state[pair]
+            state = old_pair_state | global_state[me]
+            intent = flat_table[offset_chunk[b] + state]
+
+            # 5c. 內部雜訊 ("手滑") + 外部雜訊
+            if has_python:
+                slipped = intent ^ internal_flip[b]
+                _play_python_slots(strategies, slippers, is_table, me, me[swap], scores, slipped)
+                actual = slipped ^ external_flip[b]
+            else:
+                actual = intent ^ total_flip[b]
+
+            # 5d. 結果與分數 (result_code = 2 * 我 + 對手)
+            result = (actual << 1) | actual[swap]
+            scores[me] += PAYOFF_TABLE[result]
+
+            # 5e. 更新狀態 (Python 個體的狀態不會被讀取，一併寫入無妨)
+            pair_state[pair] = PAIR_TRANSITION[(old_pair_state & _PAIR_KEEP) | (result << 2)]
+            global_state[me] = GLOBAL_TRANSITION[result]
+
+            # 5f. Python 個體：呼叫 update()；查表式個體：同步公開日誌與分數
+            if has_python:
+                _update_python_slots(strategies, recorders, is_table, me, me[swap], scores,
+                                     slipped, actual, result, swap)
+
+        done += chunk * batch_pairs
+        progress_bar.update(chunk * batch_pairs)
+
+    progress_bar.close()
+
+    # 6. 寫回查表式個體的總分
+    for i in np.flatnonzero(is_table):
+        strategies[i].total_score = int(scores[i])
+
+    reporter.detail("\r--- 向量化循環賽結束 ---")
+
+    # 7. 依分數排序 (與 engine.run_tournament 相同，sort=False 時依原本的順序回傳)
+    if not sort:
+        return strategies
+    sorted_strategies = sorted(
+        strategies, key=lambda s: s.total_score, reverse=True)
+
+    return sorted_strategies